@@ -5,18 +5,33 @@ import time
 import datetime
 import threading
 import atexit
-from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for
-from deep_translator import GoogleTranslator, MyMemoryTranslator
-import qrcode
+import hmac
+import hashlib
+import functools
+import itertools
+from flask import Flask, Response, render_template, request, jsonify, send_file, redirect, url_for, stream_with_context
 from io import BytesIO
-from room_manager import room_manager
+from werkzeug.middleware.proxy_fix import ProxyFix
+from room_manager import room_manager, ROOM_TYPES
+from compression import ResponseCompressor
 from translation_manager import translation_manager
+from translation_scheduler import translation_scheduler, SchedulerOverloaded
+from transcript_log import transcript_log
+from latency_tracer import latency_tracer
+from request_profiler import request_profiler
+from cache_warmer import cache_warmer
+from phrase_table import phrase_tables
+from audio_preprocessor import audio_preprocessor
+from sharding import shard_map, token_valid
+from room_snapshot import room_snapshot
+from log_config import get_logger
+
+logger = get_logger(__name__)
 
 # ============================================================
 # SYSTÈME DE TRANSCRIPTION AUDIO (AZURE TEMPORAIRE)
 # ============================================================
 
-import azure.cognitiveservices.speech as speechsdk
 import tempfile
 
 class SpeechTranscriptionManager:
@@ -28,18 +43,33 @@ class SpeechTranscriptionManager:
         self.azure_region = os.environ.get('AZURE_SPEECH_REGION', 'westeurope')
         self.service_available = self.azure_key != 'not-configured'
         
-        print(f"🎤 Speech Manager initialisé - Azure disponible: {self.service_available}")
+        logger.info("🎤 Speech Manager initialisé - Azure disponible: %s", self.service_available)
     
     def transcribe_audio(self, audio_file, language='fr-FR'):
         """Transcrit un fichier audio avec Azure"""
         if not self.service_available:
             raise Exception("Azure Speech non configuré")
+        
+        # Mono 16 kHz sans les silences de début et de fin (WAV uniquement)
+        audio = audio_preprocessor.process(audio_file.read())
+        if audio['silent']:
+            logger.info("🔇 Enregistrement silencieux (%ss), reconnaissance ignorée", audio['duration'])
+            return {
+                'success': True,
+                'text': '',
+                'confidence': 0.0,
+                'service': 'azure',
+                'silent': True
+            }
+        
+        # Importer ici : le SDK Azure est lourd et inutile au démarrage
+        import azure.cognitiveservices.speech as speechsdk
             
         try:
             # Sauvegarder temporairement
             with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as temp_file:
                 temp_path = temp_file.name
-                audio_file.save(temp_path)
+                temp_file.write(audio['audio'])
             
             # Configuration Azure
             speech_config = speechsdk.SpeechConfig(
@@ -71,7 +101,7 @@ class SpeechTranscriptionManager:
                 raise Exception(f"Erreur Azure: {result.reason}")
                 
         except Exception as e:
-            print(f"❌ Erreur transcription Azure: {str(e)}")
+            logger.error("❌ Erreur transcription Azure: %s", e)
             raise e
 
 # Instance globale (remplace whisper_model)
@@ -85,8 +115,8 @@ speech_manager = SpeechTranscriptionManager()
 IS_PRODUCTION = os.environ.get('RENDER') is not None
 BASE_URL = "https://tradlive-app.onrender.com" if IS_PRODUCTION else "http://localhost:5000"
 
-print(f"🌍 Environnement: {'PRODUCTION (Render.com)' if IS_PRODUCTION else 'DÉVELOPPEMENT (Local)'}")
-print(f"🔗 URL de base: {BASE_URL}")
+logger.info("🌍 Environnement: %s", 'PRODUCTION (Render.com)' if IS_PRODUCTION else 'DÉVELOPPEMENT (Local)')
+logger.info("🔗 URL de base: %s", BASE_URL)
 
 # ============================================================
 # VARIABLES GLOBALES
@@ -98,6 +128,38 @@ heartbeat_lock = threading.Lock()
 server_running = True
 heartbeat_thread = None
 
+# QR codes encodés gardés en mémoire (clé : URL + paramètres de rendu)
+QR_CACHE_SIZE = int(os.environ.get('QR_CACHE_SIZE', 256))
+QR_MAX_AGE = 86400  # Un QR code ne dépend que de ses paramètres : cache navigateur d'un jour
+
+# Pages HTML rendues gardées en mémoire (room.html ne dépend que de room_id)
+PAGE_CACHE_SIZE = int(os.environ.get('PAGE_CACHE_SIZE', 1024))
+STATIC_MAX_AGE = 31536000  # Fichiers statiques versionnés : cache navigateur d'un an
+
+# Messages lus (et traduits si besoin) par bloc lors d'un export de transcription
+TRANSCRIPT_CHUNK_SIZE = 50
+
+# Limites de l'API de traduction groupée
+MAX_BATCH_TEXTS = 100
+MAX_BATCH_CHARS = 20000
+
+# Nombre de proxys de confiance devant l'application (Render.com : 1). Seuls leurs
+# en-têtes X-Forwarded-* sont pris en compte ; les valeurs fournies par le client sont ignorées
+PROXY_FIX_HOPS = int(os.environ.get('PROXY_FIX_HOPS', 1 if IS_PRODUCTION else 0))
+
+# Durée maximale d'attente d'une requête /updates en long-poll (secondes)
+LONG_POLL_MAX_WAIT = float(os.environ.get('LONG_POLL_MAX_WAIT', 25))
+# Long-polls en attente simultanément dans ce processus : chacun occupe un thread
+# gthread, il en faut de libres pour les autres requêtes (Procfile : 64 threads).
+# Au-delà, /updates répond tout de suite et le client repasse en polling espacé
+LONG_POLL_MAX_WAITERS = int(os.environ.get('LONG_POLL_MAX_WAITERS', 48))
+LONG_POLL_FALLBACK_DELAY = 2  # secondes
+long_poll_slots = threading.BoundedSemaphore(LONG_POLL_MAX_WAITERS)
+
+# Intervalle du nettoyage des salles vides et des utilisateurs inactifs (secondes)
+ROOM_CLEANUP_INTERVAL = float(os.environ.get('ROOM_CLEANUP_INTERVAL', 60))
+room_cleanup_thread = None
+
 # Cache pour les traductions (pour éviter de re-traduire les mêmes phrases)
 translation_cache = {}
 MAX_CACHE_SIZE = 200
@@ -107,6 +169,59 @@ MAX_CACHE_SIZE = 200
 # ============================================================
 
 app = Flask(__name__, template_folder='templates')
+if PROXY_FIX_HOPS:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=PROXY_FIX_HOPS, x_proto=PROXY_FIX_HOPS)
+
+# Compression gzip/brotli des réponses (variantes compressées mises en cache)
+ResponseCompressor(app)
+request_profiler.init_app(app)
+
+# ============================================================
+# PAGES ET FICHIERS STATIQUES
+# ============================================================
+
+@functools.lru_cache(maxsize=None)
+def static_version(filename):
+    """Empreinte du contenu d'un fichier statique (calculée une fois)"""
+    with open(os.path.join(app.static_folder, filename), 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()[:12]
+
+@app.template_global()
+def static_url(filename):
+    """URL versionnée d'un fichier statique : peut être mise en cache indéfiniment"""
+    return url_for('static', filename=filename, v=static_version(filename))
+
+@app.template_global()
+def room_max_users(room_type):
+    """Capacité d'un type de salle, affichée dans le formulaire de création"""
+    return ROOM_TYPES[room_type].max_users
+
+@functools.lru_cache(maxsize=PAGE_CACHE_SIZE)
+def render_cached_page(template_name, room_id=None):
+    """
+    Rend une page dont le contenu ne dépend que de room_id
+    Returns: (html, ETag)
+    """
+    html = render_template(template_name, room_id=room_id)
+    return html, hashlib.sha1(html.encode('utf-8')).hexdigest()
+
+def cached_page_response(template_name, room_id=None):
+    """Réponse HTML depuis le cache, revalidée par ETag par le navigateur"""
+    html, etag = render_cached_page(template_name, room_id)
+    response = app.response_class(html, mimetype='text/html')
+    response.set_etag(etag)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.after_request
+def add_static_cache_headers(response):
+    """Cache long pour les fichiers statiques versionnés (?v=...)"""
+    if request.endpoint == 'static' and 'v' in request.args:
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        response.cache_control.immutable = True
+    return response
 
 # ============================================================
 # SURVEILLANCE DU HEARTBEAT
@@ -124,11 +239,32 @@ def check_heartbeat():
                 time_since_last_heartbeat = (datetime.datetime.now() - last_heartbeat).total_seconds()
                 
                 if time_since_last_heartbeat > 30:  # 30 secondes en production
-                    print("\nAucune activité client détectée. Nettoyage des salles...")
+                    logger.info("Aucune activité client détectée. Nettoyage des salles...")
                     room_manager.cleanup_rooms()
                     
         except Exception as e:
-            print(f"Erreur dans la vérification du heartbeat: {str(e)}")
+            logger.error("Erreur dans la vérification du heartbeat: %s", e)
+
+def periodic_room_cleanup():
+    """
+    Expire les utilisateurs inactifs et supprime les salles vides, dans chaque
+    processus (sous gunicorn, la surveillance du heartbeat n'est pas lancée)
+    """
+    while server_running:
+        time.sleep(ROOM_CLEANUP_INTERVAL)
+        try:
+            room_manager.cleanup_rooms()
+        except Exception as e:
+            logger.error("Erreur lors du nettoyage périodique des salles: %s", e)
+
+def start_room_cleanup():
+    """Lance le nettoyage périodique (une seule fois par processus)"""
+    global room_cleanup_thread
+    if room_cleanup_thread is not None:
+        return
+    room_cleanup_thread = threading.Thread(target=periodic_room_cleanup, name='room-cleanup')
+    room_cleanup_thread.daemon = True
+    room_cleanup_thread.start()
 
 def update_heartbeat():
     """Met à jour le timestamp du dernier heartbeat"""
@@ -146,31 +282,70 @@ def cleanup():
     if heartbeat_thread and heartbeat_thread.is_alive():
         heartbeat_thread.join(timeout=0.5)
     
-    print("Nettoyage effectué, fermeture du programme.")
+    # Conserver les phrases fréquentes pour le préchauffage du prochain démarrage
+    cache_warmer.save_history()
+    
+    # Phrases courtes souvent confirmées : ajoutées à la table de phrases locale
+    phrase_tables.learn_from(translation_manager)
+    
+    # Écrire les derniers messages des transcriptions
+    transcript_log.close()
+    
+    # Instantané des salles : le prochain démarrage les restaure
+    room_snapshot.save()
+    
+    logger.info("Nettoyage effectué, fermeture du programme.")
 
 atexit.register(cleanup)
 
+# Restaurer les salles du dernier arrêt avant de servir la première requête
+room_snapshot.restore()
+room_snapshot.start()
+
+# Expiration des utilisateurs inactifs et des salles vides
+start_room_cleanup()
+
+# Préchauffage du cache de traduction en arrière-plan (ne bloque pas le démarrage)
+cache_warmer.start()
+
 # ============================================================
 # GÉNÉRATION DE QR CODE
 # ============================================================
 
-def generate_qr_code(url):
-    """Génère un QR code pour l'URL du serveur"""
+QR_MIMETYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+@functools.lru_cache(maxsize=QR_CACHE_SIZE)
+def generate_qr_code(url, image_format='png', box_size=10, border=4):
+    """
+    Génère un QR code pour l'URL du serveur
+    Returns: (contenu encodé, ETag) - mis en cache par URL et paramètres de rendu
+    """
+    # Importer ici : qrcode (et PIL) ne sont chargés qu'au premier QR code
+    import qrcode
+    import qrcode.image.svg
+    
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
-        box_size=10,
-        border=4,
+        box_size=box_size,
+        border=border,
     )
     qr.add_data(url)
     qr.make(fit=True)
     
-    img = qr.make_image(fill_color="black", back_color="white")
+    if image_format == 'svg':
+        # SVG : simple sérialisation de chemins, bien moins coûteux qu'un encodage PNG
+        img = qr.make_image(image_factory=qrcode.image.svg.SvgPathImage)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
     
     buffer = BytesIO()
     img.save(buffer)
-    buffer.seek(0)
-    return buffer
+    content = buffer.getvalue()
+    return content, hashlib.sha1(content).hexdigest()
 
 # ============================================================
 # FONCTIONS DE TRADUCTION (SIMPLIFIÉES)
@@ -190,6 +365,40 @@ def translate_to_french(text, source_lang):
     except Exception as e:
         return f"Erreur de traduction: {str(e)}"
 
+def overloaded_response(error):
+    """Réponse 429 quand l'ordonnanceur de traduction rejette le travail"""
+    response = jsonify({'success': False, 'error': str(error), 'overloaded': True})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+def client_key():
+    """Clé d'équité pour les appels hors salle (adresse du client, voir PROXY_FIX_HOPS)"""
+    return f"client:{request.remote_addr}"
+
+def misdirected_response(room_id):
+    """
+    Mode réparti : réponse 421 si la salle a été transférée à un autre worker
+    (le routeur rejoue la requête auprès du worker indiqué)
+    """
+    owner = room_manager.moved.get(room_id)
+    if owner is None:
+        return None
+    response = jsonify({'success': False, 'error': 'Salle transférée', 'owner': owner})
+    response.status_code = 421
+    response.headers['X-Shard-Owner'] = owner
+    return response
+
+@app.before_request
+def redirect_moved_rooms():
+    """Les requêtes d'une salle transférée sont renvoyées vers son nouveau worker"""
+    if not room_manager.moved:
+        return None
+    room_id = (request.view_args or {}).get('room_id')
+    if room_id is not None and room_id not in room_manager.rooms:
+        return misdirected_response(room_id)
+    return None
+
 # ============================================================
 # ROUTES FLASK - SYSTÈME DE SALLES UNIQUEMENT
 # ============================================================
@@ -204,7 +413,7 @@ def index():
 def rooms_page():
     """Page principale pour créer ou rejoindre une salle"""
     update_heartbeat()
-    return render_template('rooms.html')
+    return cached_page_response('rooms.html')
 
 @app.route('/api/create-room', methods=['POST'])
 def create_room():
@@ -221,6 +430,8 @@ def create_room():
         host_language = data.get('language', 'fr')
         room_name = data.get('room_name', '').strip() if data.get('room_name') else ''
         password = data.get('password', '').strip() if data.get('password') else None
+        room_type = data.get('room_type', 'meeting')
+        transcript = bool(data.get('transcript', False))
         
         if not host_nickname:
             return jsonify({'success': False, 'error': 'Pseudo requis'}), 400
@@ -228,8 +439,11 @@ def create_room():
         if not room_name:
             return jsonify({'success': False, 'error': 'Nom de salle requis'}), 400
         
+        if room_type not in ROOM_TYPES:
+            return jsonify({'success': False, 'error': 'Type de salle inconnu'}), 400
+        
         room_id, user_id, success = room_manager.create_room(
-            host_nickname, host_language, room_name, password
+            host_nickname, host_language, room_name, password, room_type, transcript
         )
         
         if success:
@@ -267,6 +481,9 @@ def join_room():
         if not nickname:
             return jsonify({'success': False, 'error': 'Pseudo requis'}), 400
         
+        if room_id not in room_manager.rooms and room_id in room_manager.moved:
+            return misdirected_response(room_id)
+        
         user_id, success, error_message = room_manager.join_room(
             room_id, nickname, language, password
         )
@@ -299,7 +516,7 @@ def room_interface(room_id):
         # Rediriger vers la page de rejoindre avec le room_id pré-rempli
         return redirect(url_for('rooms_page') + f'?join={room_id}')
     
-    return render_template('room.html', room_id=room_id)
+    return cached_page_response('room.html', room_id)
 
 @app.route('/api/room/<room_id>/info')
 def room_info(room_id):
@@ -310,9 +527,14 @@ def room_info(room_id):
     if not room:
         return jsonify({'success': False, 'error': 'Salle introuvable'}), 404
     
+    # Conférence : ne pas renvoyer des milliers d'auditeurs à chaque arrivée
+    user_ids = None
+    if room.room_type == 'lecture':
+        user_ids = [room.host_id, request.args.get('user_id')]
+    
     return jsonify({
         'success': True,
-        'room': room.to_dict()
+        'room': room.to_dict(user_ids)
     })
 
 @app.route('/api/room/<room_id>/leave', methods=['POST'])
@@ -341,6 +563,7 @@ def leave_room(room_id):
 def room_translate(room_id):
     """Traduit un message pour toute la salle"""
     update_heartbeat()
+    received_at = time.monotonic()
     
     try:
         data = request.json
@@ -358,25 +581,119 @@ def room_translate(room_id):
         if not room or not room.get_user(user_id):
             return jsonify({'success': False, 'error': 'Utilisateur non autorisé'}), 403
         
+        if not room.can_broadcast(room.get_user(user_id)):
+            return jsonify({'success': False, 'error': 'Seul l\'hôte peut parler dans une conférence'}), 403
+        
         room_manager.update_user_activity(room_id, user_id)
         
+        trace = latency_tracer.start(room_id, 'text', received_at)
+        if trace:
+            trace.span('upload', received_at)
+        
         # Diffuser la traduction avec synthèse vocale côté client
-        success = room_manager.broadcast_translation(room_id, text, source_language, enable_speech=True)
+        success = room_manager.broadcast_translation(room_id, text, source_language, user_id, enable_speech=True, trace=trace)
         
         if success:
             return jsonify({
                 'success': True,
-                'message': 'Traduction diffusée à toute la salle'
+                'message': 'Traduction diffusée à toute la salle',
+                'trace_id': trace.trace_id if trace else None
             })
         else:
             return jsonify({'success': False, 'error': 'Erreur de diffusion'}), 500
+    
+    except SchedulerOverloaded as e:
+        return overloaded_response(e)
             
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/room/<room_id>/draft', methods=['POST'])
+def room_draft(room_id):
+    """
+    Brouillon en cours de saisie : pré-traduit en arrière-plan (basse priorité)
+    pour que l'envoi final soit servi par le cache. Au mieux : jamais d'erreur
+    de saturation, le brouillon est simplement ignoré.
+    """
+    try:
+        data = request.json
+        user_id = data.get('user_id')
+        text = data.get('text', '').strip()
+        source_language = data.get('source_language', 'fr')
+        
+        room = room_manager.get_room(room_id)
+        user = room.get_user(user_id) if room and user_id else None
+        if not user:
+            return jsonify({'success': False, 'error': 'Utilisateur non autorisé'}), 403
+        
+        if not text or not room.can_broadcast(user):
+            return jsonify({'success': True, 'scheduled': 0})
+        
+        scheduled = room_manager.pretranslate_draft(room_id, text, source_language, user_id)
+        return jsonify({'success': True, 'scheduled': scheduled}), 202 if scheduled else 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/translate-batch', methods=['POST'])
+def translate_batch():
+    """
+    Traduit plusieurs textes en une requête (ex : messages en attente après reconnexion)
+    Réservé aux membres d'une salle : {"room_id", "user_id", "texts", ...}
+    """
+    update_heartbeat()
+    
+    try:
+        data = request.json
+        
+        if not data:
+            return jsonify({'success': False, 'error': 'Données manquantes'}), 400
+        
+        room_id = str(data.get('room_id') or '')
+        user_id = data.get('user_id')
+        if not room_id or not user_id:
+            return jsonify({'success': False, 'error': 'Salle et User ID requis'}), 400
+        
+        room = room_manager.get_room(room_id)
+        if not room or not room.get_user(user_id):
+            return jsonify({'success': False, 'error': 'Utilisateur non autorisé'}), 403
+        
+        room_manager.update_user_activity(room_id, user_id)
+        
+        texts = data.get('texts')
+        source_language = data.get('source_language', 'fr')
+        target_language = data.get('target_language', 'fr')
+        
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return jsonify({'success': False, 'error': 'Liste de textes requise'}), 400
+        
+        if len(texts) > MAX_BATCH_TEXTS or sum(len(text) for text in texts) > MAX_BATCH_CHARS:
+            return jsonify({'success': False, 'error': 'Lot trop volumineux'}), 413
+        
+        translation_scheduler.admit(user_id)
+        translations = translation_scheduler.call(
+            lambda: translation_manager.translate_batch(texts, source_language, target_language),
+            room_id
+        )
+        
+        return jsonify({
+            'success': True,
+            'translations': translations
+        })
+    
+    except SchedulerOverloaded as e:
+        return overloaded_response(e)
+        
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/api/room/<room_id>/updates')
 def room_updates(room_id):
-    """Récupère les dernières traductions pour une salle"""
+    """
+    Récupère les dernières traductions pour une salle
+    Long-poll : avec ?since=<seq>&wait=<secondes>, la requête attend qu'un
+    message plus récent que `since` soit diffusé (ou l'expiration du délai)
+    """
     update_heartbeat()
     
     try:
@@ -391,72 +708,138 @@ def room_updates(room_id):
         
         room_manager.update_user_activity(room_id, user_id)
         
-        user = room.get_user(user_id)
-        user_language = user.language
-        
-        last_translation = room.last_translation
+        # Mode long-poll : attendre un message plus récent que le curseur du client
+        since = request.args.get('since', type=int)
+        wait = request.args.get('wait', 0, type=float)
+        retry_after = None
+        if since is not None and wait > 0:
+            if long_poll_slots.acquire(blocking=False):
+                try:
+                    room.wait_for_update(since, min(wait, LONG_POLL_MAX_WAIT))
+                finally:
+                    long_poll_slots.release()
+            else:
+                # Trop d'attentes en cours : réponse immédiate, nouvel essai après un délai
+                retry_after = LONG_POLL_FALLBACK_DELAY
         
-        # Interface différente selon le rôle (hôte vs participant)
-        if user.is_host:
-            # Pour l'hôte : voir les réponses des participants traduites en français
-            if last_translation.get('source_language') != 'fr':  # C'est une réponse d'un utilisateur
-                return jsonify({
-                    'success': True,
-                    'original': last_translation['translated'].get('fr', ''),
-                    'translated': '',
-                    'timestamp': last_translation['timestamp'].isoformat(),
-                    'is_host': True,
-                    'show_translation': False
-                })
-            else:  # C'est le message de l'hôte
-                return jsonify({
-                    'success': True,
-                    'original': last_translation['original'],
-                    'translated': '',
-                    'timestamp': last_translation['timestamp'].isoformat(),
-                    'is_host': True,
-                    'show_translation': False
-                })
+        # L'utilisateur a pu quitter la salle pendant l'attente
+        user = room.get_user(user_id)
+        if not user:
+            return jsonify({'success': False, 'error': 'Utilisateur non autorisé'}), 403
         
-        else:
-            # Pour les participants : voir le français original + traduction dans leur langue
-            if last_translation.get('source_language') == 'fr':  # Message de l'hôte
-                translated_text = last_translation['translated'].get(user_language, '')
-                
-                return jsonify({
-                    'success': True,
-                    'original': last_translation['original'],
-                    'translated': translated_text,
-                    'timestamp': last_translation['timestamp'].isoformat(),
-                    'is_host': False,
-                    'show_translation': True,
-                    'enable_speech': last_translation.get('enable_speech', False)
-                })
-            elif last_translation.get('source_language') == user_language:  # Son propre message
-                # Le participant voit sa propre traduction française
-                french_translation = last_translation['translated'].get('fr', '')
-                return jsonify({
-                    'success': True,
-                    'original': last_translation['original'],  # Son texte original
-                    'translated': french_translation,  # Traduction française
-                    'timestamp': last_translation['timestamp'].isoformat(),
-                    'is_host': False,
-                    'show_own_message': True,
-                    'show_translation': False
-                })
-            else:  # Message d'un autre utilisateur
-                return jsonify({
-                    'success': True,
-                    'original': '',
-                    'translated': '',
-                    'timestamp': last_translation['timestamp'].isoformat(),
-                    'is_host': False,
-                    'show_translation': False
-                })
+        # Réponse pré-sérialisée lors de la diffusion (voir Room._build_update_payloads)
+        payload = room.get_update_payload(user)
+        latency_tracer.delivered(room_id, room.message_seq, user_id)
+        response = app.response_class(payload, mimetype='application/json')
+        if retry_after:
+            response.headers['Retry-After'] = str(retry_after)
+        return response
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/room/<room_id>/transcript')
+def room_transcript(room_id):
+    """
+    Exporte la transcription d'une salle dans une langue donnée
+    Lecture en flux : le fichier n'est jamais chargé entièrement en mémoire
+    ?language=<code>&from=<n° de message>&format=text|jsonl
+    """
+    update_heartbeat()
+    
+    user_id = request.args.get('user_id')
+    if not user_id:
+        return jsonify({'success': False, 'error': 'User ID requis'}), 400
+    
+    room = room_manager.get_room(room_id)
+    if not room or not room.get_user(user_id):
+        return jsonify({'success': False, 'error': 'Utilisateur non autorisé'}), 403
+    
+    if not room.transcript_id:
+        return jsonify({'success': False, 'error': 'Transcription non activée pour cette salle'}), 404
+    
+    language = request.args.get('language', room.get_user(user_id).language)
+    start = max(request.args.get('from', 0, type=int), 0)
+    output_format = request.args.get('format', 'text')
+    transcript_id = room.transcript_id
+    
+    # Les traductions manquantes passent par l'ordonnanceur : limite de débit de
+    # l'utilisateur (un jeton par bloc à traduire, le premier consommé ici) et file de la salle
+    try:
+        translation_scheduler.admit(user_id)
+    except SchedulerOverloaded as e:
+        return overloaded_response(e)
+    admitted = [True]
+    
+    def format_entry(entry, text):
+        if output_format == 'jsonl':
+            return json.dumps({
+                'seq': entry['seq'],
+                'timestamp': entry['timestamp'],
+                'text': text
+            }, ensure_ascii=False) + '\n'
+        return f"[{entry['timestamp'][11:19]}] {text}\n"
+    
+    def translate_chunk(chunk):
+        """Texte de chaque message dans la langue demandée (traductions manquantes groupées)"""
+        texts = []
+        missing = {}  # {langue source: [positions]}
+        for position, entry in enumerate(chunk):
+            if entry['source_language'] == language:
+                texts.append(entry['original'])
+            elif language in entry['translated']:
+                texts.append(entry['translated'][language])
+            else:
+                texts.append(None)
+                missing.setdefault(entry['source_language'], []).append(position)
+        
+        if missing:
+            # Le premier bloc à traduire utilise le jeton pris avant l'export
+            if admitted:
+                admitted.pop()
+            else:
+                translation_scheduler.admit(user_id)
+        for source_language, positions in missing.items():
+            originals = [chunk[position]['original'] for position in positions]
+            translated = translation_scheduler.call(
+                lambda originals=originals, source_language=source_language:
+                    translation_manager.translate_batch(originals, source_language, language),
+                room_id
+            )
+            for position, text in zip(positions, translated):
+                texts[position] = text
+        return texts
+    
+    def format_chunk(chunk, position):
+        """Bloc formaté ; en cas de saturation, fin de l'export avec le point de reprise"""
+        try:
+            return ''.join(format_entry(e, text) for e, text in zip(chunk, translate_chunk(chunk))), True
+        except SchedulerOverloaded as e:
+            if output_format == 'jsonl':
+                return json.dumps({'error': str(e), 'resume_from': position}, ensure_ascii=False) + '\n', False
+            return f"[Export interrompu : {e}. Reprendre avec from={position}]\n", False
+    
+    def generate():
+        chunk = []
+        position = start
+        for entry in transcript_log.iter_entries(transcript_id, start):
+            chunk.append(entry)
+            if len(chunk) >= TRANSCRIPT_CHUNK_SIZE:
+                text, complete = format_chunk(chunk, position)
+                yield text
+                if not complete:
+                    return
+                position += len(chunk)
+                chunk = []
+        if chunk:
+            yield format_chunk(chunk, position)[0]
+    
+    mimetype = 'application/x-ndjson' if output_format == 'jsonl' else 'text/plain'
+    response = Response(stream_with_context(generate()), mimetype=mimetype)
+    extension = 'jsonl' if output_format == 'jsonl' else 'txt'
+    response.headers['Content-Disposition'] = f'attachment; filename="transcription-{room_id}-{language}.{extension}"'
+    return response
+
 @app.route('/api/room/<room_id>/heartbeat', methods=['POST'])
 def room_heartbeat(room_id):
     """Heartbeat pour une salle spécifique"""
@@ -487,9 +870,20 @@ def display_qrcode():
     
     # Utiliser l'URL appropriée selon l'environnement
     url = request.args.get('url', BASE_URL)
+    image_format = request.args.get('format', 'png')
+    if image_format not in QR_MIMETYPES:
+        return jsonify({'success': False, 'error': 'Format inconnu (png ou svg)'}), 400
+    box_size = min(max(request.args.get('box_size', 10, type=int), 1), 20)
+    border = min(max(request.args.get('border', 4, type=int), 0), 10)
+    
+    content, etag = generate_qr_code(url, image_format, box_size, border)
     
-    buffer = generate_qr_code(url)
-    return send_file(buffer, mimetype='image/png')
+    response = app.response_class(content, mimetype=QR_MIMETYPES[image_format])
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = QR_MAX_AGE
+    # Répond 304 si le navigateur possède déjà cette image (If-None-Match)
+    return response.make_conditional(request)
 
 @app.route('/server-status')
 def get_server_status():
@@ -506,12 +900,174 @@ def get_server_status():
 
 @app.route('/api/admin/stats')
 def admin_stats():
-    """Statistiques pour l'admin"""
+    """
+    Statistiques pour l'admin : agrégats tenus à jour en continu (O(1)),
+    le détail des salles est servi par /api/admin/rooms
+    """
+    update_heartbeat()
+    
+    stats = room_manager.get_stats()
+    stats['scheduler'] = translation_scheduler.get_stats()
+    stats['coalescing'] = translation_manager.in_flight.get_stats()
+    stats['phrase_tables'] = phrase_tables.get_stats()
+    return jsonify(stats)
+
+# Taille maximale d'une page de /api/admin/rooms
+ADMIN_ROOMS_MAX_LIMIT = 500
+
+@app.route('/api/admin/rooms')
+def admin_rooms():
+    """
+    Liste paginée des salles, envoyée au fil de l'eau
+    ?offset=0&limit=100 ; filtres : type, language, min_users, q (nom ou identifiant)
+    ?details=1 inclut utilisateurs et dernier message
+    """
     update_heartbeat()
     
-    room_manager.cleanup_rooms()
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    limit = min(max(request.args.get('limit', 100, type=int), 1), ADMIN_ROOMS_MAX_LIMIT)
+    details = request.args.get('details') == '1'
+    rooms = room_manager.iter_rooms(
+        room_type=request.args.get('type'),
+        language=request.args.get('language'),
+        min_users=request.args.get('min_users', 0, type=int),
+        query=request.args.get('q')
+    )
+    
+    def generate():
+        yield f'{{"offset": {offset}, "limit": {limit}, "rooms": ['
+        count = 0
+        # Une salle de plus que la page : indique s'il reste une page suivante
+        for room in itertools.islice(rooms, offset, offset + limit + 1):
+            if count == limit:
+                yield f'], "next_offset": {offset + limit}}}'
+                return
+            data = room.to_dict() if details else room.to_summary()
+            yield (',' if count else '') + json.dumps(data, ensure_ascii=False)
+            count += 1
+        yield '], "next_offset": null}'
+    
+    return Response(stream_with_context(generate()), mimetype='application/json')
+
+@app.route('/api/admin/latency')
+def admin_latency():
+    """
+    Latence de bout en bout des messages récents, étape par étape
+    ?room_id=<id> pour une seule salle, ?slow=<n> traces les plus lentes
+    """
+    update_heartbeat()
     
-    return jsonify(room_manager.get_stats())
+    room_id = request.args.get('room_id')
+    slow_count = min(request.args.get('slow', 10, type=int), 100)
+    return jsonify(latency_tracer.get_report(room_id, slow_count))
+
+# Jeton obligatoire du profileur (en-tête X-Admin-Token) : sans lui, le profileur est inaccessible
+PROFILER_ADMIN_TOKEN = os.environ.get('PROFILER_ADMIN_TOKEN', '')
+
+def profiler_authorized():
+    token = request.headers.get('X-Admin-Token') or ''
+    return bool(PROFILER_ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), PROFILER_ADMIN_TOKEN.encode('utf-8'))
+
+@app.route('/api/admin/profiler', methods=['GET', 'POST'])
+def admin_profiler():
+    """
+    État du profileur (GET) ou démarrage/arrêt (POST)
+    POST {"action": "start", "duration": 60, "rate": 0.1, "routes": ["/api/transcribe-audio"]}
+    POST {"action": "stop"}
+    """
+    if not profiler_authorized():
+        return jsonify({'success': False, 'error': 'Non autorisé'}), 403
+    
+    if request.method == 'POST':
+        data = request.json or {}
+        action = data.get('action', 'start')
+        try:
+            if action == 'start':
+                request_profiler.start(
+                    duration=min(float(data.get('duration', 60)), 3600),
+                    sample_rate=float(data.get('rate', 0.1)),
+                    routes=data.get('routes') or []
+                )
+            elif action == 'stop':
+                request_profiler.stop()
+            else:
+                return jsonify({'success': False, 'error': 'Action inconnue'}), 400
+        except (TypeError, ValueError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, 'profiler': request_profiler.get_status()})
+
+@app.route('/api/admin/profiler/flamegraph')
+def admin_profiler_flamegraph():
+    """Piles repliées de la dernière session (flamegraph.pl, speedscope.app)"""
+    if not profiler_authorized():
+        return jsonify({'success': False, 'error': 'Non autorisé'}), 403
+    
+    return Response(
+        request_profiler.collapsed(),
+        mimetype='text/plain',
+        headers={'Content-Disposition': 'inline; filename="profile.folded"'}
+    )
+
+# ============================================================
+# MODE RÉPARTI (routes internes appelées par le routeur et les workers)
+# ============================================================
+
+def shard_denied():
+    """
+    Refus des routes internes : 404 sans SHARD_SELF/SHARD_TOKEN, 403 sans le secret partagé.
+    Un worker seul mais configuré les accepte : c'est ainsi qu'on passe de 1 à N workers.
+    Returns: réponse d'erreur, ou None si la requête est autorisée
+    """
+    if not shard_map.configured:
+        return jsonify({'success': False, 'error': 'Mode réparti non configuré'}), 404
+    if not token_valid(request.headers.get('X-Shard-Token')):
+        return jsonify({'success': False, 'error': 'Non autorisé'}), 403
+    return None
+
+@app.route('/api/admin/shard')
+def admin_shard():
+    """Workers connus et salles locales"""
+    denied = shard_denied()
+    if denied:
+        return denied
+    
+    return jsonify({
+        **shard_map.get_stats(),
+        'rooms': len(room_manager.rooms),
+        'moved': len(room_manager.moved)
+    })
+
+@app.route('/api/admin/shard/import', methods=['POST'])
+def admin_shard_import():
+    """Reçoit les salles transférées par un autre worker"""
+    denied = shard_denied()
+    if denied:
+        return denied
+    
+    try:
+        states = (request.json or {}).get('rooms', [])
+        imported = sum(1 for state in states if room_manager.import_room(state))
+        return jsonify({'success': True, 'imported': imported})
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+@app.route('/api/admin/shard/rebalance', methods=['POST'])
+def admin_shard_rebalance():
+    """Nouvelle liste de workers : transfère les salles qui changent de propriétaire"""
+    denied = shard_denied()
+    if denied:
+        return denied
+    
+    workers = (request.json or {}).get('workers') or []
+    if not workers:
+        return jsonify({'success': False, 'error': 'Liste de workers requise'}), 400
+    
+    result = room_manager.rebalance(workers)
+    if result['failed']:
+        # Ancienne liste conservée : le routeur ne doit pas basculer
+        return jsonify({'success': False, 'error': 'Transferts incomplets', **result}), 502
+    return jsonify({'success': True, **result})
 
 @app.route('/set-preferred-language', methods=['POST'])
 def set_preferred_language():
@@ -543,6 +1099,8 @@ def transcribe_audio():
     if not speech_manager.service_available:
         return jsonify({'success': False, 'error': 'Azure Speech non configuré'}), 500
     
+    received_at = time.monotonic()
+    
     try:
         # Vérifier qu'un fichier audio a été envoyé
         if 'audio' not in request.files:
@@ -558,40 +1116,67 @@ def transcribe_audio():
         room_id = request.form.get('room_id')
         user_id = request.form.get('user_id')
         
+        # Salle transférée : le routeur rejoue la requête auprès du nouveau propriétaire
+        if room_id and room_id not in room_manager.rooms:
+            misdirected = misdirected_response(room_id)
+            if misdirected is not None:
+                return misdirected
+        
+        # Droits vérifiés avant la reconnaissance : un auditeur de conférence ne coûte pas d'appel Azure
+        room = user = None
+        if room_id:
+            room = room_manager.get_room(room_id)
+            user = room.get_user(user_id) if room and user_id else None
+            if not user:
+                return jsonify({'success': False, 'error': 'Utilisateur non autorisé'}), 403
+            if not room.can_broadcast(user):
+                return jsonify({'success': False, 'error': 'Seul l\'hôte peut parler dans une conférence'}), 403
+        
+        # Limite de débit avant la reconnaissance : un client limité ne coûte pas d'appel Azure
+        translation_scheduler.admit(user_id if user else client_key())
+        
+        # Trace de latence : l'envoi se termine une fois le formulaire lu
+        trace = latency_tracer.start(room_id, 'audio', received_at) if room_id else None
+        if trace:
+            trace.span('upload', received_at)
+        
         # Transcription avec Azure
+        transcribe_start = time.monotonic()
         result = speech_manager.transcribe_audio(audio_file, azure_lang)
+        if trace:
+            trace.span('transcribe', transcribe_start)
         
         transcribed_text = result['text']
         
         # Log pour débogage
-        print(f"🎤 Azure transcription: '{transcribed_text}' (langue: {azure_lang})")
+        logger.info("🎤 Azure transcription: '%s' (langue: %s)", transcribed_text, azure_lang)
         
         # Si on a un room_id, diffuser automatiquement
-        if room_id and user_id and transcribed_text:
-            room = room_manager.get_room(room_id)
-            if room and room.get_user(user_id):
-                room_manager.update_user_activity(room_id, user_id)
-                
-                # Diffuser selon le rôle
-                user = room.get_user(user_id)
-                source_language = 'fr' if user.is_host else user.language
-                
-                success = room_manager.broadcast_translation(
-                    room_id, 
-                    transcribed_text, 
-                    source_language, 
-                    user_id, 
-                    enable_speech=user.is_host
-                )
-                
-                return jsonify({
-                    'success': True,
-                    'text': transcribed_text,
-                    'detected_language': azure_lang,
-                    'broadcast': success,
-                    'service': 'azure',
-                    'message': 'Transcription et diffusion réussies'
-                })
+        if user and transcribed_text:
+            room_manager.update_user_activity(room_id, user_id)
+            
+            # Diffuser selon le rôle
+            source_language = 'fr' if user.is_host else user.language
+            
+            success = room_manager.broadcast_translation(
+                room_id, 
+                transcribed_text, 
+                source_language, 
+                user_id, 
+                enable_speech=user.is_host,
+                trace=trace,
+                admitted=True
+            )
+            
+            return jsonify({
+                'success': True,
+                'text': transcribed_text,
+                'detected_language': azure_lang,
+                'broadcast': success,
+                'service': 'azure',
+                'message': 'Transcription et diffusion réussies',
+                'trace_id': trace.trace_id if trace else None
+            })
         
         # Réponse simple sans diffusion
         return jsonify({
@@ -601,9 +1186,12 @@ def transcribe_audio():
             'confidence': result['confidence'],
             'service': 'azure'
         })
+    
+    except SchedulerOverloaded as e:
+        return overloaded_response(e)
         
     except Exception as e:
-        print(f"❌ Erreur transcription: {str(e)}")
+        logger.error("❌ Erreur transcription: %s", e)
         return jsonify({
             'success': False, 
             'error': f'Erreur de transcription: {str(e)}'
@@ -624,6 +1212,10 @@ def simple_transcribe():
         audio_file = request.files['audio']
         target_language = request.form.get('target_language', 'en')
         
+        # Limite de débit avant la reconnaissance : un client limité ne coûte pas d'appel Azure
+        key = client_key()
+        translation_scheduler.admit(key)
+        
         # Transcription
         result = speech_manager.transcribe_audio(audio_file, 'fr-FR')
         french_text = result['text']
@@ -631,8 +1223,8 @@ def simple_transcribe():
         if not french_text:
             return jsonify({'error': 'Aucun texte détecté'}), 400
         
-        # Traduction avec votre système existant
-        translated_text = translation_manager.translate(french_text, 'fr', target_language)
+        # Traduction avec votre système existant (via l'ordonnanceur)
+        translated_text = translation_scheduler.translate(french_text, 'fr', target_language, key)
         
         return jsonify({
             'success': True,
@@ -641,9 +1233,12 @@ def simple_transcribe():
             'detected_language': 'fr',
             'service': 'azure'
         })
+    
+    except SchedulerOverloaded as e:
+        return overloaded_response(e)
         
     except Exception as e:
-        print(f"❌ Erreur transcription simple: {str(e)}")
+        logger.error("❌ Erreur transcription simple: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @app.route('/api/speech-status')
@@ -677,7 +1272,7 @@ if __name__ == "__main__":
     heartbeat_thread.daemon = True
     heartbeat_thread.start()
     
-    print(f"🚀 Démarrage du serveur sur le port {port}")
-    print(f"🌐 URL d'accès: {BASE_URL}")
+    logger.info("🚀 Démarrage du serveur sur le port %s", port)
+    logger.info("🌐 URL d'accès: %s", BASE_URL)
     
     app.run(debug=False, host='0.0.0.0', port=port)
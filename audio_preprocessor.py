@@ -0,0 +1,220 @@
+import io
+import os
+import struct
+import wave
+from typing import Optional, Tuple
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Formats WAV décodés : PCM entier, flottant IEEE, et leur variante « extensible »
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+class AudioPreprocessor:
+    """
+    Prépare les enregistrements avant la reconnaissance vocale (NumPy) :
+    - décodage du WAV PCM
+    - mixage en mono et rééchantillonnage au taux du service (16 kHz)
+    - suppression du silence au début et à la fin (détection par énergie)
+    - détection des enregistrements sans parole (le service n'est pas appelé)
+    Les formats non WAV (webm/opus, mp4...) sont transmis tels quels.
+    """
+
+    def __init__(self):
+        self.enabled = os.environ.get('AUDIO_PREPROCESS', '1') != '0'
+        self.target_rate = int(os.environ.get('AUDIO_TARGET_RATE', 16000))
+        self.frame_ms = 20
+        # Une trame est de la parole si elle dépasse le bruit de fond de `margin_db`
+        # et le plancher absolu `floor_db` (dBFS)
+        self.margin_db = float(os.environ.get('AUDIO_VAD_MARGIN_DB', 12))
+        self.floor_db = float(os.environ.get('AUDIO_VAD_FLOOR_DB', -50))
+        # Marge conservée autour de la parole (attaques et fins de mots)
+        self.padding_ms = int(os.environ.get('AUDIO_VAD_PADDING_MS', 200))
+        # En dessous de cette durée de parole, l'enregistrement est considéré silencieux
+        self.min_speech_ms = int(os.environ.get('AUDIO_MIN_SPEECH_MS', 100))
+
+    # ------------------------------------------------------------
+    # Décodage / encodage
+    # ------------------------------------------------------------
+
+    def decode_wav(self, data: bytes) -> Optional[Tuple[object, int]]:
+        """
+        Décode un WAV PCM en tableau float32 (échantillons x canaux) dans [-1, 1]
+        Returns: (échantillons, taux) ou None si ce n'est pas un WAV décodable
+        """
+        import numpy as np
+
+        if len(data) < 12 or data[:4] != b'RIFF' or data[8:12] != b'WAVE':
+            return None
+
+        fmt = None
+        samples = None
+        position = 12
+        while position + 8 <= len(data):
+            chunk_id = data[position:position + 4]
+            chunk_size = struct.unpack_from('<I', data, position + 4)[0]
+            body = data[position + 8:position + 8 + chunk_size]
+            if chunk_id == b'fmt ' and len(body) >= 16:
+                fmt = struct.unpack_from('<HHIIHH', body)
+                if fmt[0] == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                    # Le vrai format est au début du sous-format GUID
+                    fmt = (struct.unpack_from('<H', body, 24)[0],) + fmt[1:]
+            elif chunk_id == b'data':
+                samples = body
+                break
+            # Les blocs sont alignés sur 2 octets
+            position += 8 + chunk_size + (chunk_size & 1)
+
+        if fmt is None or samples is None:
+            return None
+
+        format_tag, channels, rate, _byte_rate, _block_align, bits = fmt
+        if channels < 1 or rate < 1:
+            return None
+
+        width = bits // 8
+        usable = len(samples) - len(samples) % (width * channels)
+        samples = samples[:usable]
+
+        if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+            audio = np.frombuffer(samples, dtype='<f4' if bits == 32 else '<f8').astype(np.float32)
+        elif format_tag == WAVE_FORMAT_PCM and bits == 8:
+            audio = (np.frombuffer(samples, dtype=np.uint8).astype(np.float32) - 128) / 128
+        elif format_tag == WAVE_FORMAT_PCM and bits == 16:
+            audio = np.frombuffer(samples, dtype='<i2').astype(np.float32) / 32768
+        elif format_tag == WAVE_FORMAT_PCM and bits == 24:
+            raw = np.frombuffer(samples, dtype=np.uint8).reshape(-1, 3)
+            values = (raw[:, 0].astype(np.int32) | (raw[:, 1].astype(np.int32) << 8)
+                      | (raw[:, 2].astype(np.int32) << 16))
+            values = np.where(values & 0x800000, values - 0x1000000, values)
+            audio = values.astype(np.float32) / 8388608
+        elif format_tag == WAVE_FORMAT_PCM and bits == 32:
+            audio = np.frombuffer(samples, dtype='<i4').astype(np.float32) / 2147483648
+        else:
+            return None
+
+        return audio.reshape(-1, channels), rate
+
+    def encode_wav(self, audio, rate: int) -> bytes:
+        """Encode un signal mono float32 en WAV PCM 16 bits"""
+        import numpy as np
+
+        pcm = (np.clip(audio, -1.0, 1.0) * 32767).astype('<i2')
+        buffer = io.BytesIO()
+        with wave.open(buffer, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(2)
+            wav_file.setframerate(rate)
+            wav_file.writeframes(pcm.tobytes())
+        return buffer.getvalue()
+
+    # ------------------------------------------------------------
+    # Traitement du signal
+    # ------------------------------------------------------------
+
+    def to_mono(self, audio):
+        """Moyenne des canaux"""
+        return audio[:, 0] if audio.shape[1] == 1 else audio.mean(axis=1)
+
+    def resample(self, audio, rate: int):
+        """Rééchantillonne au taux cible"""
+        import numpy as np
+
+        if rate == self.target_rate or len(audio) == 0:
+            return audio
+
+        # Rapport entier (48 kHz -> 16 kHz) : moyenne par blocs, qui filtre aussi le repliement
+        if rate > self.target_rate and rate % self.target_rate == 0:
+            factor = rate // self.target_rate
+            usable = len(audio) - len(audio) % factor
+            return audio[:usable].reshape(-1, factor).mean(axis=1)
+
+        # Cas général (44,1 kHz, 8 kHz...) : interpolation linéaire
+        duration = len(audio) / rate
+        count = int(round(duration * self.target_rate))
+        positions = np.arange(count, dtype=np.float64) * (rate / self.target_rate)
+        return np.interp(positions, np.arange(len(audio)), audio).astype(np.float32)
+
+    def speech_bounds(self, audio) -> Optional[Tuple[int, int]]:
+        """
+        Début et fin de la parole (en échantillons), marge comprise
+        Returns: None si l'enregistrement ne contient pas de parole
+        """
+        import numpy as np
+
+        frame = self.target_rate * self.frame_ms // 1000
+        frame_count = len(audio) // frame
+        if frame_count == 0:
+            return None
+
+        frames = audio[:frame_count * frame].reshape(frame_count, frame)
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+
+        peak_db = energy_db.max()
+        if peak_db < self.floor_db:
+            return None
+
+        # Bruit de fond estimé sur les trames les plus calmes
+        noise_db = np.percentile(energy_db, 10)
+        if peak_db - noise_db < self.margin_db:
+            # Niveau uniforme au-dessus du plancher : parole continue, rien à couper
+            return 0, len(audio)
+
+        threshold = max(self.floor_db, noise_db + self.margin_db)
+        speech = np.flatnonzero(energy_db > threshold)
+
+        if len(speech) * self.frame_ms < self.min_speech_ms:
+            return None
+
+        padding = self.target_rate * self.padding_ms // 1000
+        start = max(0, speech[0] * frame - padding)
+        end = min(len(audio), (speech[-1] + 1) * frame + padding)
+        return start, end
+
+    # ------------------------------------------------------------
+    # Point d'entrée
+    # ------------------------------------------------------------
+
+    def process(self, data: bytes) -> dict:
+        """
+        Prépare un enregistrement pour la reconnaissance
+        Returns: {'audio': octets à envoyer, 'silent': bool, 'processed': bool,
+                  'duration': s, 'trimmed_duration': s}
+        """
+        result = {'audio': data, 'silent': False, 'processed': False, 'duration': None, 'trimmed_duration': None}
+        if not self.enabled:
+            return result
+
+        try:
+            decoded = self.decode_wav(data)
+        except ImportError:
+            # NumPy absent : envoyer l'enregistrement tel quel
+            return result
+        except Exception as e:
+            logger.warning("Audio WAV illisible, envoi sans prétraitement: %s", e)
+            return result
+
+        if decoded is None:
+            return result
+
+        audio, rate = decoded
+        audio = self.resample(self.to_mono(audio), rate)
+        result['duration'] = round(len(audio) / self.target_rate, 3)
+        result['processed'] = True
+
+        bounds = self.speech_bounds(audio)
+        if bounds is None:
+            result['silent'] = True
+            result['audio'] = b''
+            result['trimmed_duration'] = 0.0
+            return result
+
+        start, end = bounds
+        result['audio'] = self.encode_wav(audio[start:end], self.target_rate)
+        result['trimmed_duration'] = round((end - start) / self.target_rate, 3)
+        return result
+
+# Instance globale
+audio_preprocessor = AudioPreprocessor()
@@ -0,0 +1,116 @@
+"""
+Benchmark du prétraitement audio avant la reconnaissance vocale.
+
+Génère un corpus d'enregistrements synthétiques semblables à ceux du
+bouton « maintenir pour parler » : silence bruité au début et à la fin,
+parole simulée (voyelles harmoniques modulées), différents taux et nombres
+de canaux, plus des enregistrements sans parole. Mesure le temps de
+traitement, la durée d'audio envoyée au service avant/après et vérifie que
+la parole est conservée.
+
+Usage : python benchmarks/bench_audio_preprocess.py [nombre_d_enregistrements]
+"""
+import io
+import os
+import sys
+import time
+import wave
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from audio_preprocessor import audio_preprocessor  # noqa: E402
+
+# (taux, canaux, bits)
+FORMATS = [(48000, 2, 16), (48000, 1, 16), (44100, 1, 16), (16000, 1, 16), (44100, 2, 24)]
+
+def synth_speech(rng, rate, seconds):
+    """Suite de « syllabes » : voyelles harmoniques à enveloppe douce, pauses courtes"""
+    out = np.zeros(int(rate * seconds), dtype=np.float32)
+    position = 0
+    while position < len(out):
+        length = int(rate * rng.uniform(0.12, 0.3))
+        t = np.arange(length) / rate
+        f0 = rng.uniform(100, 220)
+        syllable = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 6))
+        syllable *= np.hanning(length) * rng.uniform(0.2, 0.5)
+        end = min(len(out), position + length)
+        out[position:end] = syllable[:end - position]
+        position = end + int(rate * rng.uniform(0.02, 0.12))
+    return out
+
+def make_clip(rng, rate, channels, bits, silent=False):
+    """Enregistrement WAV : silence, parole, silence (ou silence seul)"""
+    lead, speech, tail = rng.uniform(0.4, 1.5), rng.uniform(1.0, 4.0), rng.uniform(0.4, 1.5)
+    total = lead + speech + tail
+    noise = rng.normal(0, 10 ** (-60 / 20), int(rate * total)).astype(np.float32)
+    signal = noise
+    if not silent:
+        start = int(rate * lead)
+        voice = synth_speech(rng, rate, speech)
+        signal[start:start + len(voice)] += voice
+
+    frames = np.repeat(signal[:, None], channels, axis=1)
+    if bits == 16:
+        raw = (np.clip(frames, -1, 1) * 32767).astype('<i2').tobytes()
+    else:
+        values = (np.clip(frames, -1, 1) * 8388607).astype('<i4').reshape(-1)
+        raw = values.view(np.uint8).reshape(-1, 4)[:, :3].tobytes()
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(bits // 8)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(raw)
+    return buffer.getvalue(), total, (lead, lead + speech) if not silent else None
+
+def main():
+    clip_count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    rng = np.random.default_rng(42)
+
+    corpus = []
+    for i in range(clip_count):
+        rate, channels, bits = FORMATS[i % len(FORMATS)]
+        corpus.append(make_clip(rng, rate, channels, bits, silent=i % 10 == 9))
+
+    input_seconds = sum(total for _, total, _ in corpus)
+    input_bytes = sum(len(data) for data, _, _ in corpus)
+
+    # Premier appel hors mesure (import de NumPy)
+    audio_preprocessor.process(corpus[0][0])
+
+    start = time.perf_counter()
+    results = [audio_preprocessor.process(data) for data, _, _ in corpus]
+    elapsed = time.perf_counter() - start
+
+    output_seconds = sum(r['trimmed_duration'] or 0 for r in results)
+    output_bytes = sum(len(r['audio']) for r in results)
+    dropped = sum(1 for r in results if r['silent'])
+    expected_silent = sum(1 for _, _, bounds in corpus if bounds is None)
+
+    # Parole conservée : la zone gardée couvre la parole synthétisée (à une trame près)
+    lost_speech = 0
+    false_silent = 0
+    for (_, _, bounds), result in zip(corpus, results):
+        if bounds is None:
+            continue
+        if result['silent']:
+            false_silent += 1
+            continue
+        kept = result['trimmed_duration']
+        if kept + 0.04 < bounds[1] - bounds[0]:
+            lost_speech += 1
+
+    print(f"Corpus : {clip_count} enregistrements, {input_seconds:.1f} s d'audio, {input_bytes / 1e6:.1f} Mo")
+    print(f"Traitement : {elapsed * 1000 / clip_count:.2f} ms par enregistrement "
+          f"({input_seconds / elapsed:.0f}x temps réel)")
+    print(f"Audio envoyé au service : {input_seconds:.1f} s -> {output_seconds:.1f} s "
+          f"(-{(1 - output_seconds / input_seconds) * 100:.0f} %), "
+          f"{input_bytes / 1e6:.1f} Mo -> {output_bytes / 1e6:.1f} Mo")
+    print(f"Enregistrements silencieux ignorés : {dropped}/{expected_silent}")
+    print(f"Parole tronquée : {lost_speech}, parole prise pour du silence : {false_silent}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+"""
+Benchmark du moteur de corrections post-traduction.
+
+Compare l'ancienne approche (un str.replace par règle) au moteur compilé
+en un seul passage, avec quelques milliers de règles synthétiques.
+
+Usage : python benchmarks/bench_corrections.py [nombre_de_règles]
+"""
+import os
+import random
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from correction_engine import CompiledCorrections  # noqa: E402
+
+TEXTS = 2000
+WORDS_PER_TEXT = 25
+
+def random_word(rng):
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9)))
+
+def make_rules(count, rng):
+    rules = []
+    for i in range(count):
+        wrong = ' '.join(random_word(rng) for _ in range(rng.randint(1, 3)))
+        rules.append({
+            'wrong': wrong,
+            'correct': random_word(rng),
+            'whole_word': i % 2 == 0,
+            'ignore_case': i % 3 == 0
+        })
+    return rules
+
+def make_texts(rules, rng):
+    vocabulary = [random_word(rng) for _ in range(500)]
+    texts = []
+    for _ in range(TEXTS):
+        words = [rng.choice(vocabulary) for _ in range(WORDS_PER_TEXT)]
+        # Environ une règle déclenchée par texte
+        words[rng.randrange(len(words))] = rng.choice(rules)['wrong']
+        texts.append(' '.join(words))
+    return texts
+
+def legacy_apply(text, corrections):
+    for wrong, correct in corrections.items():
+        text = text.replace(wrong, correct)
+    return text
+
+def main():
+    rule_count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    rng = random.Random(42)
+    rules = make_rules(rule_count, rng)
+    texts = make_texts(rules, rng)
+    legacy_rules = {rule['wrong']: rule['correct'] for rule in rules}
+
+    start = time.perf_counter()
+    compiled = CompiledCorrections(rules)
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for text in texts:
+        legacy_apply(text, legacy_rules)
+    legacy_time = (time.perf_counter() - start) / TEXTS
+
+    start = time.perf_counter()
+    for text in texts:
+        compiled.apply(text)
+    engine_time = (time.perf_counter() - start) / TEXTS
+
+    print(f"{compiled.rule_count} règles, compilation unique : {compile_time * 1000:.1f} ms")
+    print(f"str.replace par règle : {legacy_time * 1e6:8.1f} µs/texte")
+    print(f"moteur compilé        : {engine_time * 1e6:8.1f} µs/texte ({legacy_time / engine_time:.1f}x)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""
+Microbenchmarks des chemins appelés à chaque requête (traduction et salles).
+
+Charges fixes et reproductibles, sans réseau : le fournisseur de traduction
+est remplacé par un traducteur local qui renvoie le texte annoté.
+- cache : check_cache (90 % de succès) et add_to_cache sur un cache plein
+- langues : map_lang_code et language_pair sur toutes les langues, corrections post-traduction
+- get_best_service
+- salles : get_participant_languages et to_dict sur une réunion pleine et
+  une conférence de 2000 auditeurs en 12 langues
+- room_updates : requête complète (client de test Flask) et reconstruction
+  des réponses pré-sérialisées après une diffusion
+
+Les résultats (µs par appel, meilleur de plusieurs répétitions) sont
+comparés à une référence enregistrée ; un écart au-delà du seuil est signalé
+comme régression (code de sortie 1) s'il se confirme à une seconde mesure.
+La référence dépend de la machine : l'enregistrer sur la machine qui
+exécute la comparaison.
+
+Usage : python benchmarks/bench_hot_paths.py [--save] [--baseline fichier.json] [--threshold 0.25] [--filter nom]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import timeit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Aucun fichier d'état (compteurs, historique, instantané) écrit dans le dépôt
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+os.environ.setdefault('CACHE_WARMUP', '0')
+os.environ.setdefault('ROOM_SNAPSHOT', '0')
+os.chdir(tempfile.mkdtemp(prefix='bench_hot_paths_'))
+
+from app import app  # noqa: E402
+from room_manager import RoomManager, LectureRoom, Room, User  # noqa: E402
+from translation_manager import TranslationManager  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, 'benchmarks', 'hot_paths_baseline.json')
+LANGUAGES = ['en', 'es', 'de', 'it', 'pt', 'ru', 'ja', 'ar', 'zh-CN', 'uk', 'hi', 'fa']
+SENTENCES = [
+    "Bonjour à tous, nous allons commencer la réunion",
+    "Pouvez-vous partager votre écran s'il vous plaît ?",
+    "Le budget du prochain trimestre sera présenté jeudi",
+    "Merci pour vos questions, nous y reviendrons à la fin",
+]
+
+class StubTranslator:
+    """Fournisseur hors ligne : traduction instantanée et déterministe"""
+
+    def __init__(self, target):
+        self.target = target
+
+    def translate(self, text):
+        return f"{text} [{self.target}]"
+
+def make_manager() -> TranslationManager:
+    manager = TranslationManager()
+    manager.create_translator = lambda service, pair, fallback=False: StubTranslator(pair.target)
+    return manager
+
+# ------------------------------------------------------------
+# Charges
+# ------------------------------------------------------------
+
+def workloads():
+    """{nom: (fonction, appels par mesure)}"""
+    rng = random.Random(42)
+    manager = make_manager()
+    benches = {}
+
+    # Cache majoritairement en succès, taille maximale atteinte
+    keys = [(f"{rng.choice(SENTENCES)} #{i}", 'fr', rng.choice(LANGUAGES)) for i in range(manager.max_cache_size)]
+    for text, source, target in keys:
+        manager.add_to_cache(text, source, target, text.upper())
+    lookups = [keys[rng.randrange(len(keys))] if i % 10 else (f"absent {i}", 'fr', 'en') for i in range(1000)]
+    benches['cache.check_hit_heavy'] = (lambda: [manager.check_cache(*key) for key in lookups], 1000)
+    new_entries = [(f"nouveau {i}", 'fr', 'en', f"new {i}") for i in range(1000)]
+    benches['cache.add_full'] = (lambda: [manager.add_to_cache(*entry) for entry in new_entries], 1000)
+
+    codes = LANGUAGES + ['fr', 'auto', 'xx']
+    benches['lang.map_lang_code'] = (
+        lambda: [manager.map_lang_code(code, for_mymemory) for code in codes for for_mymemory in (False, True)],
+        len(codes) * 2
+    )
+    pairs = [(source, target) for source in ('fr', 'auto') for target in LANGUAGES]
+    benches['lang.language_pair'] = (lambda: [manager.language_pair(*pair) for pair in pairs], len(pairs))
+
+    translations = [(f"{sentence} [{lang}]", lang) for sentence in SENTENCES for lang in ('en', 'es', 'de', 'it')]
+    for _, lang in translations:
+        manager.post_process_translation('', lang)  # Compilation des règles hors mesure
+    benches['lang.post_process'] = (
+        lambda: [manager.post_process_translation(text, lang) for text, lang in translations],
+        len(translations)
+    )
+
+    manager.counters = {'google': 123456, 'mymemory': 2345}
+    benches['quota.get_best_service'] = (manager.get_best_service, 1)
+
+    # Salles : réunion pleine et grande conférence
+    meeting = Room('1000', 'host', 'Réunion')
+    meeting.add_user(User('host', 'hôte', 'fr', is_host=True))
+    for i in range(meeting.max_users - 1):
+        meeting.add_user(User(f"u{i}", f"participant {i}", LANGUAGES[i % len(LANGUAGES)]))
+    lecture = LectureRoom('2000', 'host', 'Conférence')
+    lecture.add_user(User('host', 'hôte', 'fr', is_host=True))
+    for i in range(2000):
+        lecture.add_user(User(f"l{i}", f"auditeur {i}", LANGUAGES[i % len(LANGUAGES)]))
+    for room in (meeting, lecture):
+        room.update_translation(SENTENCES[0], {lang: f"{SENTENCES[0]} [{lang}]" for lang in room.get_participant_languages()}, 'fr', True, 'host')
+
+    benches['room.participant_languages.meeting'] = (meeting.get_participant_languages, 1)
+    benches['room.participant_languages.lecture'] = (lecture.get_participant_languages, 1)
+    benches['room.to_dict.meeting'] = (meeting.to_dict, 1)
+    benches['room.to_dict.lecture'] = (lecture.to_dict, 1)
+
+    # Reconstruction des réponses pré-sérialisées après une diffusion (conférence)
+    translated = {lang: f"{SENTENCES[1]} [{lang}]" for lang in lecture.get_participant_languages()}
+    listener = lecture.get_user('l0')
+
+    def broadcast_lecture():
+        lecture.update_translation(SENTENCES[1], translated, 'fr', True, 'host')
+        return lecture.get_update_payload(listener)
+
+    benches['room_updates.rebuild_lecture'] = (broadcast_lecture, 1)
+
+    # Requête /updates complète, via le gestionnaire global de l'application
+    from app import room_manager as app_room_manager
+    client = app.test_client()
+    app_room_manager.rooms[meeting.room_id] = meeting
+    app_room_manager.rooms[lecture.room_id] = lecture
+    meeting_url = f"/api/room/{meeting.room_id}/updates?user_id=u0"
+    lecture_url = f"/api/room/{lecture.room_id}/updates?user_id=l5"
+    benches['room_updates.request_meeting'] = (lambda: client.get(meeting_url), 1)
+    benches['room_updates.request_lecture'] = (lambda: client.get(lecture_url), 1)
+    benches['room_updates.request_forbidden'] = (lambda: client.get(f"/api/room/{meeting.room_id}/updates?user_id=x"), 1)
+
+    # Diffusion complète d'un message de l'hôte, traductions en cache (fournisseur local sinon)
+    from app import translation_manager as app_translation_manager
+    app_translation_manager.create_translator = manager.create_translator
+    app_translation_manager.counters = {'google': 0, 'mymemory': 0}
+    app_translation_manager.save_counters = lambda: None
+    manager_for_broadcast = RoomManager()
+    room_id, host_id, _ = manager_for_broadcast.create_room('hôte', 'fr', 'Diffusion')
+    for i in range(9):
+        manager_for_broadcast.join_room(room_id, f"p{i}", LANGUAGES[i])
+    from translation_scheduler import translation_scheduler
+    translation_scheduler.user_rate = translation_scheduler.user_burst = 1e9
+    benches['broadcast.cached_meeting'] = (
+        lambda: manager_for_broadcast.broadcast_translation(room_id, SENTENCES[2], 'fr', host_id),
+        1
+    )
+    return benches
+
+# ------------------------------------------------------------
+# Mesure et comparaison
+# ------------------------------------------------------------
+
+def measure(fn, calls_per_run: int, repeat: int = 5, min_time: float = 0.2) -> float:
+    """µs par appel : meilleur de `repeat` mesures d'au moins `min_time` secondes"""
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    number = max(1, int(number * min_time / 0.2))
+    best = min(timer.repeat(repeat, number))
+    return best / number / calls_per_run * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Microbenchmarks des chemins chauds")
+    parser.add_argument('--save', action='store_true', help="enregistre les résultats comme référence")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--threshold', type=float, default=0.25, help="écart relatif signalé (0.25 = +25 %%)")
+    parser.add_argument('--filter', default='', help="ne lance que les benchmarks contenant ce texte")
+    args = parser.parse_args()
+
+    baseline = {}
+    if os.path.exists(args.baseline) and not args.save:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('results', {})
+
+    results = {}
+    regressions = []
+    print(f"{'benchmark':40s} {'µs/appel':>10s} {'référence':>10s} {'écart':>8s}")
+    for name, (fn, calls) in workloads().items():
+        if args.filter not in name:
+            continue
+        fn()  # Échauffement (caches, compilation des règles)
+        results[name] = round(measure(fn, calls), 4)
+
+        line = f"{name:40s} {results[name]:10.3f}"
+        reference = baseline.get(name)
+        if reference:
+            if results[name] / reference - 1 > args.threshold:
+                # Confirmer avant de signaler (machines partagées, fréquence variable)
+                results[name] = min(results[name], round(measure(fn, calls), 4))
+                line = f"{name:40s} {results[name]:10.3f}"
+            delta = results[name] / reference - 1
+            line += f" {reference:10.3f} {delta:+7.1%}"
+            if delta > args.threshold:
+                regressions.append(name)
+                line += "  ⚠️ RÉGRESSION"
+        print(line)
+
+    if args.save:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.platform(),
+                'results': results
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Référence enregistrée : {args.baseline}")
+
+    if regressions:
+        print(f"{len(regressions)} régression(s) au-delà de {args.threshold:.0%} : {', '.join(regressions)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""
+Benchmark du coût de la journalisation par requête de traduction.
+
+Compare les print() d'origine (écriture synchrone sur stdout dans le thread
+de la requête) à la journalisation par file (log_config) : formatage et
+écriture sur un thread dédié, limitation des messages répétés.
+stdout est redirigé vers un tube vidé par un thread lecteur, comme lorsque
+la plateforme collecte la sortie du processus : lecteur rapide, puis lecteur
+lent (collecteur de logs saturé, le tube se remplit et print() bloque).
+
+Usage : python benchmarks/bench_logging.py [requêtes] [threads]
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Collecteur lent : 4 Ko lus par milliseconde au plus
+SLOW_CONSUMER = threading.Event()
+
+def redirect_stdout_to_pipe():
+    """Remplace stdout par un tube vidé en arrière-plan ; retourne la vraie sortie"""
+    real_stdout = sys.stdout
+    read_fd, write_fd = os.pipe()
+
+    def drain():
+        while True:
+            if SLOW_CONSUMER.is_set():
+                if not os.read(read_fd, 4096):
+                    break
+                time.sleep(0.001)
+            elif not os.read(read_fd, 65536):
+                break
+
+    threading.Thread(target=drain, daemon=True).start()
+    sys.stdout = os.fdopen(write_fd, 'w', buffering=1, encoding='utf-8')
+    return real_stdout
+
+# Rediriger avant de configurer la journalisation (le handler garde sys.stdout)
+REAL_STDOUT = redirect_stdout_to_pipe()
+os.environ.setdefault('LOG_LEVEL', 'INFO')
+
+from log_config import get_logger  # noqa: E402
+
+logger = get_logger('bench_logging')
+
+# Module réduit au silence par niveau (LOG_LEVELS=module=WARNING)
+quiet_logger = get_logger('bench_logging.quiet')
+quiet_logger.setLevel('WARNING')
+
+def request_with_print(i):
+    """Messages d'une traduction (cache manqué) avant la migration"""
+    service = 'google'
+    print(f"Langue préférée définie sur: fr")
+    print(f"Traduction avec le service: {service}")
+    print(f"Service {service}: {1000 + i}/500000 caractères ({(1000 + i) / 5000:.2f}%)")
+    print(f"🌍 Hôte -> en: Hello everyone {i}...")
+    print(f"📝 Nouvelle traduction dans Salle: 'Bonjour à tous {i}...' -> 3 langues")
+    print("Traduction trouvée dans le cache!")
+
+def request_with_logging(i):
+    """Mêmes messages après la migration (niveaux identiques à ceux des modules)"""
+    service = 'google'
+    logger.debug("Langue préférée définie sur: %s", 'fr')
+    logger.info("Traduction avec le service: %s", service)
+    logger.info("Service %s: %s/%s caractères (%.2f%%)", service, 1000 + i, 500000, (1000 + i) / 5000)
+    logger.debug("🌍 Hôte -> %s: %s...", 'en', f"Hello everyone {i}")
+    logger.info("📝 Nouvelle traduction dans %s: '%s...' -> %d langues", 'Salle', f"Bonjour à tous {i}", 3)
+    logger.info("Traduction trouvée dans le cache!")
+
+def request_with_quiet_logging(i):
+    """Mêmes messages, module configuré en WARNING"""
+    service = 'google'
+    quiet_logger.debug("Langue préférée définie sur: %s", 'fr')
+    quiet_logger.info("Traduction avec le service: %s", service)
+    quiet_logger.info("Service %s: %s/%s caractères (%.2f%%)", service, 1000 + i, 500000, (1000 + i) / 5000)
+    quiet_logger.debug("🌍 Hôte -> %s: %s...", 'en', f"Hello everyone {i}")
+    quiet_logger.info("📝 Nouvelle traduction dans %s: '%s...' -> %d langues", 'Salle', f"Bonjour à tous {i}", 3)
+    quiet_logger.info("Traduction trouvée dans le cache!")
+
+def run(fn, requests, threads):
+    """Durée moyenne d'une requête (µs), `threads` threads en parallèle"""
+    per_thread = requests // threads
+    barrier = threading.Barrier(threads + 1)
+
+    def worker(offset):
+        barrier.wait()
+        for i in range(offset, offset + per_thread):
+            fn(i)
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    for thread in workers:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return elapsed / (per_thread * threads) * 1e6
+
+def report(line):
+    REAL_STDOUT.write(line + '\n')
+    REAL_STDOUT.flush()
+
+def main():
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    report(f"{requests} requêtes simulées, 6 messages chacune (µs par requête)")
+    for label, slow in (('lecteur rapide', False), ('lecteur lent', True)):
+        if slow:
+            SLOW_CONSUMER.set()
+        report(f"{label} :")
+        for thread_count in (1, threads):
+            before = run(request_with_print, requests, thread_count)
+            after = run(request_with_logging, requests, thread_count)
+            quiet = run(request_with_quiet_logging, requests, thread_count)
+            report(f"  {thread_count:>2} thread(s) : print() {before:8.2f} | logging en file {after:7.2f} "
+                   f"(x{before / after:.1f}) | module en WARNING {quiet:5.2f}")
+
+if __name__ == '__main__':
+    main()
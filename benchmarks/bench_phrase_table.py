@@ -0,0 +1,69 @@
+"""
+Benchmark de la table de phrases locale.
+
+Compile une table de N phrases pour une paire de langues, puis mesure le
+temps de recherche : correspondance exacte, correspondance normalisée
+(casse, espaces, ponctuation) et phrase absente. Vérifie aussi les tables
+fournies dans phrase_tables/.
+
+Usage : python benchmarks/bench_phrase_table.py [nombre_de_phrases] [recherches]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from phrase_table import PhraseTables, PHRASE_TABLES_DIR  # noqa: E402
+
+def measure(tables, texts, lookups):
+    start = time.perf_counter()
+    for i in range(lookups):
+        tables.lookup(texts[i % len(texts)], 'fr', 'en')
+    return (time.perf_counter() - start) / lookups * 1e6
+
+def main():
+    phrase_count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 200000
+
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, 'fr-en.tsv'), 'w', encoding='utf-8') as f:
+            for i in range(phrase_count):
+                f.write(f"Phrase numéro {i} de la réunion\tMeeting sentence number {i}\n")
+
+        tables = PhraseTables(directory, os.path.join(directory, 'cache'), os.path.join(directory, 'learned.tsv'))
+        start = time.perf_counter()
+        tables.get_table('fr', 'en')
+        build_ms = (time.perf_counter() - start) * 1000
+        size = os.path.getsize(os.path.join(directory, 'cache', 'fr-en.bin'))
+
+        exact = [f"Phrase numéro {i} de la réunion" for i in range(0, phrase_count, 7)]
+        normalized = [f"  phrase numéro {i}  DE la réunion ?" for i in range(0, phrase_count, 7)]
+        missing = [f"Phrase inconnue {i}" for i in range(0, phrase_count, 7)]
+
+        errors = sum(
+            1 for i in range(0, phrase_count, 7)
+            if tables.lookup(f"phrase numéro {i} de la réunion!", 'fr', 'en') != f"Meeting sentence number {i}!"
+        )
+
+        print(f"{phrase_count} phrases : compilation {build_ms:.1f} ms, {size / 1e6:.2f} Mo ({size / phrase_count:.0f} octets/phrase)")
+        print(f"Exacte     : {measure(tables, exact, lookups):6.2f} µs/recherche")
+        print(f"Normalisée : {measure(tables, normalized, lookups):6.2f} µs/recherche")
+        print(f"Absente    : {measure(tables, missing, lookups):6.2f} µs/recherche")
+        print(f"Erreurs de correspondance : {errors}")
+        for pair in tables.tables.values():
+            pair.close()
+
+    # Tables fournies
+    with tempfile.TemporaryDirectory() as directory:
+        shipped = PhraseTables(PHRASE_TABLES_DIR, directory, os.path.join(directory, 'learned.tsv'))
+        for name in sorted(os.listdir(PHRASE_TABLES_DIR)):
+            source, target = name[:-len('.tsv')].split('-')
+            table = shipped.get_table(source, target)
+            print(f"{name:12s}: {table.count} phrases")
+            table.close()
+
+if __name__ == '__main__':
+    main()
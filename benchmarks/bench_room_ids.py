@@ -0,0 +1,70 @@
+"""
+Benchmark de l'allocation des identifiants de salle.
+
+Remplit l'espace des identifiants à 4 chiffres jusqu'à différents taux
+d'occupation puis mesure la latence de création, comparée à l'ancienne
+boucle de tirage aléatoire avec réessai.
+
+Usage : python benchmarks/bench_room_ids.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from room_id_allocator import RoomIdAllocator  # noqa: E402
+
+SAMPLES = 2000
+OCCUPANCIES = [0.5, 0.9, 0.95, 0.99, 0.999]
+
+def legacy_generate(rooms):
+    """Ancienne implémentation : tirage aléatoire jusqu'à trouver un ID libre"""
+    while True:
+        room_id = f"{random.randint(1000, 9999)}"
+        if room_id not in rooms:
+            return room_id
+
+def bench_legacy(occupancy):
+    rooms = set(str(i) for i in random.sample(range(1000, 10000), int(9000 * occupancy)))
+    start = time.perf_counter()
+    for _ in range(SAMPLES):
+        room_id = legacy_generate(rooms)
+        # Garder le taux d'occupation constant : libérer l'ID aussitôt
+        rooms.discard(room_id)
+    return (time.perf_counter() - start) / SAMPLES
+
+def bench_allocator(occupancy):
+    allocator = RoomIdAllocator(lengths=[4], high_watermark=1.0)
+    for _ in range(int(9000 * occupancy)):
+        allocator.allocate()
+    start = time.perf_counter()
+    for _ in range(SAMPLES):
+        allocator.release(allocator.allocate())
+    return (time.perf_counter() - start) / SAMPLES
+
+def bench_overflow():
+    """Création au-delà du seuil : bascule vers les identifiants à 5 chiffres"""
+    allocator = RoomIdAllocator(lengths=[4, 5, 6], high_watermark=0.9)
+    count = 20000
+    start = time.perf_counter()
+    ids = [allocator.allocate() for _ in range(count)]
+    elapsed = (time.perf_counter() - start) / count
+    lengths = {}
+    for room_id in ids:
+        lengths[len(room_id)] = lengths.get(len(room_id), 0) + 1
+    return elapsed, lengths
+
+def main():
+    print(f"{'occupation':>10} {'ancien (µs)':>12} {'allocateur (µs)':>16}")
+    for occupancy in OCCUPANCIES:
+        legacy = bench_legacy(occupancy) * 1e6
+        allocator = bench_allocator(occupancy) * 1e6
+        print(f"{occupancy:>10.1%} {legacy:>12.2f} {allocator:>16.2f}")
+
+    elapsed, lengths = bench_overflow()
+    print(f"\n20000 créations sans libération : {elapsed * 1e6:.2f} µs/création, longueurs {lengths}")
+
+if __name__ == '__main__':
+    main()
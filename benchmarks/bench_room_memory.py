@@ -0,0 +1,73 @@
+"""
+Benchmark mémoire du modèle de salles.
+
+Mesure (via tracemalloc) le coût en octets d'une salle (hôte compris) et
+d'un utilisateur supplémentaire, pour 10k et 100k salles.
+
+Usage : python benchmarks/bench_room_memory.py [nombre_de_salles ...]
+"""
+import contextlib
+import gc
+import io
+import os
+import sys
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from room_manager import Room, User  # noqa: E402
+
+USERS_PER_ROOM = 5
+
+def build_rooms(count):
+    """Crée `count` salles contenant uniquement leur hôte"""
+    rooms = []
+    for i in range(count):
+        host_id = str(uuid.uuid4())
+        room = Room(f"{i:06d}", host_id, f"Salle {i}")
+        room.add_user(User(host_id, f"hote{i}", 'fr', is_host=True))
+        rooms.append(room)
+    return rooms
+
+def add_participants(rooms, per_room):
+    """Ajoute `per_room` participants à chaque salle"""
+    for room in rooms:
+        for j in range(per_room):
+            user_id = str(uuid.uuid4())
+            room.add_user(User(user_id, f"participant{j}", 'en'))
+
+def measure(room_count):
+    """Retourne (octets par salle, octets par utilisateur)"""
+    gc.collect()
+    tracemalloc.start()
+    
+    # Les print() du modèle ne doivent pas fausser la mesure
+    with contextlib.redirect_stdout(io.StringIO()):
+        base, _ = tracemalloc.get_traced_memory()
+        rooms = build_rooms(room_count)
+        gc.collect()
+        after_rooms, _ = tracemalloc.get_traced_memory()
+        
+        add_participants(rooms, USERS_PER_ROOM)
+        gc.collect()
+        after_users, _ = tracemalloc.get_traced_memory()
+    
+    tracemalloc.stop()
+    
+    per_room = (after_rooms - base) / room_count
+    per_user = (after_users - after_rooms) / (room_count * USERS_PER_ROOM)
+    del rooms
+    return per_room, per_user
+
+def main():
+    counts = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    
+    print(f"{'salles':>10} {'octets/salle':>14} {'octets/utilisateur':>20} {'total (Mo)':>12}")
+    for count in counts:
+        per_room, per_user = measure(count)
+        total_mb = (per_room + per_user * USERS_PER_ROOM) * count / (1024 * 1024)
+        print(f"{count:>10} {per_room:>14.0f} {per_user:>20.0f} {total_mb:>12.1f}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark de l'instantané des salles (sauvegarde et restauration).
+
+Crée N salles (hôte, participants et dernier message), écrit l'instantané
+puis le recharge dans un gestionnaire vide, comme au redémarrage.
+
+Usage : python benchmarks/bench_snapshot.py [nombre_de_salles] [participants_par_salle]
+"""
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+# Instantanés désactivés par défaut : les activer pour la mesure
+os.environ['ROOM_SNAPSHOT'] = '1'
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from room_manager import RoomManager  # noqa: E402
+from room_snapshot import RoomSnapshot  # noqa: E402
+
+LANGUAGES = ['en', 'es', 'de', 'it', 'pt', 'zh-CN', 'ja', 'ar']
+
+def populate(manager, room_count, participants):
+    for i in range(room_count):
+        room_id, host_id, _ = manager.create_room(f"hôte {i}", 'fr', f"Salle {i}")
+        for p in range(participants):
+            manager.join_room(room_id, f"participant {p}", LANGUAGES[(i + p) % len(LANGUAGES)])
+        room = manager.get_room(room_id)
+        room.update_translation(
+            f"Bonjour à tous, message numéro {i}",
+            {lang: f"Hello everyone, message {i} ({lang})" for lang in room.get_participant_languages()},
+            'fr', True, host_id
+        )
+
+def main():
+    room_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    participants = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    source = RoomManager()
+    populate(source, room_count, participants)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'room_snapshot.json')
+
+        snapshot = RoomSnapshot(source, path)
+        start = time.perf_counter()
+        snapshot.save()
+        save_ms = (time.perf_counter() - start) * 1000
+        size = os.path.getsize(path)
+
+        target = RoomManager()
+        restore = RoomSnapshot(target, path)
+        start = time.perf_counter()
+        restored = restore.restore()
+        restore_ms = (time.perf_counter() - start) * 1000
+
+        # Vérification : même contenu après restauration
+        mismatches = sum(
+            1 for room_id, room in source.rooms.items()
+            if target.get_room(room_id) is None
+            or target.get_room(room_id).export_state() != room.export_state()
+        )
+
+    users = room_count * (participants + 1)
+    print(f"{room_count} salles, {users} utilisateurs")
+    print(f"Sauvegarde   : {save_ms:8.1f} ms ({size / 1e6:.2f} Mo, {size / room_count:.0f} octets/salle)")
+    print(f"Restauration : {restore_ms:8.1f} ms ({restored} salles)")
+    print(f"Écarts après restauration : {mismatches}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark du démarrage à froid.
+
+Mesure, dans des processus Python neufs :
+- le coût d'import de chaque module (python -X importtime), modules les plus lourds d'abord
+- le coût d'import des SDK lourds chargés à la demande
+- le temps jusqu'à la première requête servie (import de app + GET /rooms)
+
+Usage : python benchmarks/bench_startup.py [nombre_de_répétitions]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Le préchauffage du cache appelle les fournisseurs : hors mesure
+ENV = dict(os.environ, CACHE_WARMUP='0', PYTHONDONTWRITEBYTECODE='1')
+
+LAZY_MODULES = ['deep_translator', 'qrcode', 'azure.cognitiveservices.speech']
+
+FIRST_REQUEST_SCRIPT = """
+import time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get('/rooms')
+assert response.status_code == 200
+served = time.perf_counter()
+print(f"RESULT {imported - start} {served - start}")
+"""
+
+def run_python(args):
+    return subprocess.run(
+        [sys.executable] + args, cwd=ROOT, env=ENV,
+        capture_output=True, text=True
+    )
+
+def import_profile(top=15):
+    """Modules les plus coûteux à l'import de app (cumulé, en ms)"""
+    result = run_python(['-X', 'importtime', '-c', 'import app'])
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line.split(':', 1)[1].split('|')]
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, name))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+def lazy_module_cost(module):
+    """Temps d'import d'un module chargé à la demande (ms), -1 s'il est absent"""
+    start = time.perf_counter()
+    result = run_python(['-c', f'import {module}'])
+    elapsed = (time.perf_counter() - start) * 1000
+    baseline_start = time.perf_counter()
+    run_python(['-c', 'pass'])
+    baseline = (time.perf_counter() - baseline_start) * 1000
+    return elapsed - baseline if result.returncode == 0 else -1
+
+def first_request(repeat):
+    """Temps d'import de app et jusqu'à la première réponse (ms)"""
+    imports, served = [], []
+    for _ in range(repeat):
+        result = run_python(['-c', FIRST_REQUEST_SCRIPT])
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr)
+        line = next(line for line in result.stdout.splitlines() if line.startswith('RESULT'))
+        _, import_s, served_s = line.split()
+        imports.append(float(import_s) * 1000)
+        served.append(float(served_s) * 1000)
+    return statistics.median(imports), statistics.median(served)
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+    import_ms, served_ms = first_request(repeat)
+    print(f"Import de app          : {import_ms:8.1f} ms (médiane sur {repeat})")
+    print(f"Première requête servie : {served_ms:8.1f} ms")
+
+    print("\nModules les plus coûteux à l'import (cumulé / propre, ms) :")
+    for cumulative, own, name in import_profile():
+        print(f"  {cumulative:8.1f} {own:8.1f}  {name}")
+
+    print("\nSDK chargés à la demande (coût évité au démarrage, ms) :")
+    for module in LAZY_MODULES:
+        cost = lazy_module_cost(module)
+        print(f"  {module:35} {'absent' if cost < 0 else f'{cost:8.1f}'}")
+
+if __name__ == '__main__':
+    main()
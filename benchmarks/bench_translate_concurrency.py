@@ -0,0 +1,109 @@
+"""
+Test de concurrence de TranslationManager.translate.
+
+Des dizaines de threads traduisent en même temps, chacun avec ses propres
+langues source, cible et langue préférée pour 'auto' (y compris pour des
+textes partagés, servis par le cache ou regroupés). Les fournisseurs sont
+remplacés par des traducteurs locaux qui renvoient les codes de langue
+reçus : chaque résultat doit correspondre exactement aux langues de sa
+propre requête (aucune fuite d'une requête à l'autre). Vérifie aussi que la
+langue préférée globale n'est pas modifiée et que les compteurs (demandes,
+caractères, fichier de compteurs) sont exacts.
+
+Usage : python benchmarks/bench_translate_concurrency.py [threads] [requêtes_par_thread]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+os.environ.setdefault('LOG_LEVEL', 'ERROR')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Fichier de compteurs écrit hors du dépôt
+os.chdir(tempfile.mkdtemp(prefix='bench_concurrency_'))
+
+import deep_translator  # noqa: E402
+from translation_manager import TranslationManager  # noqa: E402
+
+LANGUAGES = ['en', 'es', 'de', 'it', 'pt', 'ru', 'ja', 'ar', 'zh-CN', 'uk', 'hi', 'fr']
+
+# Textes reçus par le fournisseur (list.append est atomique)
+upstream_calls = []
+
+class LocalTranslator:
+    """Fournisseur hors ligne : renvoie les codes reçus, après un court délai (entrelacement)"""
+
+    def __init__(self, source, target):
+        self.source = source
+        self.target = target
+
+    def translate(self, text):
+        upstream_calls.append(text)
+        time.sleep(0.0005)
+        return f"{self.source}>{self.target}:{text}"
+
+def main():
+    thread_count = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    per_thread = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    deep_translator.GoogleTranslator = LocalTranslator
+    deep_translator.MyMemoryTranslator = LocalTranslator
+
+    manager = TranslationManager()
+    manager.phrases.enabled = False
+    # MyMemory seul : c'est lui qui dépend de la langue préférée pour 'auto'
+    manager.limits['google'] = 0
+    default_preferred = manager.preferred_lang
+
+    failures = []
+    barrier = threading.Barrier(thread_count)
+
+    def worker(index):
+        rng = random.Random(index)
+        barrier.wait()
+        for i in range(per_thread):
+            source = rng.choice(LANGUAGES + ['auto'])
+            target = rng.choice([lang for lang in LANGUAGES if lang != source])
+            preferred = rng.choice(LANGUAGES[:-1])
+            # Une requête sur quatre répète un texte partagé en 'auto' (cache et regroupement) :
+            # même texte, langues préférées différentes, résultats distincts
+            text = f"message partagé {i % 5}" if i % 4 == 0 else f"message {index}-{i}"
+            if i % 4 == 0:
+                source, target = 'auto', 'fr'
+
+            result = manager.translate(text, source, target, preferred_lang=preferred)
+
+            pair = manager.language_pair(source, target, preferred)
+            expected = f"{pair.mymemory_source}>{pair.mymemory_target}:{text}"
+            if result != expected:
+                failures.append((source, target, preferred, text, result, expected))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(thread_count)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    total = thread_count * per_thread
+    with open('translation_counters.json', 'r') as f:
+        saved_counters = json.load(f)['counters']
+
+    print(f"{thread_count} threads × {per_thread} requêtes : {total / elapsed:.0f} traductions/s")
+    print(f"Paires résolues : {len(manager.pairs)}, appels au fournisseur : {len(upstream_calls)}, "
+          f"regroupés : {manager.in_flight.get_stats()['coalesced']}")
+
+    assert not failures, f"{len(failures)} résultats incorrects, ex. : {failures[:3]}"
+    assert manager.preferred_lang == default_preferred, "langue préférée globale modifiée"
+    assert sum(manager.request_counts.values()) == total, "demandes perdues dans request_counts"
+    expected_chars = sum(len(text) for text in upstream_calls)
+    assert manager.counters['mymemory'] == expected_chars, (manager.counters['mymemory'], expected_chars)
+    assert saved_counters['mymemory'] == expected_chars, "fichier de compteurs incohérent"
+    print("OK : chaque résultat correspond aux langues de sa requête, compteurs exacts")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+import os
+import json
+import time
+import threading
+from translation_manager import translation_manager
+from translation_scheduler import translation_scheduler, SchedulerOverloaded
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Listes de phrases : <source>.txt (vers les langues des salles) ou <source>-<cible>.txt
+WARMUP_PHRASES_DIR = os.environ.get(
+    'WARMUP_PHRASES_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'warmup_phrases')
+)
+
+# Demandes les plus fréquentes des exécutions précédentes
+HISTORY_FILE = os.environ.get('TRANSLATION_HISTORY_FILE', 'translation_history.json')
+
+# Langues cibles des listes de phrases tant qu'aucun historique n'existe
+WARMUP_DEFAULT_LANGUAGES = os.environ.get('CACHE_WARMUP_LANGUAGES', 'en,es')
+
+class CacheWarmer:
+    """
+    Préchauffe le cache de traduction au démarrage, en arrière-plan.
+    Sources : listes de phrases par paire de langues et demandes les plus
+    fréquentes enregistrées lors des exécutions précédentes.
+    Les appels passent par l'ordonnanceur (file dédiée, servie à tour de rôle
+    avec les salles) et s'arrêtent au même seuil de quota que les brouillons.
+    """
+
+    def __init__(self, manager, scheduler, phrases_dir=WARMUP_PHRASES_DIR, history_file=HISTORY_FILE):
+        self.manager = manager
+        self.scheduler = scheduler
+        self.phrases_dir = phrases_dir
+        self.history_file = history_file
+        self.enabled = os.environ.get('CACHE_WARMUP', '1') != '0'
+        # Ne pas remplir plus de la moitié du cache : le trafic réel reste prioritaire
+        self.max_entries = int(os.environ.get('CACHE_WARMUP_MAX_ENTRIES', manager.max_cache_size // 2))
+        self.history_size = int(os.environ.get('CACHE_WARMUP_HISTORY_SIZE', 200))
+        # Laisser le serveur répondre à ses premières requêtes avant de préchauffer
+        self.delay = float(os.environ.get('CACHE_WARMUP_DELAY', 5))
+        self.thread = None
+        self.stats = {'pairs': 0, 'entries': 0, 'duration': 0.0, 'done': False, 'stopped': None}
+
+    def get_room_languages(self, history=None):
+        """
+        Langues cibles des listes de phrases : celles réellement vues dans
+        l'historique plutôt que tout le mappage MyMemory
+        """
+        known = self.manager.mymemory_lang_map
+        if history:
+            languages = {language for pair in history for language in pair}
+        else:
+            languages = {lang.strip() for lang in WARMUP_DEFAULT_LANGUAGES.split(',')}
+        languages.add('fr')
+        return [lang for lang in known if lang in languages]
+
+    def read_phrase_file(self, path):
+        """Lit une liste de phrases (une par ligne, # pour les commentaires)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        except Exception as e:
+            logger.error("Erreur lors de la lecture de %s: %s", path, e)
+            return []
+
+    def load_phrase_lists(self, history=None):
+        """Retourne {(source, cible): [phrases]} à partir des listes de phrases"""
+        pairs = {}
+        if not os.path.isdir(self.phrases_dir):
+            return pairs
+
+        languages = self.get_room_languages(history)
+        for filename in sorted(os.listdir(self.phrases_dir)):
+            if not filename.endswith('.txt'):
+                continue
+            phrases = self.read_phrase_file(os.path.join(self.phrases_dir, filename))
+            name = filename[:-4]
+
+            if '-' in name and name not in languages:
+                # Paire explicite : fr-en.txt, fr-zh-CN.txt...
+                source, target = name.split('-', 1)
+                targets = [target]
+            else:
+                # Même flux que les salles : l'hôte (fr) vers toutes les langues,
+                # les participants vers le français
+                source = name
+                targets = [lang for lang in languages if lang != 'fr'] if source == 'fr' else ['fr']
+
+            for target in targets:
+                if target != source:
+                    pairs.setdefault((source, target), []).extend(phrases)
+        return pairs
+
+    def load_history(self):
+        """Retourne {(source, cible): [textes]} des demandes les plus fréquentes"""
+        pairs = {}
+        if not os.path.exists(self.history_file):
+            return pairs
+        try:
+            with open(self.history_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', [])
+            for text, source, target, _count in entries[:self.history_size]:
+                pairs.setdefault((source, target), []).append(text)
+        except Exception as e:
+            logger.error("Erreur lors du chargement de l'historique de traduction: %s", e)
+        return pairs
+
+    def save_history(self):
+        """Enregistre les demandes les plus fréquentes pour le prochain démarrage"""
+        counts = self.manager.request_counts
+        if not counts:
+            return
+        try:
+            entries = [
+                [text, source, target, count]
+                for (text, source, target), count in counts.most_common(self.history_size)
+            ]
+            with open(self.history_file, 'w', encoding='utf-8') as f:
+                json.dump({'entries': entries}, f, ensure_ascii=False)
+        except Exception as e:
+            logger.error("Erreur lors de la sauvegarde de l'historique de traduction: %s", e)
+
+    def warm_up(self):
+        """Remplit le cache (appel bloquant, exécuté par le thread de préchauffage)"""
+        time.sleep(self.delay)
+        start = time.time()
+
+        # L'historique d'abord : ce sont les demandes réellement observées
+        pairs = self.load_history()
+        for pair, phrases in self.load_phrase_lists(pairs).items():
+            pairs.setdefault(pair, []).extend(phrases)
+
+        budget = self.max_entries
+        for (source, target), phrases in pairs.items():
+            if budget <= 0:
+                break
+            # Le préchauffage ne doit pas consommer le quota du trafic réel
+            if self.manager.quota_usage() >= self.scheduler.draft_quota_limit:
+                self.stats['stopped'] = 'quota'
+                logger.warning("⚠️ Préchauffage interrompu: quota de traduction presque atteint")
+                break
+            # Dédoublonner en gardant l'ordre
+            phrases = list(dict.fromkeys(phrases))[:budget]
+            try:
+                self.scheduler.call(
+                    lambda: self.manager.translate_batch(phrases, source, target),
+                    'cache-warmup'
+                )
+                budget -= len(phrases)
+                self.stats['pairs'] += 1
+                self.stats['entries'] += len(phrases)
+            except SchedulerOverloaded as e:
+                # Serveur chargé : le trafic réel passe avant le préchauffage
+                self.stats['stopped'] = 'overloaded'
+                logger.warning("⚠️ Préchauffage interrompu: %s", e)
+                break
+            except Exception as e:
+                logger.warning("Erreur de préchauffage %s->%s: %s", source, target, e)
+
+        self.stats['duration'] = round(time.time() - start, 2)
+        self.stats['done'] = True
+        logger.info("🔥 Cache préchauffé: %d traductions, %d paires en %ss", self.stats['entries'], self.stats['pairs'], self.stats['duration'])
+
+    def start(self):
+        """Lance le préchauffage en arrière-plan sans bloquer le démarrage"""
+        if not self.enabled or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self.warm_up, name='cache-warmup')
+        self.thread.daemon = True
+        self.thread.start()
+
+# Instance globale
+cache_warmer = CacheWarmer(translation_manager, translation_scheduler)
@@ -0,0 +1,100 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+
+try:
+    import brotli
+except ImportError:  # Brotli optionnel : gzip seul si le module n'est pas installé
+    brotli = None
+
+# Types de contenu qui gagnent à être compressés
+COMPRESSIBLE_MIMETYPES = {
+    'text/html',
+    'text/css',
+    'text/plain',
+    'application/javascript',
+    'text/javascript',
+    'application/json',
+    'image/svg+xml'
+}
+
+class ResponseCompressor:
+    """
+    Compression gzip/brotli des réponses Flask.
+    Les variantes compressées sont gardées dans un cache LRU indexé par
+    l'empreinte du contenu : pages mises en cache et fichiers statiques ne
+    sont compressés qu'une seule fois.
+    """
+
+    def __init__(self, app=None, min_size=500, cache_size=256):
+        self.min_size = min_size
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.after_request(self.after_request)
+
+    def choose_encoding(self, request):
+        """Choisit l'encodage accepté par le client (brotli de préférence)"""
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def compress(self, data, encoding):
+        """Retourne la variante compressée (depuis le cache si possible)"""
+        key = (hashlib.sha1(data).digest(), encoding)
+        with self.lock:
+            compressed = self.cache.get(key)
+            if compressed is not None:
+                self.cache.move_to_end(key)
+                return compressed
+
+        if encoding == 'br':
+            compressed = brotli.compress(data)
+        else:
+            compressed = gzip.compress(data, compresslevel=6)
+
+        with self.lock:
+            self.cache[key] = compressed
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return compressed
+
+    def after_request(self, response):
+        from flask import request
+
+        if (response.status_code != 200
+                or response.is_streamed and not response.direct_passthrough
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        encoding = self.choose_encoding(request)
+        response.vary.add('Accept-Encoding')
+        if encoding is None:
+            return response
+
+        # Les fichiers statiques sont servis en passthrough : lire leur contenu
+        response.direct_passthrough = False
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        response.set_data(self.compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+
+        # L'ETag doit différer selon l'encodage. La vue a comparé If-None-Match
+        # à l'ETag non compressé : refaire la comparaison avec l'ETag envoyé
+        # au client, sinon la revalidation ne répond jamais 304
+        etag, weak = response.get_etag()
+        if etag:
+            response.set_etag(f"{etag}-{encoding}", weak)
+            response.make_conditional(request)
+        return response
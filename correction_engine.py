@@ -0,0 +1,166 @@
+import os
+import re
+import json
+import threading
+from typing import Dict, List, Optional
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Dossier des règles de correction : un fichier <langue>.json par langue cible
+CORRECTIONS_DIR = os.environ.get(
+    'CORRECTIONS_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corrections')
+)
+
+def _trie_pattern(words: List[str]) -> str:
+    """
+    Construit une expression régulière factorisée par préfixes (trie) :
+    le moteur ne réessaie pas chaque règle à chaque position, et la
+    correspondance la plus longue est préférée.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[None] = True
+
+    def build(node: dict) -> str:
+        terminal = None in node
+        branches = [
+            re.escape(char) + build(child)
+            for char, child in sorted(
+                ((char, child) for char, child in node.items() if char is not None),
+                key=lambda item: item[0]
+            )
+        ]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            body = '(?:' + body + ')?'
+        return body
+
+    return build(trie)
+
+def _match_case(matched: str, replacement: str) -> str:
+    """Reporte la casse du texte trouvé sur le remplacement"""
+    if len(matched) > 1 and matched.isupper():
+        return replacement.upper()
+    if matched[:1].isupper():
+        return replacement[:1].upper() + replacement[1:]
+    return replacement
+
+class CompiledCorrections:
+    """Règles d'une langue compilées en une seule expression régulière"""
+
+    def __init__(self, rules: List[dict]):
+        # Regroupement par options : (mot entier, insensible à la casse)
+        groups: Dict[tuple, Dict[str, str]] = {}
+        for rule in rules:
+            wrong = rule['wrong']
+            if not wrong:
+                continue
+            options = (bool(rule.get('whole_word', False)), bool(rule.get('ignore_case', False)))
+            key = wrong.lower() if options[1] else wrong
+            groups.setdefault(options, {})[key] = rule['correct']
+
+        self.tables: Dict[str, tuple] = {}
+        alternatives = []
+        # Les règles sensibles à la casse et les mots entiers, plus précis, sont essayés en premier
+        for index, options in enumerate(sorted(groups, key=lambda o: (o[1], not o[0]))):
+            whole_word, ignore_case = options
+            table = groups[options]
+            pattern = _trie_pattern(list(table))
+            if whole_word:
+                pattern = r'(?<!\w)' + pattern + r'(?!\w)'
+            if ignore_case:
+                pattern = '(?i:' + pattern + ')'
+            name = f'g{index}'
+            alternatives.append(f'(?P<{name}>{pattern})')
+            self.tables[name] = (table, ignore_case)
+
+        self.rule_count = sum(len(table) for table in groups.values())
+        self.regex = re.compile('|'.join(alternatives)) if alternatives else None
+
+    def _replace(self, match) -> str:
+        table, ignore_case = self.tables[match.lastgroup]
+        matched = match.group()
+        if ignore_case:
+            return _match_case(matched, table[matched.lower()])
+        return table[matched]
+
+    def apply(self, text: str) -> str:
+        """Applique toutes les corrections en un seul passage sur le texte"""
+        if self.regex is None:
+            return text
+        return self.regex.sub(self._replace, text)
+
+class CorrectionEngine:
+    """
+    Corrections post-traduction chargées depuis corrections/<langue>.json.
+    Chaque règle : {"wrong": ..., "correct": ..., "whole_word": false, "ignore_case": false}
+    Les règles sont lues et compilées une seule fois par langue.
+    """
+
+    def __init__(self, rules_dir: str = CORRECTIONS_DIR):
+        self.rules_dir = rules_dir
+        self.compiled: Dict[str, Optional[CompiledCorrections]] = {}
+        # Langues ayant un fichier de règles : seules celles-ci sont mises en cache
+        self.languages: Optional[frozenset] = None
+        self.lock = threading.Lock()
+
+    def available_languages(self) -> frozenset:
+        """Langues des fichiers corrections/<langue>.json (lues une fois)"""
+        languages = self.languages
+        if languages is None:
+            try:
+                names = os.listdir(self.rules_dir)
+            except OSError:
+                names = []
+            languages = frozenset(name[:-5] for name in names if name.endswith('.json'))
+            self.languages = languages
+        return languages
+
+    def load_rules(self, target_lang: str) -> List[dict]:
+        """Lit les règles d'une langue (liste vide si aucun fichier)"""
+        path = os.path.join(self.rules_dir, f"{os.path.basename(target_lang)}.json")
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('rules', [])
+        except Exception as e:
+            logger.error("Erreur lors du chargement des corrections %s: %s", target_lang, e)
+            return []
+
+    def get(self, target_lang: str) -> Optional[CompiledCorrections]:
+        """Retourne les règles compilées d'une langue (compilées au premier appel)"""
+        try:
+            return self.compiled[target_lang]
+        except KeyError:
+            pass
+
+        # Langue inconnue (fournie par le client) : rien à compiler, rien à retenir
+        if target_lang not in self.available_languages():
+            return None
+
+        with self.lock:
+            if target_lang not in self.compiled:
+                rules = self.load_rules(target_lang)
+                self.compiled[target_lang] = CompiledCorrections(rules) if rules else None
+            return self.compiled[target_lang]
+
+    def apply(self, text: str, target_lang: str) -> str:
+        """Applique les corrections de la langue cible"""
+        compiled = self.get(target_lang)
+        if compiled is None:
+            return text
+        return compiled.apply(text)
+
+    def reload(self):
+        """Oublie les règles compilées (relues au prochain appel)"""
+        with self.lock:
+            self.compiled = {}
+            self.languages = None
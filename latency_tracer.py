@@ -0,0 +1,166 @@
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# Nombre d'échantillons de distribution conservés par message (grandes salles)
+MAX_DELIVERY_SAMPLES = 1000
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Percentile par rang le plus proche (liste non vide)"""
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+class Trace:
+    """
+    Chronologie d'un message : réception, envoi, transcription, traductions
+    (par fournisseur), diffusion, puis première récupération par chaque client.
+    Les temps sont en millisecondes depuis la réception de la requête.
+    """
+    __slots__ = ('trace_id', 'room_id', 'origin', 'started_at', 't0', 'spans', 'marks', 'deliveries', 'lock')
+
+    def __init__(self, room_id: str, origin: str, t0: float = None):
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.room_id = room_id
+        self.origin = origin
+        self.started_at = datetime.now().isoformat()
+        self.t0 = t0 if t0 is not None else time.monotonic()
+        self.spans = []        # (étape, début ms, durée ms)
+        self.marks = {}        # {événement: ms}
+        self.deliveries = []   # ms entre la diffusion et la première récupération par un client
+        self.lock = threading.Lock()
+
+    def elapsed(self, at: float = None) -> float:
+        return round(((at if at is not None else time.monotonic()) - self.t0) * 1000, 2)
+
+    def span(self, name: str, start: float, end: float = None):
+        """Enregistre une étape entre deux instants monotones"""
+        end = end if end is not None else time.monotonic()
+        with self.lock:
+            self.spans.append((name, self.elapsed(start), round((end - start) * 1000, 2)))
+
+    def mark(self, name: str):
+        """Enregistre un instant (ex : diffusion)"""
+        self.marks[name] = self.elapsed()
+
+    def add_delivery(self):
+        """Première récupération du message par un client"""
+        broadcast = self.marks.get('broadcast')
+        if broadcast is not None and len(self.deliveries) < MAX_DELIVERY_SAMPLES:
+            self.deliveries.append(round(self.elapsed() - broadcast, 2))
+
+    def stage_durations(self) -> Dict[str, float]:
+        """Durées cumulées par étape (plusieurs traductions en parallèle : la plus longue)"""
+        durations = {}
+        with self.lock:
+            for name, _start, duration in self.spans:
+                durations[name] = max(durations.get(name, 0), duration)
+        if 'broadcast' in self.marks:
+            durations['server_total'] = self.marks['broadcast']
+        if self.deliveries:
+            durations['delivery'] = percentile(self.deliveries, 0.5)
+        return durations
+
+    def to_dict(self):
+        with self.lock:
+            spans = [
+                {'stage': name, 'start_ms': start, 'duration_ms': duration}
+                for name, start, duration in self.spans
+            ]
+        deliveries = self.deliveries
+        return {
+            'trace_id': self.trace_id,
+            'room_id': self.room_id,
+            'origin': self.origin,
+            'started_at': self.started_at,
+            'spans': spans,
+            'marks': dict(self.marks),
+            'deliveries': {
+                'count': len(deliveries),
+                'p50_ms': percentile(deliveries, 0.5) if deliveries else None,
+                'max_ms': max(deliveries) if deliveries else None
+            }
+        }
+
+class LatencyTracer:
+    """Collecte les traces récentes et calcule les répartitions de latence"""
+
+    def __init__(self):
+        self.enabled = os.environ.get('LATENCY_TRACING', '1') != '0'
+        self.traces = deque(maxlen=int(os.environ.get('LATENCY_TRACE_BUFFER', 2000)))
+        # Dernier message diffusé par salle : (seq, trace, clients l'ayant déjà récupéré)
+        self.current: Dict[str, tuple] = {}
+        self.lock = threading.Lock()
+
+    def start(self, room_id: str, origin: str, t0: float = None) -> Optional[Trace]:
+        """
+        Démarre la trace d'un message (None si le traçage est désactivé)
+        t0: instant monotone de réception de la requête (maintenant par défaut)
+        """
+        if not self.enabled:
+            return None
+        return Trace(room_id, origin, t0)
+
+    def publish(self, trace: Optional[Trace], seq: int):
+        """Le message est diffusé : ses récupérations seront mesurées"""
+        if trace is None:
+            return
+        trace.mark('broadcast')
+        with self.lock:
+            self.traces.append(trace)
+            self.current[trace.room_id] = (seq, trace, set())
+
+    def delivered(self, room_id: str, seq: int, user_id: str):
+        """Un client récupère le message `seq` (seule la première fois compte)"""
+        current = self.current.get(room_id)
+        if current is None or current[0] != seq:
+            return
+        _, trace, seen = current
+        if user_id in seen:
+            return
+        seen.add(user_id)
+        trace.add_delivery()
+
+    def forget_room(self, room_id: str):
+        """Salle supprimée"""
+        self.current.pop(room_id, None)
+
+    def get_report(self, room_id: str = None, slow_count: int = 10) -> dict:
+        """Percentiles par étape et traces les plus lentes (globales ou d'une salle)"""
+        with self.lock:
+            traces = [t for t in self.traces if room_id is None or t.room_id == room_id]
+
+        samples: Dict[str, List[float]] = {}
+        for trace in traces:
+            for stage, duration in trace.stage_durations().items():
+                samples.setdefault(stage, []).append(duration)
+            # Toutes les récupérations, pas seulement la médiane de chaque message
+            if trace.deliveries:
+                samples.setdefault('delivery_all', []).extend(trace.deliveries)
+
+        stages = {
+            stage: {
+                'count': len(values),
+                'p50_ms': percentile(values, 0.5),
+                'p90_ms': percentile(values, 0.9),
+                'p99_ms': percentile(values, 0.99),
+                'max_ms': max(values)
+            }
+            for stage, values in sorted(samples.items())
+        }
+
+        slowest = sorted(traces, key=lambda t: t.marks.get('broadcast', 0), reverse=True)[:slow_count]
+
+        return {
+            'room_id': room_id,
+            'traces': len(traces),
+            'stages': stages,
+            'slow_traces': [trace.to_dict() for trace in slowest]
+        }
+
+# Instance globale
+latency_tracer = LatencyTracer()
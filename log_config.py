@@ -0,0 +1,158 @@
+import os
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+# Niveau global et niveaux par module : LOG_LEVELS="translation_manager=WARNING,room_manager=DEBUG"
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+# text (lisible) ou json (une ligne JSON par message)
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')
+# Au plus LOG_RATE_BURST messages identiques par fenêtre de LOG_RATE_WINDOW secondes
+LOG_RATE_BURST = int(os.environ.get('LOG_RATE_BURST', 5))
+LOG_RATE_WINDOW = float(os.environ.get('LOG_RATE_WINDOW', 10))
+
+class RateLimitFilter(logging.Filter):
+    """
+    Limite les messages répétés (même module, même gabarit de message).
+    Appliqué avant la mise en file : les messages écartés ne coûtent presque
+    rien. Le nombre de messages supprimés est ajouté au suivant qui passe.
+    """
+
+    def __init__(self, burst: int = LOG_RATE_BURST, window: float = LOG_RATE_WINDOW):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.windows = {}  # {(module, gabarit): [début de fenêtre, émis, supprimés]}
+        self.lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.burst <= 0:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self.lock:
+            state = self.windows.get(key)
+            if state is None or now - state[0] >= self.window:
+                suppressed = state[2] if state else 0
+                if len(self.windows) > 10000:
+                    self.windows.clear()
+                self.windows[key] = [now, 1, 0]
+            elif state[1] < self.burst:
+                state[1] += 1
+                suppressed = 0
+            else:
+                state[2] += 1
+                return False
+        record.suppressed = suppressed
+        return True
+
+class TextFormatter(logging.Formatter):
+    """Format lisible, en conservant les emojis des messages"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(name)s] %(message)s')
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        if getattr(record, 'suppressed', 0):
+            line += f" (+{record.suppressed} messages similaires supprimés)"
+        return line
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par message (agrégateurs de logs)"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False)
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    QueueHandler qui ne formate pas dans le thread appelant : le message
+    (gabarit + arguments) est formaté par le thread d'écriture.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Les exceptions doivent être capturées tant que la pile existe encore
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+_listener = None
+_setup_lock = threading.Lock()
+_NO_CALLER = ('(unknown file)', 0, '(unknown function)', None)
+
+def _skip_caller_lookup(logger: logging.Logger):
+    """
+    Nos formats n'affichent ni fichier ni ligne : la recherche de l'appelant
+    (remontée de la pile à chaque message) est évitée pour les loggers de
+    l'application seulement, werkzeug et gunicorn gardent la leur
+    """
+    find_caller = logger.findCaller
+
+    def findCaller(stack_info=False, stacklevel=1):
+        if stack_info:
+            # +1 : ignorer ce cadre intermédiaire
+            return find_caller(stack_info, stacklevel + 1)
+        return _NO_CALLER
+
+    logger.findCaller = findCaller
+
+def parse_levels(spec: str) -> dict:
+    """'module=NIVEAU,...' -> {module: NIVEAU}"""
+    levels = {}
+    for item in spec.split(','):
+        if '=' in item:
+            name, level = item.split('=', 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+def setup_logging():
+    """Configure la journalisation une seule fois (file + thread d'écriture)"""
+    global _listener
+    if _listener is not None:
+        return
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(JsonFormatter() if LOG_FORMAT == 'json' else TextFormatter())
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter())
+
+        root = logging.getLogger()
+        root.addHandler(queue_handler)
+        root.setLevel(LOG_LEVEL)
+        for name, level in parse_levels(LOG_LEVELS).items():
+            logging.getLogger(name).setLevel(level)
+
+        _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        # Vider la file à l'arrêt
+        atexit.register(_listener.stop)
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger d'un module (configure la journalisation au premier appel)"""
+    setup_logging()
+    logger = logging.getLogger(name)
+    if 'findCaller' not in vars(logger):
+        _skip_caller_lookup(logger)
+    return logger
@@ -0,0 +1,300 @@
+import os
+import re
+import mmap
+import array
+import bisect
+import struct
+import hashlib
+import threading
+import unicodedata
+from typing import Dict, Iterable, Optional, Tuple
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Tables de phrases fournies : <source>-<cible>.tsv (« phrase<TAB>traduction » par ligne)
+PHRASE_TABLES_DIR = os.environ.get(
+    'PHRASE_TABLES_DIR',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'phrase_tables')
+)
+# Tables compilées (format binaire projeté en mémoire), reconstruites si les sources changent
+PHRASE_CACHE_DIR = os.environ.get('PHRASE_CACHE_DIR', 'phrase_cache')
+# Phrases apprises des traductions confirmées : « source<TAB>cible<TAB>phrase<TAB>traduction »
+LEARNED_PHRASES_FILE = os.environ.get('LEARNED_PHRASES_FILE', 'learned_phrases.tsv')
+
+# En-tête : signature, version, nombre d'entrées ; puis empreintes triées (uint64),
+# positions des entrées (uint32) et textes. Les tableaux sont dans l'ordre natif
+# de la machine : les tables compilées sont locales et lues sans conversion
+TABLE_MAGIC = b'TLPT'
+TABLE_VERSION = 1
+HEADER = struct.Struct('<4sHxxQ')
+LENGTHS = struct.Struct('<HH')
+
+# Ponctuation ignorée autour d'une phrase (« Merci ! », « ¿Sí? »)
+_EDGE_PUNCTUATION = ' \t.!?¡¿,;:…"«»\''
+_SPACES = re.compile(r'\s+')
+# Nombres seuls (« 42 », « 3,5 », « 10:30 ») : identiques dans toutes les langues.
+# Au moins un chiffre : « ... », « - » ou « / » seuls ne sont pas des nombres
+_NUMBER = re.compile(r'^(?=.*\d)[\d\s.,:/+\-%]+$')
+
+def normalize(text: str) -> str:
+    """Forme normalisée d'une phrase : casse, espaces et ponctuation de bord ignorés"""
+    return _SPACES.sub(' ', unicodedata.normalize('NFC', text).casefold().strip(_EDGE_PUNCTUATION))
+
+def _hash(normalized: str) -> int:
+    return int.from_bytes(hashlib.blake2b(normalized.encode('utf-8'), digest_size=8).digest(), 'little')
+
+class PhraseTable:
+    """
+    Table de phrases d'une paire de langues, projetée en mémoire (mmap).
+    Recherche par dichotomie sur l'index des empreintes : quelques
+    microsecondes, sans charger la table en mémoire Python.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count = HEADER.unpack_from(self.data)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            raise ValueError(f"Table de phrases invalide: {path}")
+        # Vues directes sur le fichier : bisect parcourt les empreintes sans copie
+        view = memoryview(self.data)
+        offsets_start = HEADER.size + self.count * 8
+        self.blob_start = offsets_start + self.count * 4
+        self.hashes = view[HEADER.size:offsets_start].cast('Q')
+        self.offsets = view[offsets_start:self.blob_start].cast('I')
+        view.release()
+
+    @staticmethod
+    def build(pairs: Iterable[Tuple[str, str]], path: str) -> int:
+        """Compile des couples (phrase, traduction) ; retourne le nombre d'entrées"""
+        entries = {}
+        for phrase, translation in pairs:
+            key = normalize(phrase)
+            if key and translation:
+                # La dernière définition l'emporte (les phrases apprises complètent les fichiers)
+                entries[key] = (phrase.strip(), translation.strip())
+
+        index = []
+        blob = bytearray()
+        for key, (phrase, translation) in entries.items():
+            phrase_bytes = phrase.encode('utf-8')[:65535]
+            translation_bytes = translation.encode('utf-8')[:65535]
+            index.append((_hash(key), len(blob)))
+            blob += LENGTHS.pack(len(phrase_bytes), len(translation_bytes)) + phrase_bytes + translation_bytes
+        index.sort()
+
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(HEADER.pack(TABLE_MAGIC, TABLE_VERSION, len(index)))
+            f.write(array.array('Q', (entry[0] for entry in index)).tobytes())
+            f.write(array.array('I', (entry[1] for entry in index)).tobytes())
+            f.write(blob)
+        os.replace(temp_path, path)
+        return len(index)
+
+    def _entry(self, offset: int) -> Tuple[str, str]:
+        position = self.blob_start + offset
+        phrase_length, translation_length = LENGTHS.unpack_from(self.data, position)
+        position += LENGTHS.size
+        phrase = self.data[position:position + phrase_length].decode('utf-8')
+        position += phrase_length
+        return phrase, self.data[position:position + translation_length].decode('utf-8')
+
+    def lookup(self, text: str) -> Optional[str]:
+        """Traduction exacte, sinon par forme normalisée (None si absente)"""
+        key = normalize(text)
+        if not key:
+            return None
+        target = _hash(key)
+
+        # Dichotomie sur les empreintes triées, puis empreintes égales
+        # consécutives (collisions) : vérifier la phrase
+        position = bisect.bisect_left(self.hashes, target)
+        while position < self.count and self.hashes[position] == target:
+            phrase, translation = self._entry(self.offsets[position])
+            if phrase == text.strip():
+                return translation
+            if normalize(phrase) == key:
+                return _match_punctuation(translation, text)
+            position += 1
+        return None
+
+    def close(self):
+        self.hashes.release()
+        self.offsets.release()
+        self.data.close()
+        self.file.close()
+
+def _match_punctuation(translation: str, text: str) -> str:
+    """Reporte la ponctuation finale du message (« ? », « ! », « . ») sur la traduction"""
+    stripped = text.rstrip()
+    if stripped and stripped[-1] in '?!.' and translation and translation[-1] not in '?!.':
+        return translation + stripped[-1]
+    return translation
+
+class PhraseTables:
+    """
+    Niveau de traduction local, consulté avant les services en ligne :
+    une table par paire de langues, compilée depuis phrase_tables/ et les
+    phrases apprises, ouverte au premier besoin.
+    """
+
+    def __init__(self, tables_dir: str = PHRASE_TABLES_DIR, cache_dir: str = PHRASE_CACHE_DIR,
+                 learned_file: str = LEARNED_PHRASES_FILE):
+        self.tables_dir = tables_dir
+        self.cache_dir = cache_dir
+        self.learned_file = learned_file
+        self.enabled = os.environ.get('PHRASE_TABLES', '1') != '0'
+        # Apprentissage : phrases courtes demandées au moins `learn_min_count` fois
+        self.learn_min_count = int(os.environ.get('PHRASE_LEARN_MIN_COUNT', 5))
+        self.learn_max_words = int(os.environ.get('PHRASE_LEARN_MAX_WORDS', 6))
+        self.tables: Dict[Tuple[str, str], Optional[PhraseTable]] = {}
+        # Paires ayant des phrases (fichier .tsv ou phrases apprises) : seules celles-ci sont mises en cache
+        self.pairs: Optional[frozenset] = None
+        self.learned = None  # {(source, cible): {phrase: traduction}}, chargé au premier besoin
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'learned': 0}
+
+    # ------------------------------------------------------------
+    # Chargement
+    # ------------------------------------------------------------
+
+    def read_tsv(self, path: str):
+        """Couples (phrase, traduction) d'un fichier .tsv"""
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip() or line.startswith('#'):
+                    continue
+                parts = line.rstrip('\n').split('\t')
+                if len(parts) == 2:
+                    yield parts[0], parts[1]
+
+    def load_learned(self) -> dict:
+        """Phrases apprises, par paire de langues"""
+        if self.learned is not None:
+            return self.learned
+        learned = {}
+        if os.path.exists(self.learned_file):
+            try:
+                with open(self.learned_file, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        parts = line.rstrip('\n').split('\t')
+                        if len(parts) == 4:
+                            source, target, phrase, translation = parts
+                            learned.setdefault((source, target), {})[phrase] = translation
+            except Exception as e:
+                logger.error("Erreur lors du chargement des phrases apprises: %s", e)
+        self.learned = learned
+        return learned
+
+    def available_pairs(self) -> frozenset:
+        """Noms « source-cible » des paires ayant des phrases (lus une fois)"""
+        pairs = self.pairs
+        if pairs is None:
+            try:
+                names = os.listdir(self.tables_dir)
+            except OSError:
+                names = []
+            pairs = {name[:-4] for name in names if name.endswith('.tsv')}
+            pairs.update(f"{source}-{target}" for source, target in list(self.load_learned()))
+            pairs = frozenset(pairs)
+            self.pairs = pairs
+        return pairs
+
+    def _open(self, source_lang: str, target_lang: str) -> Optional[PhraseTable]:
+        """Compile la table si ses sources ont changé, puis l'ouvre (None si aucune phrase)"""
+        name = f"{source_lang}-{target_lang}"
+        source_path = os.path.join(self.tables_dir, f"{name}.tsv")
+        learned = self.load_learned().get((source_lang, target_lang), {})
+        if not os.path.exists(source_path) and not learned:
+            return None
+
+        compiled_path = os.path.join(self.cache_dir, f"{name}.bin")
+        sources = [p for p in (source_path, self.learned_file) if os.path.exists(p)]
+        newest_source = max(os.path.getmtime(p) for p in sources)
+        if not os.path.exists(compiled_path) or os.path.getmtime(compiled_path) < newest_source:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            pairs = list(self.read_tsv(source_path)) if os.path.exists(source_path) else []
+            pairs += list(learned.items())
+            count = PhraseTable.build(pairs, compiled_path)
+            logger.info("📖 Table de phrases %s compilée: %d entrées", name, count)
+        return PhraseTable(compiled_path)
+
+    def get_table(self, source_lang: str, target_lang: str) -> Optional[PhraseTable]:
+        pair = (source_lang, target_lang)
+        if pair in self.tables:
+            return self.tables[pair]
+        # Paire inconnue (langues fournies par le client) : aucune table, rien à retenir
+        if f"{source_lang}-{target_lang}" not in self.available_pairs():
+            return None
+        with self.lock:
+            if pair not in self.tables:
+                try:
+                    self.tables[pair] = self._open(source_lang, target_lang)
+                except Exception as e:
+                    logger.error("Erreur d'ouverture de la table de phrases %s-%s: %s", source_lang, target_lang, e)
+                    self.tables[pair] = None
+            return self.tables[pair]
+
+    # ------------------------------------------------------------
+    # Recherche
+    # ------------------------------------------------------------
+
+    def lookup(self, text: str, source_lang: str, target_lang: str) -> Optional[str]:
+        """Traduction locale d'une phrase courante (None si inconnue)"""
+        if not self.enabled or source_lang == 'auto':
+            return None
+
+        # Les nombres seuls se traduisent à l'identique
+        if _NUMBER.match(text):
+            self.stats['hits'] += 1
+            return text.strip()
+
+        table = self.get_table(source_lang, target_lang)
+        translation = table.lookup(text) if table is not None else None
+        self.stats['hits' if translation is not None else 'misses'] += 1
+        return translation
+
+    # ------------------------------------------------------------
+    # Apprentissage
+    # ------------------------------------------------------------
+
+    def learn_from(self, manager) -> int:
+        """
+        Ajoute aux phrases apprises les phrases courtes souvent demandées dont
+        la traduction est en cache (traduction confirmée par l'usage).
+        Prises en compte au prochain démarrage (recompilation des tables).
+        """
+        if not self.enabled:
+            return 0
+        learned = self.load_learned()
+        new_entries = []
+        for (text, source, target), count in manager.request_counts.most_common():
+            if count < self.learn_min_count:
+                break
+            if source == 'auto' or len(text.split()) > self.learn_max_words or '\t' in text or '\n' in text:
+                continue
+            if text in learned.get((source, target), {}):
+                continue
+            translation = manager.check_cache(text, source, target)
+            if not translation or translation.startswith('Erreur de traduction'):
+                continue
+            learned.setdefault((source, target), {})[text] = translation
+            new_entries.append(f"{source}\t{target}\t{text}\t{translation}\n")
+
+        if new_entries:
+            try:
+                with open(self.learned_file, 'a', encoding='utf-8') as f:
+                    f.writelines(new_entries)
+            except Exception as e:
+                logger.error("Erreur lors de la sauvegarde des phrases apprises: %s", e)
+                return 0
+            self.stats['learned'] += len(new_entries)
+        return len(new_entries)
+
+    def get_stats(self) -> dict:
+        return {'pairs_loaded': sum(1 for table in self.tables.values() if table), **self.stats}
+
+# Instance globale
+phrase_tables = PhraseTables()
@@ -0,0 +1,160 @@
+import os
+import sys
+import time
+import random
+import threading
+from collections import Counter
+from typing import Dict, Optional
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+class SamplingProfiler:
+    """
+    Profileur par échantillonnage des piles, activable à chaud.
+    Un thread relève périodiquement la pile des seules requêtes suivies
+    (une fraction des requêtes, éventuellement limitée à certaines routes).
+    Sortie au format « piles repliées » (flamegraph.pl, speedscope...).
+    Désactivé, le coût se limite à un test de booléen par requête.
+    """
+
+    def __init__(self, app=None):
+        self.interval = float(os.environ.get('PROFILER_INTERVAL', 0.005))
+        self.max_stacks = int(os.environ.get('PROFILER_MAX_STACKS', 20000))
+        self.enabled = False
+        self.deadline = 0.0
+        self.sample_rate = 1.0
+        self.routes = set()
+        self.active: Dict[int, str] = {}  # {ident du thread: route}
+        self.stacks = Counter()
+        self.stats = {'requests': 0, 'samples': 0, 'started_at': None, 'duration': 0.0}
+        self.lock = threading.Lock()
+        self.thread = None
+
+        if app is not None:
+            self.init_app(app)
+
+        # Activation au démarrage : PROFILER=1 (PROFILER_RATE, PROFILER_ROUTES, PROFILER_DURATION)
+        if os.environ.get('PROFILER', '0') == '1':
+            routes = [r for r in os.environ.get('PROFILER_ROUTES', '').split(',') if r.strip()]
+            self.start(
+                duration=float(os.environ.get('PROFILER_DURATION', 300)),
+                sample_rate=float(os.environ.get('PROFILER_RATE', 0.1)),
+                routes=routes
+            )
+
+    def init_app(self, app):
+        app.before_request(self.before_request)
+        app.teardown_request(self.teardown_request)
+
+    # ------------------------------------------------------------
+    # Pilotage
+    # ------------------------------------------------------------
+
+    def start(self, duration: float = 60, sample_rate: float = 0.1, routes=None):
+        """Démarre une session (limitée dans le temps) et efface la précédente"""
+        with self.lock:
+            self.stacks.clear()
+            self.active.clear()
+            self.sample_rate = max(0.0, min(1.0, sample_rate))
+            self.routes = {route.strip() for route in (routes or [])}
+            self.deadline = time.monotonic() + duration
+            self.stats = {'requests': 0, 'samples': 0, 'started_at': time.time(), 'duration': duration}
+            self.enabled = True
+
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._sampler, name='request-profiler')
+                self.thread.daemon = True
+                self.thread.start()
+        logger.info("🔬 Profileur activé: %ss, %.0f%% des requêtes, routes: %s", duration, self.sample_rate * 100, sorted(self.routes) or 'toutes')
+
+    def stop(self):
+        """Arrête la session (les piles restent disponibles)"""
+        self.enabled = False
+        with self.lock:
+            self.active.clear()
+
+    # ------------------------------------------------------------
+    # Suivi des requêtes
+    # ------------------------------------------------------------
+
+    def _route_matches(self, request) -> Optional[str]:
+        """Nom de route à profiler, ou None si la requête n'est pas concernée"""
+        rule = request.url_rule.rule if request.url_rule is not None else request.path
+        if self.routes and rule not in self.routes and request.endpoint not in self.routes:
+            return None
+        return rule
+
+    def before_request(self):
+        if not self.enabled:
+            return
+        from flask import request
+
+        route = self._route_matches(request)
+        if route is None or random.random() >= self.sample_rate:
+            return
+        self.active[threading.get_ident()] = route
+        self.stats['requests'] += 1
+
+    def teardown_request(self, exc=None):
+        if self.active:
+            self.active.pop(threading.get_ident(), None)
+
+    # ------------------------------------------------------------
+    # Échantillonnage
+    # ------------------------------------------------------------
+
+    def _sampler(self):
+        while self.enabled:
+            if time.monotonic() > self.deadline:
+                logger.info("🔬 Profileur arrêté: %d échantillons", self.stats['samples'])
+                self.stop()
+                break
+            if self.active:
+                self._take_sample()
+            time.sleep(self.interval)
+
+    def _take_sample(self):
+        frames = sys._current_frames()
+        for ident, route in list(self.active.items()):
+            frame = frames.get(ident)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(route)
+            key = ';'.join(reversed(stack))
+            # Borner la mémoire : les nouvelles piles sont ignorées au-delà de la limite.
+            # Sous le verrou : collapsed() parcourt le compteur et start() le vide
+            with self.lock:
+                if key in self.stacks or len(self.stacks) < self.max_stacks:
+                    self.stacks[key] += 1
+                self.stats['samples'] += 1
+
+    # ------------------------------------------------------------
+    # Résultats
+    # ------------------------------------------------------------
+
+    def collapsed(self) -> str:
+        """Piles repliées : « route;frame;frame... nombre » une par ligne"""
+        with self.lock:
+            items = self.stacks.most_common()
+        return ''.join(f"{stack} {count}\n" for stack, count in items)
+
+    def get_status(self) -> dict:
+        remaining = max(0.0, self.deadline - time.monotonic()) if self.enabled else 0.0
+        return {
+            'enabled': self.enabled,
+            'remaining': round(remaining, 1),
+            'sample_rate': self.sample_rate,
+            'routes': sorted(self.routes),
+            'interval': self.interval,
+            'distinct_stacks': len(self.stacks),
+            **self.stats
+        }
+
+# Instance globale (attachée à l'application dans app.py)
+request_profiler = SamplingProfiler()
@@ -0,0 +1,160 @@
+import os
+import random
+import threading
+from typing import Callable, Dict, List, Optional
+
+class _IdPool:
+    """
+    Réserve d'identifiants numériques d'une longueur donnée, mélangée
+    paresseusement (Fisher-Yates creux).
+    Les positions [0, remaining) contiennent les valeurs libres ; seules les
+    positions déplacées sont mémorisées, la mémoire croît donc avec le nombre
+    d'identifiants distribués et non avec la taille de l'espace.
+    Tirage, libération et réservation sont en O(1).
+    """
+    __slots__ = ('length', 'start', 'size', 'remaining', '_value_at', '_index_of')
+
+    def __init__(self, length: int):
+        self.length = length
+        self.start = 10 ** (length - 1)
+        self.size = 10 ** length - self.start
+        self.remaining = self.size
+        self._value_at: Dict[int, int] = {}  # position -> valeur (si différente)
+        self._index_of: Dict[int, int] = {}  # valeur -> position (si différente)
+
+    @property
+    def used(self) -> int:
+        return self.size - self.remaining
+
+    def _swap(self, i: int, j: int):
+        """Échange les valeurs des positions i et j"""
+        if i == j:
+            return
+        vi = self._value_at.get(i, i)
+        vj = self._value_at.get(j, j)
+        self._place(vj, i)
+        self._place(vi, j)
+
+    def _place(self, value: int, index: int):
+        """Place une valeur à une position en gardant les tables minimales"""
+        if value == index:
+            self._value_at.pop(index, None)
+            self._index_of.pop(value, None)
+        else:
+            self._value_at[index] = value
+            self._index_of[value] = index
+
+    def pop(self) -> Optional[int]:
+        """Tire un identifiant libre au hasard"""
+        if self.remaining == 0:
+            return None
+        last = self.remaining - 1
+        self._swap(random.randrange(self.remaining), last)
+        self.remaining = last
+        return self._value_at.get(last, last) + self.start
+
+    def release(self, room_id: int) -> bool:
+        """Remet un identifiant distribué dans la réserve"""
+        value = room_id - self.start
+        index = self._index_of.get(value, value)
+        if index < self.remaining:
+            return False  # Déjà libre
+        self._swap(index, self.remaining)
+        self.remaining += 1
+        return True
+
+    def reserve(self, room_id: int) -> bool:
+        """Retire un identifiant précis de la réserve (ex : restauration)"""
+        value = room_id - self.start
+        index = self._index_of.get(value, value)
+        if index >= self.remaining:
+            return False  # Déjà distribué
+        last = self.remaining - 1
+        self._swap(index, last)
+        self.remaining = last
+        return True
+
+# Tirages refusés tolérés par longueur avant de passer à la suivante
+# (mode réparti : environ un tirage sur n appartient à ce worker)
+MAX_REJECTED_DRAWS = 512
+
+class RoomIdAllocator:
+    """
+    Distribue les identifiants de salle.
+    Les identifiants courts (4 chiffres) sont préférés ; au-delà du seuil
+    d'occupation, on passe à la longueur suivante. Les identifiants des salles
+    supprimées sont recyclés.
+    """
+
+    def __init__(self, lengths: List[int] = None, high_watermark: float = None):
+        if lengths is None:
+            lengths = [int(n) for n in os.environ.get('ROOM_ID_LENGTHS', '4,5,6').split(',')]
+        if high_watermark is None:
+            high_watermark = float(os.environ.get('ROOM_ID_HIGH_WATERMARK', 0.9))
+
+        self.high_watermark = high_watermark
+        self.pools = {length: _IdPool(length) for length in sorted(lengths)}
+        self.lock = threading.Lock()
+
+    def _pool_for(self, room_id: str) -> Optional[_IdPool]:
+        if not room_id.isdigit():
+            return None
+        return self.pools.get(len(room_id))
+
+    def allocate(self, accept: Callable[[str], bool] = None) -> str:
+        """
+        Retourne un nouvel identifiant de salle
+        accept: filtre optionnel (ex : identifiants appartenant à ce worker)
+        """
+        with self.lock:
+            pools = list(self.pools.values())
+
+            # Première longueur sous le seuil d'occupation, sinon la première non pleine
+            candidates = [pool for pool in pools if pool.used < pool.size * self.high_watermark]
+            candidates += [pool for pool in pools if pool.remaining > 0]
+
+            for pool in candidates:
+                value = self._pop_accepted(pool, accept)
+                if value is not None:
+                    return str(value)
+
+        raise RuntimeError("Plus aucun identifiant de salle disponible")
+
+    def _pop_accepted(self, pool: _IdPool, accept: Optional[Callable[[str], bool]]) -> Optional[int]:
+        """Tire un identifiant accepté par le filtre ; les refusés sont remis en réserve"""
+        if accept is None:
+            return pool.pop()
+
+        rejected = []
+        try:
+            for _ in range(MAX_REJECTED_DRAWS):
+                value = pool.pop()
+                if value is None or accept(str(value)):
+                    return value
+                rejected.append(value)
+            return None
+        finally:
+            for value in rejected:
+                pool.release(value)
+
+    def release(self, room_id: str):
+        """Recycle l'identifiant d'une salle supprimée"""
+        pool = self._pool_for(room_id)
+        if pool:
+            with self.lock:
+                pool.release(int(room_id))
+
+    def reserve(self, room_id: str) -> bool:
+        """Marque un identifiant existant comme utilisé"""
+        pool = self._pool_for(room_id)
+        if not pool:
+            return False
+        with self.lock:
+            return pool.reserve(int(room_id))
+
+    def get_stats(self) -> dict:
+        """Occupation par longueur d'identifiant"""
+        return {
+            str(length): {'used': pool.used, 'size': pool.size}
+            for length, pool in self.pools.items()
+        }
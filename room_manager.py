@@ -1,20 +1,50 @@
+import os
 import uuid
+import json
 import time
-from datetime import datetime, timedelta
+import threading
+from datetime import datetime
 from typing import Dict, List, Optional
+from werkzeug.security import generate_password_hash, check_password_hash
+from room_id_allocator import RoomIdAllocator
+from latency_tracer import latency_tracer
+from sharding import shard_map
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Les horodatages sont stockés en secondes monotones (float) ; ce décalage
+# permet de les convertir en heure murale uniquement lors de la sérialisation
+_WALL_CLOCK_OFFSET = time.time() - time.monotonic()
+
+# Mots de passe des salles : seule leur empreinte est gardée (et transférée ou sauvegardée)
+PASSWORD_HASH_METHOD = 'pbkdf2:sha256:50000'
+
+# Protège la création paresseuse des conditions de long-poll
+_condition_creation_lock = threading.Lock()
+
+def _to_isoformat(monotonic_ts: float) -> str:
+    """Convertit un horodatage monotone en date ISO 8601"""
+    return datetime.fromtimestamp(_WALL_CLOCK_OFFSET + monotonic_ts).isoformat()
+
+def _encode_payload(payload: dict) -> bytes:
+    """Encode une réponse JSON une fois pour toutes"""
+    return json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
 class User:
+    __slots__ = ('user_id', 'nickname', 'language', 'is_host', 'joined_at', 'last_activity')
+    
     def __init__(self, user_id: str, nickname: str, language: str, is_host: bool = False):
         self.user_id = user_id
         self.nickname = nickname
         self.language = language
         self.is_host = is_host
-        self.joined_at = datetime.now()
-        self.last_activity = datetime.now()
+        self.joined_at = time.monotonic()
+        self.last_activity = self.joined_at
     
     def update_activity(self):
         """Met à jour l'activité de l'utilisateur"""
-        self.last_activity = datetime.now()
+        self.last_activity = time.monotonic()
     
     def to_dict(self):
         """Convertit l'utilisateur en dictionnaire pour JSON"""
@@ -23,108 +53,472 @@ class User:
             'nickname': self.nickname,
             'language': self.language,
             'is_host': self.is_host,
-            'joined_at': self.joined_at.isoformat(),
-            'last_activity': self.last_activity.isoformat()
+            'joined_at': _to_isoformat(self.joined_at),
+            'last_activity': _to_isoformat(self.last_activity)
+        }
+
+class Translation:
+    """Dernier message diffusé dans une salle"""
+    __slots__ = ('original', 'translated', 'timestamp', 'source_language', 'enable_speech', 'sender_id')
+    
+    def __init__(self, original: str = '', translated: Dict[str, str] = None, source_language: str = 'fr', enable_speech: bool = False, sender_id: str = None, timestamp: float = None):
+        self.original = original
+        self.translated = translated if translated is not None else {}  # {language: translation}
+        self.timestamp = timestamp if timestamp is not None else time.monotonic()
+        self.source_language = source_language  # Langue source du message
+        self.enable_speech = enable_speech      # Si la synthèse vocale doit être activée
+        self.sender_id = sender_id              # ID de l'utilisateur qui a envoyé le message
+    
+    def to_dict(self):
+        """Convertit le message en dictionnaire pour JSON"""
+        return {
+            'original': self.original,
+            'translated': self.translated,
+            'timestamp': _to_isoformat(self.timestamp),
+            'source_language': self.source_language,
+            'sender_id': self.sender_id
         }
 
 class Room:
+    __slots__ = (
+        'room_id', 'host_id', 'room_name', 'password_hash', 'created_at', 'users', 'language_counts',
+        'last_translation', 'message_seq', 'closed', 'update_payloads', '_update_condition',
+        'transcript_id', 'users_lock'
+    )
+    
+    room_type = 'meeting'
+    max_users = 10  # Limite d'utilisateurs par salle
+    
     def __init__(self, room_id: str, host_id: str, room_name: str, password: str = None):
         self.room_id = room_id
         self.host_id = host_id
         self.room_name = room_name
-        self.password = password
-        self.created_at = datetime.now()
+        self.password_hash = generate_password_hash(password, PASSWORD_HASH_METHOD) if password else None
+        self.created_at = time.monotonic()
         self.users: Dict[str, User] = {}
-        self.last_translation = {
-            'original': '',
-            'translated': {},  # {language: translation}
-            'timestamp': datetime.now(),
-            'source_language': 'fr',  # Langue source du message
-            'enable_speech': False,    # Si la synthèse vocale doit être activée
-            'sender_id': None         # ID de l'utilisateur qui a envoyé le message
-        }
+        # Index des langues des participants (non-hôtes) : {langue: nombre d'utilisateurs}
+        self.language_counts: Dict[str, int] = {}
+        # Protège users et language_counts (arrivées et départs concurrents)
+        self.users_lock = threading.Lock()
+        self.last_translation = Translation(timestamp=self.created_at)
+        # Numéro de séquence des messages et réveil des requêtes en long-poll
+        self.message_seq = 0
+        self.closed = False
+        # Créée à la première attente : la plupart des salles n'en ont jamais besoin
+        self._update_condition: Optional[threading.Condition] = None
+        # Réponses de /updates pré-sérialisées (construites à la demande, puis à chaque diffusion)
+        self.update_payloads = None
+        # Identifiant du journal de transcription (None si non demandé à la création)
+        self.transcript_id: Optional[str] = None
+    
+    @property
+    def update_condition(self) -> threading.Condition:
+        """Condition de réveil des requêtes en long-poll"""
+        condition = self._update_condition
+        if condition is None:
+            with _condition_creation_lock:
+                if self._update_condition is None:
+                    self._update_condition = threading.Condition()
+                condition = self._update_condition
+        return condition
     
     def add_user(self, user: User) -> bool:
         """Ajoute un utilisateur à la salle"""
-        if len(self.users) >= 10:  # Limite de 10 utilisateurs par salle
-            return False
-        
-        self.users[user.user_id] = user
-        print(f"👤 {user.nickname} ({user.language}) a rejoint la salle {self.room_name}")
+        with self.users_lock:
+            if len(self.users) >= self.max_users:
+                return False
+            
+            self.users[user.user_id] = user
+            if not user.is_host:
+                self.language_counts[user.language] = self.language_counts.get(user.language, 0) + 1
+        logger.info("👤 %s (%s) a rejoint la salle %s", user.nickname, user.language, self.room_name)
         return True
     
     def remove_user(self, user_id: str) -> Optional[User]:
         """Supprime un utilisateur de la salle"""
-        user = self.users.pop(user_id, None)
+        with self.users_lock:
+            user = self.users.pop(user_id, None)
+            if user and not user.is_host:
+                remaining = self.language_counts[user.language] - 1
+                if remaining:
+                    self.language_counts[user.language] = remaining
+                else:
+                    del self.language_counts[user.language]
         if user:
-            print(f"👋 {user.nickname} a quitté la salle {self.room_name}")
+            logger.info("👋 %s a quitté la salle %s", user.nickname, self.room_name)
         return user
     
+    def check_password(self, password: Optional[str]) -> bool:
+        """Vérifie le mot de passe fourni (toujours vrai pour une salle sans mot de passe)"""
+        if not self.password_hash:
+            return True
+        return bool(password) and check_password_hash(self.password_hash, password)
+    
     def get_user(self, user_id: str) -> Optional[User]:
         """Récupère un utilisateur par son ID"""
         return self.users.get(user_id)
     
-    def update_translation(self, original_text: str, translations: Dict[str, str], source_language: str = 'fr', enable_speech: bool = False, sender_id: str = None):
-        """Met à jour la dernière traduction pour toute la salle"""
-        self.last_translation = {
-            'original': original_text,
-            'translated': translations,
-            'timestamp': datetime.now(),
-            'source_language': source_language,
-            'enable_speech': enable_speech,
-            'sender_id': sender_id  # ID de l'utilisateur qui a envoyé le message
-        }
+    def update_translation(self, original_text: str, translations: Dict[str, str], source_language: str = 'fr', enable_speech: bool = False, sender_id: str = None, trace=None):
+        """
+        Met à jour la dernière traduction pour toute la salle
+        trace: trace de latence, publiée avant le réveil des long-polls
+        (sinon les récupérations les plus rapides ne seraient pas comptées)
+        """
+        # Séquence et réponses changent ensemble sous la condition : deux diffusions
+        # simultanées ne perdent pas de numéro et chaque réponse porte le sien
+        condition = self.update_condition
+        with condition:
+            self.last_translation = Translation(original_text, translations, source_language, enable_speech, sender_id)
+            self.message_seq += 1
+            self._build_update_payloads()
+            latency_tracer.publish(trace, self.message_seq)
+            
+            # Réveiller les clients en attente (long-poll)
+            condition.notify_all()
+        
+        logger.info("📝 Nouvelle traduction dans %s: '%s...' -> %d langues", self.room_name, original_text[:50], len(translations))
+    
+    def wait_for_update(self, since: int, timeout: float) -> bool:
+        """
+        Bloque jusqu'à ce que la séquence dépasse `since`, la fermeture
+        de la salle ou l'expiration du délai.
+        Returns: True si un nouveau message est disponible
+        """
+        condition = self.update_condition
+        with condition:
+            condition.wait_for(
+                lambda: self.message_seq > since or self.closed,
+                timeout=timeout
+            )
+            return self.message_seq > since
+    
+    def close(self):
+        """Marque la salle comme fermée et libère les requêtes en attente"""
+        self.closed = True
+        condition = self._update_condition
+        if condition is not None:
+            with condition:
+                condition.notify_all()
+    
+    def _build_update_payloads(self):
+        """
+        Pré-calcule les réponses de /updates pour la dernière traduction.
+        Seules quelques variantes existent (hôte, chaque langue de participant,
+        auteur du message, autres) : elles sont encodées une fois par diffusion
+        au lieu d'une fois par requête de polling.
+        """
+        last_translation = self.last_translation
+        source_language = last_translation.source_language
+        translations = last_translation.translated
+        timestamp = _to_isoformat(last_translation.timestamp)
+        seq = self.message_seq
+        
+        # Pour l'hôte : voir les réponses des participants traduites en français
+        if source_language != 'fr':  # C'est une réponse d'un utilisateur
+            host_original = translations.get('fr', '')
+        else:  # C'est le message de l'hôte
+            host_original = last_translation.original
+        host_payload = _encode_payload({
+            'success': True,
+            'original': host_original,
+            'translated': '',
+            'timestamp': timestamp,
+            'seq': seq,
+            'is_host': True,
+            'show_translation': False
+        })
+        
+        # Pour les participants : variantes indexées par langue
+        if source_language == 'fr':  # Message de l'hôte
+            def participant_payload(translated_text):
+                return _encode_payload({
+                    'success': True,
+                    'original': last_translation.original,
+                    'translated': translated_text,
+                    'timestamp': timestamp,
+                    'seq': seq,
+                    'is_host': False,
+                    'show_translation': True,
+                    'enable_speech': last_translation.enable_speech
+                })
+            
+            language_payloads = {
+                language: participant_payload(translated_text)
+                for language, translated_text in translations.items()
+            }
+            default_payload = participant_payload('')
+        else:
+            # Les participants de la langue source voient leur propre message
+            # avec sa traduction française
+            language_payloads = {
+                source_language: _encode_payload({
+                    'success': True,
+                    'original': last_translation.original,
+                    'translated': translations.get('fr', ''),
+                    'timestamp': timestamp,
+                    'seq': seq,
+                    'is_host': False,
+                    'show_own_message': True,
+                    'show_translation': False
+                })
+            }
+            # Message d'un autre utilisateur
+            default_payload = _encode_payload({
+                'success': True,
+                'original': '',
+                'translated': '',
+                'timestamp': timestamp,
+                'seq': seq,
+                'is_host': False,
+                'show_translation': False
+            })
         
-        print(f"📝 Nouvelle traduction dans {self.room_name}: '{original_text[:50]}...' -> {len(translations)} langues")
+        # Remplacement en une seule affectation : un lecteur concurrent voit
+        # toujours un ensemble cohérent
+        self.update_payloads = (host_payload, language_payloads, default_payload)
+    
+    def get_update_payload(self, user: User) -> bytes:
+        """Retourne la réponse JSON encodée de /updates pour un utilisateur"""
+        payloads = self.update_payloads
+        if payloads is None:
+            # Même condition que update_translation : jamais construit sur un message à moitié publié
+            with self.update_condition:
+                if self.update_payloads is None:
+                    self._build_update_payloads()
+                payloads = self.update_payloads
+        host_payload, language_payloads, default_payload = payloads
+        if user.is_host:
+            return host_payload
+        return language_payloads.get(user.language, default_payload)
     
     def get_active_languages(self) -> List[str]:
         """Retourne la liste des langues utilisées dans la salle"""
-        return list(set(user.language for user in self.users.values()))
+        languages = set(self.language_counts)
+        host = self.users.get(self.host_id)
+        if host:
+            languages.add(host.language)
+        return list(languages)
     
     def get_participant_languages(self) -> List[str]:
         """Retourne la liste des langues des participants (non-hôtes)"""
-        return list(set(user.language for user in self.users.values() if not user.is_host))
-    
-    def cleanup_inactive_users(self, timeout_minutes: int = 30):
-        """Supprime les utilisateurs inactifs"""
-        cutoff_time = datetime.now() - timedelta(minutes=timeout_minutes)
-        inactive_users = [
-            user_id for user_id, user in self.users.items()
-            if user.last_activity < cutoff_time
-        ]
+        return list(self.language_counts)
+    
+    def can_broadcast(self, user: User) -> bool:
+        """Indique si un utilisateur peut diffuser un message dans la salle"""
+        return True
+    
+    def cleanup_inactive_users(self, timeout_minutes: int = 30) -> List[User]:
+        """Supprime les utilisateurs inactifs et les retourne"""
+        cutoff_time = time.monotonic() - timeout_minutes * 60
+        with self.users_lock:
+            inactive_users = [
+                user_id for user_id, user in self.users.items()
+                if user.last_activity < cutoff_time
+            ]
         
+        removed = []
         for user_id in inactive_users:
-            self.remove_user(user_id)
+            user = self.remove_user(user_id)
+            if user:
+                removed.append(user)
+        return removed
     
-    def to_dict(self):
-        """Convertit la salle en dictionnaire pour JSON"""
+    def to_dict(self, user_ids: List[str] = None):
+        """
+        Convertit la salle en dictionnaire pour JSON
+        `user_ids` limite la liste des utilisateurs (grandes salles)
+        """
+        if user_ids is None:
+            users = list(self.users.values())
+        else:
+            users = [self.users[user_id] for user_id in user_ids if user_id in self.users]
+        
         return {
             'room_id': self.room_id,
             'room_name': self.room_name,
-            'created_at': self.created_at.isoformat(),
+            'room_type': self.room_type,
+            'transcript': self.transcript_id is not None,
+            'created_at': _to_isoformat(self.created_at),
             'users_count': len(self.users),
-            'users': [user.to_dict() for user in self.users.values()],
-            'last_translation': {
-                'original': self.last_translation['original'],
-                'translated': self.last_translation['translated'],
-                'timestamp': self.last_translation['timestamp'].isoformat(),
-                'source_language': self.last_translation['source_language'],
-                'sender_id': self.last_translation.get('sender_id')
-            }
+            'languages': dict(self.language_counts),
+            'users': [user.to_dict() for user in users],
+            'last_translation': self.last_translation.to_dict()
+        }
+    
+    def to_summary(self) -> dict:
+        """Résumé de la salle pour les listes d'administration (sans utilisateurs ni message)"""
+        return {
+            'room_id': self.room_id,
+            'room_name': self.room_name,
+            'room_type': self.room_type,
+            'transcript': self.transcript_id is not None,
+            'created_at': _to_isoformat(self.created_at),
+            'users_count': len(self.users),
+            'languages': dict(self.language_counts),
+            'message_seq': self.message_seq
         }
 
+    def export_state(self) -> dict:
+        """
+        État transférable de la salle (migration vers un autre worker).
+        Les horodatages monotones sont convertis en heure murale (epoch).
+        """
+        last = self.last_translation
+        return {
+            'room_type': self.room_type,
+            'room_id': self.room_id,
+            'host_id': self.host_id,
+            'room_name': self.room_name,
+            'password_hash': self.password_hash,
+            'created_at': _WALL_CLOCK_OFFSET + self.created_at,
+            'users': [
+                [user.user_id, user.nickname, user.language, user.is_host,
+                 _WALL_CLOCK_OFFSET + user.joined_at, _WALL_CLOCK_OFFSET + user.last_activity]
+                for user in list(self.users.values())
+            ],
+            'last_translation': [
+                last.original, last.translated, _WALL_CLOCK_OFFSET + last.timestamp,
+                last.source_language, last.enable_speech, last.sender_id
+            ],
+            'message_seq': self.message_seq,
+            'transcript_id': self.transcript_id
+        }
+    
+    @staticmethod
+    def from_state(state: dict) -> 'Room':
+        """Reconstruit une salle à partir de export_state()"""
+        room_class = ROOM_TYPES.get(state.get('room_type'), Room)
+        room = room_class(state['room_id'], state['host_id'], state['room_name'])
+        room.password_hash = state.get('password_hash')
+        room.created_at = state['created_at'] - _WALL_CLOCK_OFFSET
+        
+        for user_id, nickname, language, is_host, joined_at, last_activity in state['users']:
+            user = User(user_id, nickname, language, is_host)
+            user.joined_at = joined_at - _WALL_CLOCK_OFFSET
+            user.last_activity = last_activity - _WALL_CLOCK_OFFSET
+            # Salle pas encore publiée : aucun accès concurrent, pas de verrou
+            room.users[user_id] = user
+            if not is_host:
+                room.language_counts[language] = room.language_counts.get(language, 0) + 1
+        
+        original, translated, timestamp, source_language, enable_speech, sender_id = state['last_translation']
+        room.last_translation = Translation(
+            original, translated, source_language, enable_speech, sender_id,
+            timestamp=timestamp - _WALL_CLOCK_OFFSET
+        )
+        room.message_seq = state['message_seq']
+        room.transcript_id = state.get('transcript_id')
+        return room
+
+class LectureRoom(Room):
+    """
+    Salle de type conférence : un hôte qui parle, des milliers d'auditeurs.
+    Chaque message est traduit une fois par langue et livré à tout le groupe
+    de langue via la même réponse pré-sérialisée ; le coût d'une diffusion
+    dépend du nombre de langues, pas du nombre d'auditeurs.
+    """
+    __slots__ = ()
+    
+    room_type = 'lecture'
+    max_users = int(os.environ.get('LECTURE_MAX_USERS', 5000))
+    
+    def can_broadcast(self, user: User) -> bool:
+        """Seul l'hôte parle dans une conférence"""
+        return user.is_host
+
+# Types de salle disponibles à la création
+ROOM_TYPES = {
+    Room.room_type: Room,
+    LectureRoom.room_type: LectureRoom
+}
+
+class RoomCounters:
+    """
+    Agrégats des salles tenus à jour à chaque événement (création, arrivée,
+    départ, expiration) : les statistiques sont servies en O(1), sans
+    parcourir les salles.
+    """
+    
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rooms = 0
+        self.users = 0
+        self.rooms_by_type: Dict[str, int] = {}
+        # Utilisateurs par langue (hôtes compris)
+        self.languages: Dict[str, int] = {}
+        # Événements cumulés depuis le démarrage
+        self.events = {
+            'rooms_created': 0, 'rooms_closed': 0, 'rooms_expired': 0,
+            'joins': 0, 'leaves': 0, 'users_expired': 0
+        }
+    
+    def _add_users(self, users, sign: int):
+        for user in users:
+            remaining = self.languages.get(user.language, 0) + sign
+            if remaining:
+                self.languages[user.language] = remaining
+            else:
+                self.languages.pop(user.language, None)
+        self.users += sign * len(users)
+    
+    def room_added(self, room: Room, created: bool = False):
+        """Salle créée, restaurée ou reçue d'un autre worker"""
+        with self.lock:
+            self.rooms += 1
+            self.rooms_by_type[room.room_type] = self.rooms_by_type.get(room.room_type, 0) + 1
+            self._add_users(list(room.users.values()), 1)
+            if created:
+                self.events['rooms_created'] += 1
+    
+    def room_removed(self, room: Room, expired: bool = False):
+        """Salle supprimée (ses utilisateurs restants avec elle) ou transférée"""
+        with self.lock:
+            self.rooms -= 1
+            remaining = self.rooms_by_type.get(room.room_type, 0) - 1
+            if remaining:
+                self.rooms_by_type[room.room_type] = remaining
+            else:
+                self.rooms_by_type.pop(room.room_type, None)
+            self._add_users(list(room.users.values()), -1)
+            self.events['rooms_expired' if expired else 'rooms_closed'] += 1
+    
+    def user_joined(self, user: User):
+        with self.lock:
+            self._add_users((user,), 1)
+            self.events['joins'] += 1
+    
+    def user_left(self, user: User, expired: bool = False):
+        with self.lock:
+            self._add_users((user,), -1)
+            self.events['users_expired' if expired else 'leaves'] += 1
+    
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                'total_rooms': self.rooms,
+                'total_users': self.users,
+                'rooms_by_type': dict(self.rooms_by_type),
+                'languages': dict(self.languages),
+                'events': dict(self.events)
+            }
+
 class RoomManager:
     def __init__(self):
         self.rooms: Dict[str, Room] = {}
-        print("🏠 Gestionnaire de salles initialisé")
+        self.room_ids = RoomIdAllocator()
+        self.counters = RoomCounters()
+        # Mode réparti : salles transférées à un autre worker {room_id: URL du worker}
+        self.shards = shard_map
+        self.moved: Dict[str, str] = {}
+        logger.info("🏠 Gestionnaire de salles initialisé")
     
-    def create_room(self, host_nickname: str, host_language: str, room_name: str, password: str = None) -> tuple:
+    def create_room(self, host_nickname: str, host_language: str, room_name: str, password: str = None, room_type: str = 'meeting', transcript: bool = False) -> tuple:
         """
         Crée une nouvelle salle
         Returns: (room_id, user_id, success)
         """
         try:
-            # Générer un ID de salle simple (4 chiffres)
+            # Générer un ID de salle simple (4 chiffres tant que possible)
             room_id = self._generate_room_id()
             
             # Créer l'hôte
@@ -132,17 +526,23 @@ class RoomManager:
             host_user = User(host_id, host_nickname, host_language, is_host=True)
             
             # Créer la salle
-            room = Room(room_id, host_id, room_name, password)
+            room_class = ROOM_TYPES.get(room_type, Room)
+            room = room_class(room_id, host_id, room_name, password)
             room.add_user(host_user)
             
+            # Journal de transcription sur option (identifiant unique : les codes de salle sont recyclés)
+            if transcript:
+                room.transcript_id = f"{room_id}-{uuid.uuid4().hex[:12]}"
+            
             # Stocker la salle
             self.rooms[room_id] = room
+            self.counters.room_added(room, created=True)
             
-            print(f"🎉 Salle créée : {room_name} (ID: {room_id}) par {host_nickname}")
+            logger.info("🎉 Salle créée : %s (ID: %s) par %s", room_name, room_id, host_nickname)
             return room_id, host_id, True
             
         except Exception as e:
-            print(f"❌ Erreur création salle : {str(e)}")
+            logger.error("❌ Erreur création salle : %s", e)
             return None, None, False
     
     def join_room(self, room_id: str, nickname: str, language: str, password: str = None) -> tuple:
@@ -158,7 +558,7 @@ class RoomManager:
             room = self.rooms[room_id]
             
             # Vérifier le mot de passe
-            if room.password and room.password != password:
+            if not room.check_password(password):
                 return None, False, "Mot de passe incorrect"
             
             # Créer l'utilisateur
@@ -167,12 +567,13 @@ class RoomManager:
             
             # Ajouter à la salle
             if room.add_user(user):
+                self.counters.user_joined(user)
                 return user_id, True, None
             else:
-                return None, False, "Salle pleine (maximum 10 utilisateurs)"
+                return None, False, f"Salle pleine (maximum {room.max_users} utilisateurs)"
                 
         except Exception as e:
-            print(f"❌ Erreur rejoindre salle : {str(e)}")
+            logger.error("❌ Erreur rejoindre salle : %s", e)
             return None, False, f"Erreur : {str(e)}"
     
     def leave_room(self, room_id: str, user_id: str) -> bool:
@@ -183,21 +584,23 @@ class RoomManager:
             
             room = self.rooms[room_id]
             user = room.remove_user(user_id)
+            if user:
+                self.counters.user_left(user)
             
             # Si l'hôte quitte, supprimer la salle
             if user and user.is_host:
                 self._delete_room(room_id)
-                print(f"🗑️ Salle {room.room_name} supprimée (hôte parti)")
+                logger.info("🗑️ Salle %s supprimée (hôte parti)", room.room_name)
             
             # Si plus personne, supprimer la salle
             elif len(room.users) == 0:
                 self._delete_room(room_id)
-                print(f"🗑️ Salle {room.room_name} supprimée (vide)")
+                logger.info("🗑️ Salle %s supprimée (vide)", room.room_name)
             
             return True
             
         except Exception as e:
-            print(f"❌ Erreur quitter salle : {str(e)}")
+            logger.error("❌ Erreur quitter salle : %s", e)
             return False
     
     def get_room(self, room_id: str) -> Optional[Room]:
@@ -212,9 +615,12 @@ class RoomManager:
             if user:
                 user.update_activity()
     
-    def broadcast_translation(self, room_id: str, original_text: str, source_language: str, sender_id: str = None, enable_speech: bool = False):
+    def broadcast_translation(self, room_id: str, original_text: str, source_language: str, sender_id: str = None, enable_speech: bool = False, trace=None, admitted: bool = False):
         """
         Diffuse une traduction à tous les utilisateurs d'une salle
+        Lève SchedulerOverloaded si l'utilisateur ou le serveur est saturé
+        trace: trace de latence du message (créée ici si absente)
+        admitted: jeton de débit déjà consommé par l'appelant (transcription audio)
         Flux adapté selon les spécifications :
         - Hôte parle français -> traduit vers toutes les langues des participants + synthèse vocale
         - Participant parle sa langue -> traduit vers français seulement
@@ -224,21 +630,37 @@ class RoomManager:
             return False
         
         # Importer ici pour éviter les imports circulaires
-        from translation_manager import translation_manager
+        from translation_scheduler import translation_scheduler, SchedulerOverloaded
+        
+        sender = room.get_user(sender_id) if sender_id else None
+        is_host = sender.is_host if sender else source_language == 'fr'
+        
+        # Limite de débit par utilisateur : lève SchedulerOverloaded (réponse 429)
+        if not admitted:
+            translation_scheduler.admit(sender_id or f"room:{room_id}")
+        
+        if trace is None:
+            trace = latency_tracer.start(room_id, 'broadcast')
         
         translations = {}
         
         if source_language == 'fr':  # L'hôte parle français
-            # Traduire vers toutes les langues des participants
+            # Traduire vers toutes les langues des participants (en parallèle, via la file de la salle)
             participant_languages = room.get_participant_languages()
+            jobs = {
+                target_lang: translation_scheduler.translate_async(original_text, source_language, target_lang, room_id, is_host, trace)
+                for target_lang in participant_languages
+            }
             
-            for target_lang in participant_languages:
+            for target_lang, job in jobs.items():
                 try:
-                    translated = translation_manager.translate(original_text, source_language, target_lang)
+                    translated = job.result(translation_scheduler.result_timeout)
                     translations[target_lang] = translated
-                    print(f"🌍 Hôte -> {target_lang}: {translated[:50]}...")
+                    logger.debug("🌍 Hôte -> %s: %s...", target_lang, translated[:50])
+                except SchedulerOverloaded:
+                    raise
                 except Exception as e:
-                    print(f"❌ Erreur traduction vers {target_lang}: {str(e)}")
+                    logger.error("❌ Erreur traduction vers %s: %s", target_lang, e)
                     translations[target_lang] = f"Erreur de traduction"
             
             # Activer la synthèse vocale pour les participants
@@ -247,55 +669,193 @@ class RoomManager:
         else:  # Un participant parle dans sa langue
             # Traduire seulement vers le français pour l'hôte
             try:
-                translated = translation_manager.translate(original_text, source_language, 'fr')
+                translated = translation_scheduler.translate(original_text, source_language, 'fr', room_id, is_host, trace)
                 translations['fr'] = translated
-                print(f"🌍 Participant ({source_language}) -> français: {translated[:50]}...")
+                logger.debug("🌍 Participant (%s) -> français: %s...", source_language, translated[:50])
+            except SchedulerOverloaded:
+                raise
             except Exception as e:
-                print(f"❌ Erreur traduction vers français: {str(e)}")
+                logger.error("❌ Erreur traduction vers français: %s", e)
                 translations['fr'] = f"Erreur de traduction"
             
             # Pas de synthèse vocale pour l'hôte
             enable_speech = False
         
         # Mettre à jour la salle avec l'ID de l'expéditeur
-        room.update_translation(original_text, translations, source_language, enable_speech, sender_id)
+        fanout_start = time.monotonic()
+        room.update_translation(original_text, translations, source_language, enable_speech, sender_id, trace)
+        if trace:
+            trace.span('fanout', fanout_start)
+        
+        # Ajouter au journal de transcription (écrit en arrière-plan)
+        if room.transcript_id:
+            from transcript_log import transcript_log
+            transcript_log.append(room.transcript_id, {
+                'seq': room.message_seq,
+                'timestamp': datetime.now().isoformat(),
+                'source_language': source_language,
+                'original': original_text,
+                'translated': translations,
+                'sender_id': sender_id
+            })
         
         return True
     
+    def pretranslate_draft(self, room_id: str, text: str, source_language: str, sender_id: str) -> int:
+        """
+        Pré-traduit un brouillon vers les langues que recevra le message
+        (mêmes cibles que broadcast_translation) : l'envoi final trouve le cache
+        Returns: nombre de traductions mises en file (0 si ignoré)
+        """
+        room = self.get_room(room_id)
+        if not room:
+            return 0
+        
+        # Importer ici pour éviter les imports circulaires
+        from translation_scheduler import translation_scheduler
+        
+        target_languages = room.get_participant_languages() if source_language == 'fr' else ['fr']
+        return translation_scheduler.submit_draft(text, source_language, target_languages, sender_id)
+    
     def _generate_room_id(self) -> str:
-        """Génère un ID de salle simple (4 chiffres)"""
-        import random
-        while True:
-            room_id = f"{random.randint(1000, 9999)}"
-            if room_id not in self.rooms:
-                return room_id
+        """
+        Génère un ID de salle simple (4 chiffres, plus long si l'espace est saturé)
+        En mode réparti, seuls les identifiants appartenant à ce worker sont retenus
+        """
+        if self.shards.enabled:
+            return self.room_ids.allocate(self.shards.is_local)
+        return self.room_ids.allocate()
     
-    def _delete_room(self, room_id: str):
+    def _delete_room(self, room_id: str, expired: bool = False):
         """Supprime une salle"""
-        if room_id in self.rooms:
-            del self.rooms[room_id]
+        room = self.rooms.pop(room_id, None)
+        if room:
+            self.counters.room_removed(room, expired)
+            room.close()
+            self.room_ids.release(room_id)
+            latency_tracer.forget_room(room_id)
+    
+    # ------------------------------------------------------------
+    # Mode réparti (voir sharding.py et shard_router.py)
+    # ------------------------------------------------------------
+    
+    def import_room(self, state: dict) -> bool:
+        """Installe une salle transférée par un autre worker"""
+        room = Room.from_state(state)
+        if room.room_id in self.rooms:
+            return False
+        self.room_ids.reserve(room.room_id)
+        self.moved.pop(room.room_id, None)
+        self.rooms[room.room_id] = room
+        self.counters.room_added(room)
+        logger.info("📥 Salle %s reçue (%d utilisateurs)", room.room_id, len(room.users))
+        return True
+    
+    def restore_rooms(self, states: List[dict]) -> int:
+        """
+        Recharge des salles (instantané au démarrage)
+        En mode réparti, seules les salles de ce worker sont gardées
+        """
+        restored = 0
+        for state in states:
+            room_id = state['room_id']
+            if room_id in self.rooms or not self.shards.is_local(room_id):
+                continue
+            self.room_ids.reserve(room_id)
+            room = self.rooms[room_id] = Room.from_state(state)
+            self.counters.room_added(room)
+            restored += 1
+        return restored
+    
+    def rebalance(self, workers: List[str]) -> dict:
+        """
+        Transfère les salles qui appartiennent à un autre worker d'après la
+        nouvelle liste, puis l'applique si tous les transferts ont réussi
+        (sinon l'ancienne liste reste en place, un nouvel appel reprend).
+        Les requêtes pour une salle transférée reçoivent une réponse 421
+        indiquant son nouveau propriétaire (le routeur réessaie auprès de lui).
+        """
+        # Importer ici : requests n'est utile qu'en mode réparti
+        import requests
+        from sharding import SHARD_TOKEN
+        
+        workers = [worker.rstrip('/') for worker in workers]
+        outgoing: Dict[str, List[str]] = {}
+        for room_id in list(self.rooms):
+            owner = self.shards.owner(room_id, workers)
+            if owner != self.shards.self_url:
+                outgoing.setdefault(owner, []).append(room_id)
+        
+        moved = 0
+        failed = 0
+        for owner, room_ids in outgoing.items():
+            rooms = [self.rooms[room_id] for room_id in room_ids if room_id in self.rooms]
+            try:
+                response = requests.post(
+                    f"{owner}/api/admin/shard/import",
+                    json={'rooms': [room.export_state() for room in rooms]},
+                    headers={'X-Shard-Token': SHARD_TOKEN},
+                    timeout=30
+                )
+                response.raise_for_status()
+            except Exception as e:
+                logger.error("❌ Transfert vers %s impossible: %s", owner, e)
+                failed += len(rooms)
+                continue
+            
+            for room in rooms:
+                # Fermer la salle réveille les long-polls : ils repartent vers le nouveau propriétaire
+                if self.rooms.pop(room.room_id, None) is not None:
+                    self.counters.room_removed(room)
+                room.close()
+                self.room_ids.release(room.room_id)
+                latency_tracer.forget_room(room.room_id)
+                self.moved[room.room_id] = owner
+            moved += len(rooms)
+        
+        if failed:
+            logger.warning("⚠️ Rééquilibrage incomplet: %d salles transférées, %d échecs, liste de workers inchangée", moved, failed)
+        else:
+            self.shards.set_workers(workers)
+            logger.info("🔀 Rééquilibrage: %d salles transférées", moved)
+        return {'moved': moved, 'failed': failed, 'rooms': len(self.rooms)}
     
     def cleanup_rooms(self):
         """Nettoie les salles vides et les utilisateurs inactifs"""
         rooms_to_delete = []
         
-        for room_id, room in self.rooms.items():
-            room.cleanup_inactive_users()
+        for room_id, room in list(self.rooms.items()):
+            for user in room.cleanup_inactive_users():
+                self.counters.user_left(user, expired=True)
             
             if len(room.users) == 0:
                 rooms_to_delete.append(room_id)
         
         for room_id in rooms_to_delete:
-            self._delete_room(room_id)
-            print(f"🧹 Salle {room_id} supprimée (nettoyage)")
+            self._delete_room(room_id, expired=True)
+            logger.info("🧹 Salle %s supprimée (nettoyage)", room_id)
     
     def get_stats(self) -> dict:
-        """Retourne les statistiques des salles"""
-        return {
-            'total_rooms': len(self.rooms),
-            'total_users': sum(len(room.users) for room in self.rooms.values()),
-            'rooms': [room.to_dict() for room in self.rooms.values()]
-        }
+        """Statistiques agrégées des salles (O(1), tenues à jour à chaque événement)"""
+        return self.counters.to_dict()
+    
+    def iter_rooms(self, room_type: str = None, language: str = None, min_users: int = 0, query: str = None):
+        """
+        Parcourt les salles (ordre de création) selon des filtres optionnels :
+        type, langue d'un participant, nombre minimal d'utilisateurs, texte
+        contenu dans le nom ou l'identifiant
+        """
+        query = query.casefold() if query else None
+        for room in list(self.rooms.values()):
+            if room_type and room.room_type != room_type:
+                continue
+            if language and language not in room.language_counts:
+                continue
+            if len(room.users) < min_users:
+                continue
+            if query and query not in room.room_id and query not in room.room_name.casefold():
+                continue
+            yield room
 
 # Instance globale du gestionnaire de salles
 room_manager = RoomManager()
@@ -0,0 +1,161 @@
+import gc
+import os
+import json
+import time
+import signal
+import sys
+import threading
+from room_manager import room_manager
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Fichier d'instantané des salles (un par worker en mode réparti)
+SNAPSHOT_FILE = os.environ.get('ROOM_SNAPSHOT_FILE', 'room_snapshot.json')
+
+# Format et version de l'instantané (champ « format » du document JSON)
+SNAPSHOT_FORMAT = 'tradlive-rooms'
+SNAPSHOT_VERSION = 2
+
+# Ordre des champs de Room.export_state() dans les listes de l'instantané
+ROOM_FIELDS = (
+    'room_type', 'room_id', 'host_id', 'room_name', 'password_hash', 'created_at',
+    'users', 'last_translation', 'message_seq', 'transcript_id'
+)
+
+class RoomSnapshot:
+    """
+    Instantanés des salles (utilisateurs et dernier message compris) pour
+    survivre aux redémarrages : écriture périodique et à l'arrêt, restauration
+    au chargement de l'application, avant la première requête.
+    Sur option (ROOM_SNAPSHOT=1). Format : document JSON (données seulement,
+    rien n'est exécuté à la lecture), une liste de champs par salle ; les mots
+    de passe n'y figurent que sous forme d'empreinte. Écriture dans un
+    fichier temporaire remplacé atomiquement.
+    """
+
+    def __init__(self, manager, path: str = SNAPSHOT_FILE):
+        self.manager = manager
+        self.path = path
+        self.enabled = os.environ.get('ROOM_SNAPSHOT', '0') == '1'
+        self.interval = float(os.environ.get('ROOM_SNAPSHOT_INTERVAL', 30))
+        # Au-delà, les salles sont considérées comme abandonnées
+        self.max_age = float(os.environ.get('ROOM_SNAPSHOT_MAX_AGE', 3600))
+        self.lock = threading.Lock()
+        self.thread = None
+        self.stats = {'saved_rooms': 0, 'save_ms': 0.0, 'restored_rooms': 0, 'restore_ms': 0.0}
+
+    # ------------------------------------------------------------
+    # Écriture
+    # ------------------------------------------------------------
+
+    def dumps(self) -> bytes:
+        """Sérialise toutes les salles"""
+        records = []
+        for room in list(self.manager.rooms.values()):
+            state = room.export_state()
+            records.append([state[field] for field in ROOM_FIELDS])
+        return json.dumps({
+            'format': SNAPSHOT_FORMAT,
+            'version': SNAPSHOT_VERSION,
+            'written_at': time.time(),
+            'fields': ROOM_FIELDS,
+            'rooms': records
+        }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def save(self) -> int:
+        """Écrit l'instantané (remplacement atomique) ; retourne le nombre de salles"""
+        if not self.enabled:
+            return 0
+        start = time.perf_counter()
+        with self.lock:
+            data = self.dumps()
+            temp_path = f"{self.path}.tmp"
+            try:
+                with open(temp_path, 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.path)
+            except Exception as e:
+                logger.error("❌ Erreur écriture de l'instantané des salles: %s", e)
+                return 0
+
+        room_count = len(self.manager.rooms)
+        self.stats['saved_rooms'] = room_count
+        self.stats['save_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return room_count
+
+    # ------------------------------------------------------------
+    # Restauration
+    # ------------------------------------------------------------
+
+    def loads(self, data: bytes):
+        """Retourne la liste des états de salle (None si l'instantané est inutilisable)"""
+        try:
+            snapshot = json.loads(data)
+        except ValueError:
+            logger.warning("Instantané des salles ignoré (JSON invalide)")
+            return None
+        if (not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT
+                or snapshot.get('version') != SNAPSHOT_VERSION):
+            logger.warning("Instantané des salles ignoré (format inconnu)")
+            return None
+        if time.time() - snapshot.get('written_at', 0) > self.max_age:
+            logger.info("Instantané des salles ignoré (trop ancien)")
+            return None
+
+        fields = snapshot['fields']
+        return [dict(zip(fields, record)) for record in snapshot['rooms']]
+
+    def restore(self) -> int:
+        """Recharge les salles de l'instantané ; retourne le nombre de salles restaurées"""
+        if not self.enabled or not os.path.exists(self.path):
+            return 0
+        start = time.perf_counter()
+        # Des centaines de milliers d'objets créés d'un coup : sans ramasse-miettes
+        # cyclique pendant le chargement, la restauration est ~25 % plus rapide
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            with open(self.path, 'rb') as f:
+                states = self.loads(f.read())
+            if not states:
+                return 0
+            restored = self.manager.restore_rooms(states)
+        except Exception as e:
+            logger.error("❌ Erreur restauration des salles: %s", e)
+            return 0
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        self.stats['restored_rooms'] = restored
+        self.stats['restore_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        logger.info("♻️ %d salles restaurées en %s ms", restored, self.stats['restore_ms'])
+        return restored
+
+    # ------------------------------------------------------------
+    # Écriture périodique et à l'arrêt
+    # ------------------------------------------------------------
+
+    def _periodic(self):
+        while True:
+            time.sleep(self.interval)
+            self.save()
+
+    def start(self):
+        """Lance l'écriture périodique et l'écriture à l'arrêt (SIGTERM)"""
+        if not self.enabled or self.thread is not None:
+            return
+        self.thread = threading.Thread(target=self._periodic, name='room-snapshot')
+        self.thread.daemon = True
+        self.thread.start()
+
+        # Sous gunicorn, le worker gère déjà SIGTERM et sort normalement (atexit) ;
+        # en lancement direct, transformer SIGTERM en sortie propre
+        if threading.current_thread() is threading.main_thread() and signal.getsignal(signal.SIGTERM) == signal.SIG_DFL:
+            signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+# Instance globale
+room_snapshot = RoomSnapshot(room_manager)
@@ -0,0 +1,172 @@
+"""
+Routeur du mode réparti : aiguille chaque requête vers le worker qui
+possède la salle concernée (hachage rendez-vous, voir sharding.py).
+
+Lancement (exemple avec deux workers sur la même machine) :
+    SHARD_WORKERS=http://127.0.0.1:8001,http://127.0.0.1:8002 SHARD_SELF=http://127.0.0.1:8001 \\
+        gunicorn --bind 127.0.0.1:8001 --worker-class gthread --threads 64 app:app
+    SHARD_WORKERS=http://127.0.0.1:8001,http://127.0.0.1:8002 SHARD_SELF=http://127.0.0.1:8002 \\
+        gunicorn --bind 127.0.0.1:8002 --worker-class gthread --threads 64 app:app
+    SHARD_WORKERS=http://127.0.0.1:8001,http://127.0.0.1:8002 \\
+        gunicorn --bind 0.0.0.0:$PORT --worker-class gthread --threads 128 shard_router:app
+
+Ajout d'un worker : démarrer le nouveau worker avec la liste complète, puis
+POST /_router/workers {"workers": [...]} sur le routeur.
+"""
+import itertools
+import re
+import threading
+
+import requests
+from flask import Flask, Response, jsonify, request
+
+from log_config import get_logger
+from sharding import ShardMap, SHARD_TOKEN, token_valid
+
+logger = get_logger(__name__)
+
+# Routes liées à une salle : /room/<id>, /api/room/<id>/...
+ROOM_PATH = re.compile(r'^/(?:api/)?room/([^/]+)')
+
+# En-têtes propres à chaque connexion, jamais relayés
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailers', 'transfer-encoding', 'upgrade', 'host', 'content-length'
+}
+
+# Long-poll compris (25 s côté worker)
+UPSTREAM_TIMEOUT = (5, 60)
+
+app = Flask(__name__)
+shards = ShardMap(self_url='')
+_round_robin = itertools.count()
+_sessions = threading.local()
+
+def session() -> requests.Session:
+    """Une session HTTP (connexions persistantes) par thread"""
+    current = getattr(_sessions, 'session', None)
+    if current is None:
+        current = _sessions.session = requests.Session()
+    return current
+
+def any_worker() -> str:
+    """Routes sans salle (pages, fichiers statiques, création) : tour de rôle"""
+    workers = shards.workers
+    return workers[next(_round_robin) % len(workers)]
+
+def target_worker() -> str:
+    """Worker qui doit traiter la requête courante"""
+    match = ROOM_PATH.match(request.path)
+    if match:
+        return shards.owner(match.group(1))
+
+    # Routes dont la salle est dans le corps de la requête
+    if request.path in ('/api/join-room', '/api/translate-batch'):
+        data = request.get_json(silent=True) or {}
+        room_id = str(data.get('room_id') or '').strip()
+        if room_id:
+            return shards.owner(room_id)
+
+    # Messages vocaux : la salle est dans le formulaire multipart
+    # (corps déjà mis en cache par get_data(), le formulaire le relit sans consommer le flux)
+    if request.path == '/api/transcribe-audio':
+        room_id = str(request.form.get('room_id') or '').strip()
+        if room_id:
+            return shards.owner(room_id)
+
+    # Création : le worker choisi tire un identifiant qu'il possède (placement)
+    return any_worker()
+
+def relay(upstream):
+    """Corps relayé tel quel (déjà compressé par le worker le cas échéant)"""
+    try:
+        yield from upstream.raw.stream(65536, decode_content=False)
+    finally:
+        upstream.close()
+
+def forward(worker: str, body: bytes):
+    """Relaie la requête vers un worker"""
+    headers = {
+        name: value for name, value in request.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    }
+    forwarded_for = request.headers.get('X-Forwarded-For')
+    headers['X-Forwarded-For'] = f"{forwarded_for}, {request.remote_addr}" if forwarded_for else request.remote_addr
+
+    return session().request(
+        request.method,
+        worker + request.full_path.rstrip('?'),
+        headers=headers,
+        data=body,
+        stream=True,
+        allow_redirects=False,
+        timeout=UPSTREAM_TIMEOUT
+    )
+
+@app.route('/_router/status')
+def router_status():
+    return jsonify(shards.get_stats())
+
+@app.route('/_router/workers', methods=['POST'])
+def router_workers():
+    """
+    Change la liste des workers : chaque worker existant transfère d'abord
+    les salles qui changent de propriétaire, puis le routeur bascule.
+    """
+    if not token_valid(request.headers.get('X-Shard-Token')):
+        return jsonify({'success': False, 'error': 'Non autorisé'}), 403
+
+    workers = [w.rstrip('/') for w in (request.json or {}).get('workers') or []]
+    if not workers:
+        return jsonify({'success': False, 'error': 'Liste de workers requise'}), 400
+
+    results = {}
+    for worker in shards.workers:
+        try:
+            response = session().post(
+                f"{worker}/api/admin/shard/rebalance",
+                json={'workers': workers},
+                headers={'X-Shard-Token': SHARD_TOKEN},
+                timeout=120
+            )
+            results[worker] = response.json()
+        except Exception as e:
+            logger.error("❌ Rééquilibrage de %s impossible: %s", worker, e)
+            results[worker] = {'success': False, 'error': str(e)}
+
+    if not all(result.get('success') for result in results.values()):
+        # Un worker a gardé des salles : basculer les enverrait au mauvais propriétaire
+        return jsonify({'success': False, 'workers': shards.workers, 'rebalance': results}), 502
+
+    # Les nouveaux workers ne possèdent encore rien : il suffit de basculer
+    shards.set_workers(workers)
+    return jsonify({'success': True, 'workers': workers, 'rebalance': results})
+
+@app.route('/', defaults={'path': ''}, methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'HEAD', 'OPTIONS'])
+@app.route('/<path:path>', methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH', 'HEAD', 'OPTIONS'])
+def proxy(path):
+    if not shards.workers:
+        return jsonify({'success': False, 'error': 'Aucun worker configuré'}), 503
+
+    body = request.get_data()
+    worker = target_worker()
+    try:
+        upstream = forward(worker, body)
+        # Salle transférée pendant un rééquilibrage : rejouer auprès du nouveau propriétaire
+        if upstream.status_code == 421 and upstream.headers.get('X-Shard-Owner'):
+            upstream.close()
+            upstream = forward(upstream.headers['X-Shard-Owner'], body)
+    except requests.RequestException as e:
+        logger.error("❌ Worker %s injoignable: %s", worker, e)
+        return jsonify({'success': False, 'error': 'Service temporairement indisponible'}), 502
+
+    headers = [
+        (name, value) for name, value in upstream.raw.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    ]
+    return Response(
+        relay(upstream),
+        status=upstream.status_code,
+        headers=headers,
+        direct_passthrough=True
+    )
@@ -0,0 +1,75 @@
+import os
+import hmac
+import hashlib
+import threading
+from typing import List, Optional
+
+# Mode réparti : chaque worker possède une partie des salles.
+# SHARD_WORKERS : URLs internes de tous les workers, séparées par des virgules
+# SHARD_SELF    : URL de ce worker (absente sur le routeur)
+# SHARD_TOKEN   : secret partagé des routes internes (import de salles, rééquilibrage),
+#                 obligatoire : sans lui ces routes sont refusées
+SHARD_WORKERS = os.environ.get('SHARD_WORKERS', '')
+SHARD_SELF = os.environ.get('SHARD_SELF', '')
+SHARD_TOKEN = os.environ.get('SHARD_TOKEN', '')
+
+def token_valid(token: Optional[str]) -> bool:
+    """Secret des routes internes : toujours refusé si SHARD_TOKEN n'est pas configuré"""
+    return bool(SHARD_TOKEN) and hmac.compare_digest((token or '').encode('utf-8'), SHARD_TOKEN.encode('utf-8'))
+
+def _score(worker: str, room_id: str) -> int:
+    """Poids d'un couple (worker, salle) pour le hachage par rendez-vous"""
+    digest = hashlib.blake2b(f"{worker}|{room_id}".encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+class ShardMap:
+    """
+    Attribution des salles aux workers par hachage « rendez-vous » (HRW) :
+    le propriétaire d'une salle est le worker de plus fort poids pour son
+    identifiant. Le routeur et les workers calculent la même réponse sans
+    rien partager ; l'ajout d'un worker ne déplace que les salles qui lui
+    reviennent (environ 1/n).
+    """
+
+    def __init__(self, workers: List[str] = None, self_url: str = None):
+        if workers is None:
+            workers = [w.strip().rstrip('/') for w in SHARD_WORKERS.split(',') if w.strip()]
+        self.workers = list(workers)
+        self.self_url = (self_url if self_url is not None else SHARD_SELF).rstrip('/')
+        self.lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.workers) > 1
+
+    @property
+    def configured(self) -> bool:
+        """Worker adressable par le routeur : routes internes ouvertes même avec un seul worker"""
+        return bool(self.self_url) and bool(SHARD_TOKEN)
+
+    def owner(self, room_id: str, workers: List[str] = None) -> Optional[str]:
+        """Worker propriétaire d'une salle"""
+        workers = workers if workers is not None else self.workers
+        if not workers:
+            return None
+        return max(workers, key=lambda worker: _score(worker, room_id))
+
+    def is_local(self, room_id: str) -> bool:
+        """La salle appartient-elle à ce worker ?"""
+        return not self.enabled or self.owner(room_id) == self.self_url
+
+    def set_workers(self, workers: List[str]):
+        """Nouvelle liste de workers (rééquilibrage)"""
+        with self.lock:
+            self.workers = [w.rstrip('/') for w in workers]
+
+    def get_stats(self) -> dict:
+        return {
+            'enabled': self.enabled,
+            'configured': self.configured,
+            'self': self.self_url,
+            'workers': list(self.workers)
+        }
+
+# Instance globale
+shard_map = ShardMap()
@@ -0,0 +1,66 @@
+import threading
+from typing import Callable, Dict, Hashable, Tuple
+
+class _Call:
+    """Appel en cours partagé par tous les demandeurs d'une même clé"""
+    __slots__ = ('done', 'value', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+class SingleFlight:
+    """
+    Regroupe les appels identiques simultanés : le premier demandeur
+    exécute la fonction, les suivants attendent et reçoivent le même
+    résultat (ou la même exception). Rien n'est conservé après l'appel :
+    c'est le rôle du cache.
+    """
+
+    def __init__(self, wait_timeout: float = 30):
+        # Au-delà, un demandeur en attente exécute l'appel lui-même
+        self.wait_timeout = wait_timeout
+        self.calls: Dict[Hashable, _Call] = {}
+        self.lock = threading.Lock()
+        self.stats = {'calls': 0, 'coalesced': 0, 'shared_errors': 0, 'wait_timeouts': 0}
+
+    def do(self, key: Hashable, fn: Callable) -> Tuple[object, bool]:
+        """
+        Exécute fn() une seule fois pour tous les demandeurs simultanés de `key`
+        Returns: (résultat, partagé) — partagé vaut True pour les demandeurs regroupés
+        """
+        with self.lock:
+            call = self.calls.get(key)
+            if call is None:
+                call = self.calls[key] = _Call()
+                leader = True
+                self.stats['calls'] += 1
+            else:
+                call.waiters += 1
+                leader = False
+                self.stats['coalesced'] += 1
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                self.stats['wait_timeouts'] += 1
+                return fn(), False
+            if call.error is not None:
+                self.stats['shared_errors'] += 1
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self.lock:
+                self.calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+    def get_stats(self) -> dict:
+        return {'in_flight': len(self.calls), **self.stats}
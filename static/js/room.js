@@ -0,0 +1,937 @@
+// 🧠 GESTIONNAIRE INTELLIGENT PRINCIPAL (WEB SPEECH + AZURE)
+class VoiceManager {
+    constructor(options = {}) {
+        this.roomId = options.roomId;
+        this.userId = options.userId;
+        this.language = options.language || 'fr';
+        this.isHost = options.isHost || false;
+
+        this.onResult = options.onResult || (() => {});
+        this.onError = options.onError || (() => {});
+        this.onStatusChange = options.onStatusChange || (() => {});
+
+        this.speechRecognition = null;
+        this.currentMethod = null;
+        this.isListening = false;
+        this.recordingTimer = null;
+        this.recordingStartTime = null;
+
+        this.browserInfo = this.detectBrowser();
+        this.azureAvailable = false;
+    }
+
+    detectBrowser() {
+        const ua = navigator.userAgent;
+        const isIOS = /iPad|iPhone|iPod/.test(ua);
+        const isSafari = ua.includes('Safari') && !ua.includes('Chrome') && !ua.includes('Edge');
+
+        let browser = { name: 'unknown', compatibility: 'unknown', method: 'text' };
+
+        // iPhone/iPad → Toujours mode texte (limitations Apple)
+        if (isIOS) {
+            browser = { 
+                name: 'iOS Safari', 
+                compatibility: 'poor', 
+                method: 'text',
+                description: 'Mode Texte (Limitation iOS)',
+                limitation: 'Apple bloque Web Speech et MediaRecorder pose problème'
+            };
+        }
+        // Chrome Desktop/Android → Web Speech optimal
+        else if (ua.includes('Chrome') && !ua.includes('Edge') && !ua.includes('Brave')) {
+            browser = { 
+                name: 'Chrome', 
+                compatibility: 'excellent', 
+                method: 'webspeech',
+                description: 'Web Speech API (Optimal)' 
+            };
+        }
+        // Edge Chromium → Web Speech optimal
+        else if (ua.includes('Edge')) {
+            browser = { 
+                name: 'Edge', 
+                compatibility: 'excellent', 
+                method: 'webspeech',
+                description: 'Web Speech API (Optimal)' 
+            };
+        }
+        // Opera (Chromium) → Web Speech
+        else if (ua.includes('Opera') || ua.includes('OPR')) {
+            browser = { 
+                name: 'Opera', 
+                compatibility: 'good', 
+                method: 'webspeech',
+                description: 'Web Speech API (Chromium)' 
+            };
+        }
+        // Brave → Web Speech puis Azure fallback
+        else if (ua.includes('Brave')) {
+            browser = { 
+                name: 'Brave', 
+                compatibility: 'limited', 
+                method: 'webspeech',
+                description: 'Web Speech + Azure Fallback' 
+            };
+        }
+        // Firefox → Azure direct (pas de Web Speech)
+        else if (ua.includes('Firefox')) {
+            browser = { 
+                name: 'Firefox', 
+                compatibility: 'limited', 
+                method: 'azure',
+                description: 'Azure Speech (Fallback)' 
+            };
+        }
+        // Safari Desktop → Mode texte (bugs Web Speech)
+        else if (isSafari) {
+            browser = { 
+                name: 'Safari', 
+                compatibility: 'poor', 
+                method: 'text',
+                description: 'Mode Texte (Bugs Safari)',
+                limitation: 'Web Speech API buggée sur Safari'
+            };
+        }
+        // Samsung Internet et autres
+        else if (ua.includes('Samsung')) {
+            browser = { 
+                name: 'Samsung Internet', 
+                compatibility: 'limited', 
+                method: 'azure',
+                description: 'Azure Speech (Mobile)' 
+            };
+        }
+        // Navigateurs inconnus → Azure puis texte
+        else {
+            browser = { 
+                name: 'Navigateur inconnu', 
+                compatibility: 'unknown', 
+                method: 'azure',
+                description: 'Azure Speech (Tentative)' 
+            };
+        }
+
+        return browser;
+    }
+
+    async checkAzureAvailability() {
+        try {
+            const response = await fetch('/api/speech-status');
+            if (response.ok) {
+                const data = await response.json();
+                this.azureAvailable = data.available;
+                return data.available;
+            }
+        } catch (error) {
+            console.log('Azure non disponible:', error);
+        }
+        return false;
+    }
+
+    async selectBestMethod() {
+        // Vérifier Azure d'abord
+        await this.checkAzureAvailability();
+
+        // iOS → Toujours mode texte (limitations Apple)
+        if (this.browserInfo.method === 'text' && this.browserInfo.limitation) {
+            return 'text';
+        }
+
+        // Logique de sélection intelligente selon navigateur
+        switch (this.browserInfo.method) {
+            case 'webspeech':
+                // Chrome/Edge/Opera → Priorité Web Speech
+                if (this.isWebSpeechSupported()) {
+                    return 'webspeech';
+                } else if (this.azureAvailable) {
+                    return 'azure';
+                }
+                break;
+
+            case 'azure':
+                // Firefox/Samsung → Priorité Azure
+                if (this.azureAvailable) {
+                    return 'azure';
+                } else if (this.isWebSpeechSupported()) {
+                    return 'webspeech';
+                }
+                break;
+
+            case 'text':
+            default:
+                // Safari/iOS → Mode texte obligatoire
+                return 'text';
+        }
+
+        // Fallback final
+        return 'text';
+    }
+
+    isWebSpeechSupported() {
+        return 'webkitSpeechRecognition' in window || 'SpeechRecognition' in window;
+    }
+
+    async initialize() {
+        const method = await this.selectBestMethod();
+        this.currentMethod = method;
+
+        try {
+            switch (method) {
+                case 'webspeech':
+                    this.initializeWebSpeech();
+                    break;
+                case 'azure':
+                    // Azure ne nécessite pas d'initialisation côté client
+                    break;
+                default:
+                    this.onStatusChange('text', 'Mode texte activé');
+                    break;
+            }
+            return method;
+        } catch (error) {
+            console.error('Erreur initialisation:', error);
+            this.currentMethod = 'text';
+            this.onStatusChange('text', 'Mode texte activé (erreur init)');
+            return 'text';
+        }
+    }
+
+    initializeWebSpeech() {
+        const SpeechRecognition = window.SpeechRecognition || window.webkitSpeechRecognition;
+
+        this.speechRecognition = new SpeechRecognition();
+        this.speechRecognition.lang = this.language === 'fr' ? 'fr-FR' : `${this.language}-${this.language.toUpperCase()}`;
+        this.speechRecognition.continuous = false;
+        this.speechRecognition.interimResults = false;
+        this.speechRecognition.maxAlternatives = 1;
+
+        this.speechRecognition.onstart = () => {
+            this.onStatusChange('recording', 'Écoute en cours...');
+        };
+
+        this.speechRecognition.onresult = (event) => {
+            const lastResult = event.results[event.results.length - 1];
+            const transcript = lastResult[0].transcript.trim();
+            const confidence = lastResult[0].confidence || 0.9;
+
+            if (transcript) {
+                this.onResult({ 
+                    text: transcript, 
+                    confidence: confidence,
+                    service: 'webspeech'
+                });
+                this.onStatusChange('success', 'Reconnaissance réussie');
+            }
+        };
+
+        this.speechRecognition.onerror = (event) => {
+            let errorMsg = 'Erreur Web Speech: ';
+            switch (event.error) {
+                case 'network':
+                    errorMsg += 'Problème réseau - basculement vers Azure';
+                    this.fallbackToAzure();
+                    break;
+                case 'not-allowed':
+                    errorMsg += 'Microphone non autorisé';
+                    break;
+                case 'no-speech':
+                    errorMsg += 'Aucune parole détectée';
+                    break;
+                default:
+                    errorMsg += event.error;
+            }
+            this.onError(errorMsg);
+        };
+
+        this.speechRecognition.onend = () => {
+            this.isListening = false;
+            this.stopRecordingTimer();
+        };
+    }
+
+    async fallbackToAzure() {
+        if (this.azureAvailable) {
+            this.currentMethod = 'azure';
+            this.onStatusChange('info', 'Basculement vers Azure Speech...');
+        } else {
+            this.currentMethod = 'text';
+            this.onStatusChange('text', 'Mode texte activé');
+        }
+    }
+
+    async startListening() {
+        if (this.isListening) return;
+
+        this.isListening = true;
+
+        switch (this.currentMethod) {
+            case 'webspeech':
+                if (this.speechRecognition) {
+                    try {
+                        this.speechRecognition.start();
+                        this.startRecordingTimer();
+                    } catch (error) {
+                        this.onError('Erreur Web Speech: ' + error.message);
+                        this.isListening = false;
+                    }
+                }
+                break;
+
+            case 'azure':
+                await this.startAzureRecording();
+                break;
+
+            default:
+                this.onStatusChange('text', 'Utilisez le mode texte');
+                this.isListening = false;
+                break;
+        }
+    }
+
+    async startAzureRecording() {
+        try {
+            this.onStatusChange('recording', 'Enregistrement pour Azure...');
+            this.startRecordingTimer();
+
+            // Obtenir l'accès au microphone
+            const stream = await navigator.mediaDevices.getUserMedia({
+                audio: {
+                    channelCount: 1,
+                    sampleRate: 16000,
+                    echoCancellation: true,
+                    noiseSuppression: true
+                }
+            });
+
+            // Configuration MediaRecorder
+            const options = {
+                mimeType: this.getSupportedMimeType(),
+                audioBitsPerSecond: 128000
+            };
+
+            this.mediaRecorder = new MediaRecorder(stream, options);
+            this.audioChunks = [];
+
+            this.mediaRecorder.ondataavailable = (event) => {
+                if (event.data.size > 0) {
+                    this.audioChunks.push(event.data);
+                }
+            };
+
+            this.mediaRecorder.onstop = () => {
+                this.processAzureRecording();
+                stream.getTracks().forEach(track => track.stop());
+            };
+
+            this.mediaRecorder.start(1000);
+
+            // Auto-stop après 30 secondes
+            setTimeout(() => {
+                if (this.isListening && this.mediaRecorder.state === 'recording') {
+                    this.stopListening();
+                }
+            }, 30000);
+
+        } catch (error) {
+            this.onError('Erreur Azure: ' + error.message);
+            this.isListening = false;
+            this.stopRecordingTimer();
+        }
+    }
+
+    getSupportedMimeType() {
+        const types = [
+            'audio/webm;codecs=opus',
+            'audio/webm',
+            'audio/ogg;codecs=opus',
+            'audio/mp4',
+            'audio/wav'
+        ];
+
+        for (const type of types) {
+            if (MediaRecorder.isTypeSupported(type)) {
+                return type;
+            }
+        }
+        return 'audio/wav';
+    }
+
+    async processAzureRecording() {
+        if (!this.audioChunks || this.audioChunks.length === 0) {
+            this.onError('Aucune donnée audio enregistrée');
+            return;
+        }
+
+        try {
+            this.onStatusChange('processing', 'Envoi vers Azure...');
+
+            const audioBlob = new Blob(this.audioChunks, { 
+                type: this.getSupportedMimeType() 
+            });
+
+            const formData = new FormData();
+            formData.append('audio', audioBlob, 'recording.wav');
+            formData.append('language', this.language);
+            formData.append('room_id', this.roomId);
+            formData.append('user_id', this.userId);
+
+            const response = await fetch('/api/transcribe-audio', {
+                method: 'POST',
+                body: formData
+            });
+
+            if (!response.ok) {
+                throw new Error(`Erreur serveur: ${response.status}`);
+            }
+
+            const data = await response.json();
+
+            if (data.success && data.text) {
+                this.onResult({
+                    text: data.text,
+                    confidence: data.confidence || 0.9,
+                    service: 'azure'
+                });
+                this.onStatusChange('success', 'Transcription Azure réussie');
+            } else {
+                throw new Error(data.error || 'Aucun texte détecté');
+            }
+
+        } catch (error) {
+            this.onError('Erreur Azure: ' + error.message);
+        }
+    }
+
+    stopListening() {
+        if (!this.isListening) return;
+
+        this.isListening = false;
+        this.stopRecordingTimer();
+
+        switch (this.currentMethod) {
+            case 'webspeech':
+                if (this.speechRecognition) {
+                    this.speechRecognition.stop();
+                }
+                break;
+
+            case 'azure':
+                if (this.mediaRecorder && this.mediaRecorder.state === 'recording') {
+                    this.mediaRecorder.stop();
+                }
+                break;
+        }
+    }
+
+    startRecordingTimer() {
+        this.recordingStartTime = Date.now();
+        const timerEl = document.getElementById('recording-timer');
+        let seconds = 0;
+
+        this.recordingTimer = setInterval(() => {
+            seconds++;
+            if (timerEl) {
+                timerEl.textContent = `${seconds}s`;
+            }
+        }, 1000);
+    }
+
+    stopRecordingTimer() {
+        if (this.recordingTimer) {
+            clearInterval(this.recordingTimer);
+            this.recordingTimer = null;
+        }
+
+        const timerEl = document.getElementById('recording-timer');
+        if (timerEl) {
+            timerEl.textContent = '0s';
+        }
+    }
+
+    cleanup() {
+        this.stopRecordingTimer();
+
+        if (this.speechRecognition) {
+            this.speechRecognition = null;
+        }
+
+        if (this.mediaRecorder) {
+            this.mediaRecorder = null;
+        }
+
+        this.isListening = false;
+    }
+
+    getStatus() {
+        return {
+            method: this.currentMethod,
+            isListening: this.isListening,
+            browser: this.browserInfo,
+            azureAvailable: this.azureAvailable
+        };
+    }
+}
+
+// 🚀 INTÉGRATION DANS L'INTERFACE
+let voiceManager;
+let userData = { 
+    room_id: document.body.dataset.roomId, 
+    user_id: sessionStorage.getItem('userId') || 'demo', 
+    language: sessionStorage.getItem('userLang') || 'fr',
+    nickname: sessionStorage.getItem('userNickname') || 'Utilisateur'
+};
+let updateInterval;
+let updatesActive = false;
+let isHost = false;
+
+// Éléments DOM
+const statusEl = document.getElementById('status');
+const micButton = document.getElementById('mic-button');
+const textModeButton = document.getElementById('text-mode-button');
+const waveAnimation = document.getElementById('wave-animation');
+const textInputFallback = document.getElementById('text-input-fallback');
+const originalTextEl = document.getElementById('original-text');
+const translatedTextEl = document.getElementById('translated-text');
+const confidenceDisplay = document.getElementById('confidence-display');
+const voiceMethodEl = document.getElementById('voice-method');
+const errorNotification = document.getElementById('error-notification');
+const errorMessage = document.getElementById('error-message');
+const browserInfoEl = document.getElementById('browser-info');
+const userNicknameEl = document.getElementById('user-nickname');
+const qrSection = document.getElementById('qr-section');
+const qrCodeImage = document.getElementById('qr-code-image');
+
+// Initialisation
+document.addEventListener('DOMContentLoaded', async function() {
+    await initializeVoiceSystem();
+    startRealTimeUpdates();
+    updateUserDisplay();
+    loadRoomInfo();
+});
+
+async function initializeVoiceSystem() {
+    voiceManager = new VoiceManager({
+        roomId: userData.room_id,
+        userId: userData.user_id,
+        language: userData.language,
+        isHost: true, // À adapter selon votre logique
+        onResult: handleVoiceResult,
+        onError: handleVoiceError,
+        onStatusChange: handleStatusChange
+    });
+
+    try {
+        const method = await voiceManager.initialize();
+        updateMethodDisplay(method);
+        updateBrowserInfo();
+
+        // Messages d'initialisation selon la méthode
+        switch (method) {
+            case 'text':
+                showTextInput();
+                updateStatus('💬 Mode texte activé', 'info');
+                break;
+
+            case 'azure':
+                micButton.disabled = false;
+                micButton.textContent = '🎤 Parler (Azure)';
+                updateStatus('☁️ Azure Speech prêt', 'connected');
+                break;
+
+            case 'webspeech':
+                micButton.disabled = false;
+                micButton.textContent = '🎤 Parler';
+                updateStatus('✅ Web Speech prêt', 'connected');
+                break;
+
+            default:
+                showTextInput();
+                updateStatus('💬 Mode texte par défaut', 'info');
+        }
+
+    } catch (error) {
+        console.error('Erreur init système vocal:', error);
+        showTextInput();
+        updateStatus('💬 Mode texte (erreur init)', 'error');
+        showErrorNotification('Erreur d\'initialisation: ' + error.message);
+    }
+}
+
+function loadRoomInfo() {
+    fetch(`/api/room/${userData.room_id}/info?user_id=${userData.user_id}`)
+        .then(response => {
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            return response.json();
+        })
+        .then(data => {
+            if (data.success) {
+                // Vérifier si l'utilisateur est l'hôte
+                const currentUser = data.room.users.find(u => u.user_id === userData.user_id);
+                if (currentUser) {
+                    isHost = currentUser.is_host;
+
+                    // Afficher le QR code si l'utilisateur est l'hôte
+                    if (isHost) {
+                        qrSection.classList.add('show');
+                        updateQRCode();
+                    } else if (data.room.room_type === 'lecture') {
+                        showListenerMode();
+                    }
+                }
+            }
+        })
+        .catch(error => {
+            console.error('Erreur lors du chargement des infos de salle:', error);
+        });
+}
+
+function showListenerMode() {
+    // Conférence : seul l'hôte parle, les auditeurs n'ont ni micro ni saisie
+    micButton.disabled = true;
+    hideTextInput();
+    document.getElementById('controls').style.display = 'none';
+    updateStatus('🎧 Conférence : mode auditeur', 'info');
+}
+
+function updateQRCode() {
+    // QR code mène directement à la salle pour rejoindre automatiquement
+    const roomUrl = `${window.location.origin}/room/${userData.room_id}?auto_join=true`;
+    qrCodeImage.src = `/qrcode?url=${encodeURIComponent(roomUrl)}&format=svg`;
+    document.getElementById('qr-room-code').textContent = userData.room_id;
+}
+
+function updateMethodDisplay(method) {
+    const methodNames = {
+        'webspeech': 'Web Speech API',
+        'azure': 'Azure Speech',
+        'text': 'Mode Texte'
+    };
+
+    const methodClasses = {
+        'webspeech': 'method-webspeech',
+        'azure': 'method-azure',  
+        'text': 'method-text'
+    };
+
+    voiceMethodEl.textContent = methodNames[method] || method;
+    voiceMethodEl.className = `voice-method-indicator ${methodClasses[method] || ''}`;
+}
+
+function updateBrowserInfo() {
+    const info = voiceManager.browserInfo;
+    let infoText = `${info.name} - ${info.description}`;
+
+    // Ajouter des avertissements spécifiques
+    if (info.limitation) {
+        infoText += ` ⚠️`;
+        showBrowserLimitation(info.limitation);
+    }
+
+    browserInfoEl.textContent = infoText;
+}
+
+function showBrowserLimitation(limitation) {
+    // Afficher une notification discrète sur les limitations
+    const limitationDiv = document.createElement('div');
+    limitationDiv.style.cssText = `
+        background: rgba(255, 193, 7, 0.8);
+        color: #333;
+        padding: 10px;
+        border-radius: 8px;
+        margin: 10px 0;
+        font-size: 14px;
+        text-align: center;
+    `;
+    limitationDiv.textContent = `ℹ️ ${limitation}`;
+
+    // L'insérer temporairement
+    const controls = document.getElementById('controls');
+    controls.insertBefore(limitationDiv, controls.firstChild);
+
+    // Retirer après 10 secondes
+    setTimeout(() => {
+        if (limitationDiv.parentNode) {
+            limitationDiv.remove();
+        }
+    }, 10000);
+}
+
+function updateUserDisplay() {
+    userNicknameEl.textContent = userData.nickname;
+}
+
+function handleVoiceResult(result) {
+    console.log('Résultat vocal:', result);
+
+    // Afficher le texte original avec animation
+    originalTextEl.classList.add('updating');
+    originalTextEl.textContent = result.text;
+    originalTextEl.classList.remove('empty-translation');
+
+    setTimeout(() => {
+        originalTextEl.classList.remove('updating');
+    }, 300);
+
+    // Afficher la confiance et le service
+    if (result.confidence && result.confidence < 1) {
+        confidenceDisplay.textContent = `Confiance: ${Math.round(result.confidence * 100)}% (${result.service})`;
+        confidenceDisplay.style.display = 'block';
+    } else {
+        confidenceDisplay.style.display = 'none';
+    }
+
+    // Envoyer à votre API de traduction
+    sendForTranslation(result.text);
+}
+
+function handleVoiceError(error) {
+    console.error('Erreur vocale:', error);
+    showErrorNotification(error);
+
+    // Auto-basculement vers mode texte après erreurs critiques
+    if (error.includes('Microphone non autorisé') || error.includes('Safari')) {
+        setTimeout(() => {
+            showTextInput();
+        }, 2000);
+    }
+}
+
+function handleStatusChange(status, message) {
+    updateStatus(message, status);
+    updateButtonState(status);
+}
+
+function updateStatus(message, className) {
+    statusEl.textContent = message;
+    statusEl.className = `status ${className}`;
+}
+
+function updateButtonState(status) {
+    micButton.classList.remove('recording', 'processing');
+    waveAnimation.classList.remove('active');
+
+    switch (status) {
+        case 'recording':
+            micButton.classList.add('recording');
+            micButton.textContent = '🛑 Arrêter';
+            waveAnimation.classList.add('active');
+            break;
+        case 'processing':
+        case 'uploading':
+            micButton.classList.add('processing');
+            micButton.textContent = '⏳ Traitement...';
+            micButton.disabled = true;
+            break;
+        case 'success':
+        case 'connected':
+        case 'info':
+        default:
+            micButton.textContent = '🎤 Parler';
+            micButton.disabled = false;
+            break;
+    }
+}
+
+function showErrorNotification(message) {
+    errorMessage.textContent = message;
+    errorNotification.classList.add('show');
+
+    setTimeout(() => {
+        errorNotification.classList.remove('show');
+    }, 5000);
+}
+
+async function sendForTranslation(text) {
+    try {
+        updateStatus('📤 Envoi de la traduction...', 'info');
+
+        const response = await fetch(`/api/room/${userData.room_id}/translate`, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                user_id: userData.user_id,
+                text: text,
+                source_language: userData.language
+            })
+        });
+
+        if (response.ok) {
+            const data = await response.json();
+            if (data.success) {
+                updateStatus('✅ Message envoyé', 'connected');
+            } else {
+                throw new Error(data.error);
+            }
+        } else {
+            throw new Error('Erreur serveur de traduction');
+        }
+
+    } catch (error) {
+        updateStatus('❌ Erreur de traduction', 'error');
+        showErrorNotification('Erreur lors de l\'envoi: ' + error.message);
+    }
+}
+
+// Event listeners
+micButton.addEventListener('click', function() {
+    if (voiceManager.isListening) {
+        voiceManager.stopListening();
+    } else {
+        voiceManager.startListening();
+    }
+});
+
+textModeButton.addEventListener('click', showTextInput);
+
+function showTextInput() {
+    textInputFallback.classList.add('show');
+    document.getElementById('text-input').focus();
+}
+
+function hideTextInput() {
+    textInputFallback.classList.remove('show');
+}
+
+// ✍️ Pré-traduction du brouillon : envoyé après une pause de saisie,
+// l'envoi final est alors servi par le cache du serveur
+const DRAFT_DEBOUNCE_MS = 700;
+const DRAFT_MIN_LENGTH = 4;
+let draftTimer = null;
+let lastDraft = '';
+
+function sendDraft() {
+    const text = document.getElementById('text-input').value.trim();
+    if (text.length < DRAFT_MIN_LENGTH || text === lastDraft) return;
+    lastDraft = text;
+
+    fetch(`/api/room/${userData.room_id}/draft`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            user_id: userData.user_id,
+            text: text,
+            source_language: userData.language
+        })
+    }).catch(err => console.log('Brouillon non envoyé:', err));
+}
+
+document.getElementById('text-input').addEventListener('input', function() {
+    clearTimeout(draftTimer);
+    draftTimer = setTimeout(sendDraft, DRAFT_DEBOUNCE_MS);
+});
+
+function sendText() {
+    clearTimeout(draftTimer);
+    const text = document.getElementById('text-input').value.trim();
+    if (text) {
+        handleVoiceResult({ text: text, confidence: 1, service: 'manual' });
+        document.getElementById('text-input').value = '';
+        hideTextInput();
+    }
+}
+
+function tryVoiceAgain() {
+    hideTextInput();
+    initializeVoiceSystem();
+}
+
+function leaveRoom() {
+    if (confirm('Quitter la salle ?')) {
+        if (voiceManager) voiceManager.cleanup();
+        updatesActive = false;
+        if (updateInterval) clearTimeout(updateInterval);
+        window.location.href = '/rooms';
+    }
+}
+
+function startRealTimeUpdates() {
+    // Long-poll : le serveur répond dès qu'un nouveau message est diffusé
+    updatesActive = true;
+    pollUpdates(null);
+}
+
+async function pollUpdates(lastSeq) {
+    if (!updatesActive) return;
+
+    let nextSeq = lastSeq;
+    let delay = 0;
+    try {
+        let url = `/api/room/${userData.room_id}/updates?user_id=${userData.user_id}`;
+        if (lastSeq !== null) {
+            url += `&since=${lastSeq}&wait=25`;
+        }
+        const response = await fetch(url);
+        if (response.ok) {
+            // Serveur saturé en attentes : il a répondu sans attendre, espacer le prochain appel
+            delay = Number(response.headers.get('Retry-After') || 0) * 1000;
+            const data = await response.json();
+            if (data.success) {
+                nextSeq = data.seq;
+            }
+            if (data.success && data.seq !== lastSeq && data.translated) {
+                // Afficher la nouvelle traduction
+                translatedTextEl.classList.add('updating');
+                translatedTextEl.textContent = data.translated;
+                translatedTextEl.classList.remove('empty-translation');
+
+                setTimeout(() => {
+                    translatedTextEl.classList.remove('updating');
+                }, 300);
+
+                // Synthèse vocale si activée (uniquement pour les nouveaux messages)
+                if (lastSeq !== null && data.enable_speech && data.translated) {
+                    speakText(data.translated);
+                }
+            }
+        } else {
+            delay = 2000;
+        }
+    } catch (error) {
+        console.log('Erreur mise à jour:', error);
+        delay = 2000;
+    }
+
+    updateInterval = setTimeout(() => pollUpdates(nextSeq), delay);
+}
+
+function speakText(text) {
+    try {
+        if ('speechSynthesis' in window) {
+            const utterance = new SpeechSynthesisUtterance(text);
+            utterance.lang = userData.language === 'fr' ? 'fr-FR' : `${userData.language}-${userData.language.toUpperCase()}`;
+            utterance.rate = 0.9;
+            utterance.pitch = 1;
+            speechSynthesis.speak(utterance);
+        }
+    } catch (error) {
+        console.log('Erreur synthèse vocale:', error);
+    }
+}
+
+// Gestion Entrée pour envoyer
+document.addEventListener('keydown', function(e) {
+    if (e.key === 'Enter' && !e.shiftKey) {
+        if (document.getElementById('text-input') === document.activeElement) {
+            e.preventDefault();
+            sendText();
+        }
+    }
+});
+
+// Nettoyage à la fermeture
+window.addEventListener('beforeunload', function() {
+    if (voiceManager) voiceManager.cleanup();
+    updatesActive = false;
+    if (updateInterval) clearTimeout(updateInterval);
+});
+
+// Heartbeat pour maintenir la session
+setInterval(() => {
+    fetch(`/api/room/${userData.room_id}/heartbeat`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ user_id: userData.user_id })
+    }).catch(err => console.log('Heartbeat error:', err));
+}, 10000);
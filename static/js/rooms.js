@@ -0,0 +1,171 @@
+// Gestion des onglets
+function showTab(tabName) {
+    // Cacher tous les contenus
+    document.querySelectorAll('.tab-content').forEach(content => {
+        content.classList.remove('active');
+    });
+
+    // Désactiver tous les onglets
+    document.querySelectorAll('.tab').forEach(tab => {
+        tab.classList.remove('active');
+    });
+
+    // Activer l'onglet et le contenu sélectionnés
+    document.getElementById(tabName + '-tab').classList.add('active');
+    event.target.classList.add('active');
+}
+
+// Fonction pour afficher le statut
+function showStatus(message, type) {
+    const status = document.getElementById('status');
+    status.textContent = message;
+    status.className = 'status ' + type;
+    status.style.display = 'block';
+
+    // Masquer après 5 secondes sauf pour les succès
+    if (type !== 'success') {
+        setTimeout(() => {
+            status.style.display = 'none';
+        }, 5000);
+    }
+}
+
+// Initialisation au chargement de la page
+document.addEventListener('DOMContentLoaded', function() {
+    // Vérifier s'il y a un paramètre join dans l'URL (depuis QR code)
+    const urlParams = new URLSearchParams(window.location.search);
+    const joinRoomId = urlParams.get('join');
+
+    if (joinRoomId) {
+        // Afficher la notice d'auto-join
+        document.getElementById('auto-join-notice').style.display = 'block';
+
+        // Pré-remplir le code de salle et basculer sur l'onglet "Rejoindre"
+        document.getElementById('join-room-id').value = joinRoomId;
+        showTab('join');
+
+        // Mettre l'onglet rejoindre comme actif
+        document.querySelectorAll('.tab').forEach(tab => tab.classList.remove('active'));
+        document.querySelector('.tab[onclick*="join"]').classList.add('active');
+
+        // Mettre le focus sur le champ pseudo
+        setTimeout(() => {
+            document.getElementById('join-nickname').focus();
+        }, 100);
+    }
+});
+
+// Création de salle
+document.getElementById('create-form').addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    const btn = document.getElementById('create-btn');
+    btn.disabled = true;
+    btn.textContent = 'Création en cours...';
+
+    const data = {
+        nickname: document.getElementById('create-nickname').value.trim(),
+        language: document.getElementById('create-language').value,
+        room_name: document.getElementById('room-name').value.trim(),
+        room_type: document.getElementById('room-type').value,
+        transcript: document.getElementById('room-transcript').checked,
+        password: document.getElementById('room-password').value.trim() || null
+    };
+
+    fetch('/api/create-room', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showStatus(`Salle créée ! Code : ${data.room_id}`, 'success');
+
+            // Sauvegarder les informations dans le localStorage
+            localStorage.setItem('tradlive_user', JSON.stringify({
+                user_id: data.user_id,
+                room_id: data.room_id,
+                nickname: document.getElementById('create-nickname').value,
+                language: document.getElementById('create-language').value
+            }));
+
+            // Rediriger vers la salle après 2 secondes
+            setTimeout(() => {
+                window.location.href = `/room/${data.room_id}`;
+            }, 2000);
+        } else {
+            showStatus(data.error, 'error');
+            btn.disabled = false;
+            btn.textContent = '🎉 Créer la salle';
+        }
+    })
+    .catch(error => {
+        console.error('Erreur:', error);
+        showStatus('Erreur de connexion au serveur', 'error');
+        btn.disabled = false;
+        btn.textContent = '🎉 Créer la salle';
+    });
+});
+
+// Rejoindre une salle
+document.getElementById('join-form').addEventListener('submit', function(e) {
+    e.preventDefault();
+
+    const btn = document.getElementById('join-btn');
+    btn.disabled = true;
+    btn.textContent = 'Connexion en cours...';
+
+    const data = {
+        room_id: document.getElementById('join-room-id').value.trim(),
+        nickname: document.getElementById('join-nickname').value.trim(),
+        language: document.getElementById('join-language').value,
+        password: document.getElementById('join-password').value.trim() || null
+    };
+
+    fetch('/api/join-room', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            showStatus('Connexion réussie !', 'success');
+
+            // Sauvegarder les informations dans le localStorage
+            localStorage.setItem('tradlive_user', JSON.stringify({
+                user_id: data.user_id,
+                room_id: data.room_id,
+                nickname: document.getElementById('join-nickname').value,
+                language: document.getElementById('join-language').value
+            }));
+
+            // Rediriger vers la salle après 1 seconde
+            setTimeout(() => {
+                window.location.href = `/room/${data.room_id}`;
+            }, 1000);
+        } else {
+            showStatus(data.error, 'error');
+            btn.disabled = false;
+            btn.textContent = '🚪 Rejoindre la salle';
+        }
+    })
+    .catch(error => {
+        console.error('Erreur:', error);
+        showStatus('Erreur de connexion au serveur', 'error');
+        btn.disabled = false;
+        btn.textContent = '🚪 Rejoindre la salle';
+    });
+});
+
+// Formater automatiquement le code de salle
+document.getElementById('join-room-id').addEventListener('input', function(e) {
+    let value = e.target.value.replace(/\D/g, ''); // Garder seulement les chiffres
+    if (value.length > 8) value = value.substring(0, 8);
+    e.target.value = value;
+});
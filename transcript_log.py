@@ -0,0 +1,149 @@
+import os
+import json
+import queue
+import struct
+import threading
+from typing import Iterator, Optional
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+# Dossier des transcriptions : <transcript_id>.jsonl (messages) et <transcript_id>.idx (positions)
+TRANSCRIPT_DIR = os.environ.get('TRANSCRIPT_DIR', 'transcripts')
+
+# Position d'un message dans le fichier .jsonl (entier non signé 64 bits)
+OFFSET_FORMAT = struct.Struct('<Q')
+
+class TranscriptLog:
+    """
+    Journal en ajout seul des messages de chaque salle (sur option).
+    Les messages sont mis en file par les requêtes puis écrits par lots sur
+    un thread dédié ; un index des positions permet de reprendre la lecture
+    à n'importe quel message sans parcourir le fichier.
+    """
+
+    def __init__(self, directory: str = TRANSCRIPT_DIR):
+        self.directory = directory
+        self.batch_size = int(os.environ.get('TRANSCRIPT_BATCH_SIZE', 100))
+        self.flush_interval = float(os.environ.get('TRANSCRIPT_FLUSH_INTERVAL', 1.0))
+        self.pending = queue.Queue()
+        self.wakeup = threading.Event()
+        self.write_lock = threading.Lock()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+
+    def paths(self, transcript_id: str):
+        """Chemins du journal et de son index"""
+        base = os.path.join(self.directory, os.path.basename(transcript_id))
+        return base + '.jsonl', base + '.idx'
+
+    def append(self, transcript_id: str, entry: dict):
+        """Ajoute un message (non bloquant : écrit plus tard par le thread d'écriture)"""
+        self.pending.put((transcript_id, entry))
+        if self.pending.qsize() >= self.batch_size:
+            self.wakeup.set()
+        self._ensure_writer()
+
+    def _ensure_writer(self):
+        if self.thread is not None:
+            return
+        with self.thread_lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._writer, name='transcript-writer')
+                self.thread.daemon = True
+                self.thread.start()
+
+    def _writer(self):
+        while True:
+            self.wakeup.wait(self.flush_interval)
+            self.wakeup.clear()
+            self.flush()
+
+    def flush(self):
+        """Écrit les messages en attente, par lots regroupés par salle"""
+        # Vider la file sous le verrou : l'ordre des messages est préservé
+        with self.write_lock:
+            while not self.pending.empty():
+                batch = []
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.pending.get_nowait())
+                    except queue.Empty:
+                        break
+
+                by_transcript = {}
+                for transcript_id, entry in batch:
+                    by_transcript.setdefault(transcript_id, []).append(entry)
+
+                os.makedirs(self.directory, exist_ok=True)
+                for transcript_id, entries in by_transcript.items():
+                    try:
+                        self._write_entries(transcript_id, entries)
+                    except Exception as e:
+                        logger.error("❌ Erreur écriture transcription %s: %s", transcript_id, e)
+
+    def _write_entries(self, transcript_id: str, entries):
+        log_path, index_path = self.paths(transcript_id)
+        with open(log_path, 'ab') as log_file, open(index_path, 'ab') as index_file:
+            offset = log_file.tell()
+            offsets = []
+            chunks = []
+            for entry in entries:
+                line = json.dumps(entry, ensure_ascii=False, separators=(',', ':')).encode('utf-8') + b'\n'
+                offsets.append(OFFSET_FORMAT.pack(offset))
+                chunks.append(line)
+                offset += len(line)
+            log_file.write(b''.join(chunks))
+            index_file.write(b''.join(offsets))
+
+    def count(self, transcript_id: str) -> int:
+        """Nombre de messages écrits"""
+        _, index_path = self.paths(transcript_id)
+        if not os.path.exists(index_path):
+            return 0
+        return os.path.getsize(index_path) // OFFSET_FORMAT.size
+
+    def _start_offset(self, transcript_id: str, start: int) -> Optional[int]:
+        """Position du message `start` lue dans l'index (None si au-delà de la fin)"""
+        _, index_path = self.paths(transcript_id)
+        if start <= 0:
+            return 0
+        with open(index_path, 'rb') as index_file:
+            index_file.seek(start * OFFSET_FORMAT.size)
+            data = index_file.read(OFFSET_FORMAT.size)
+        if len(data) < OFFSET_FORMAT.size:
+            return None
+        return OFFSET_FORMAT.unpack(data)[0]
+
+    def iter_entries(self, transcript_id: str, start: int = 0) -> Iterator[dict]:
+        """Parcourt les messages un par un à partir du n-ième (lecture en flux)"""
+        # Inclure les messages encore en file
+        self.flush()
+
+        log_path, _ = self.paths(transcript_id)
+        if not os.path.exists(log_path):
+            return
+
+        # Ne lire que les lots complets déjà écrits
+        with self.write_lock:
+            end = os.path.getsize(log_path)
+
+        offset = self._start_offset(transcript_id, start)
+        if offset is None:
+            return
+
+        with open(log_path, 'rb') as log_file:
+            log_file.seek(offset)
+            position = offset
+            for line in log_file:
+                if position >= end:
+                    break
+                position += len(line)
+                yield json.loads(line)
+
+    def close(self):
+        """Écrit tout ce qui reste (arrêt du serveur)"""
+        self.flush()
+
+# Instance globale
+transcript_log = TranscriptLog()
@@ -1,7 +1,33 @@
 import os
 import json
+import time
+import threading
+from collections import Counter
 from datetime import datetime
-from deep_translator import GoogleTranslator, MyMemoryTranslator
+from correction_engine import CorrectionEngine
+from single_flight import SingleFlight
+from phrase_table import phrase_tables
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+class LanguagePair:
+    """
+    Langues d'une traduction, résolues une fois par paire : codes Google et
+    MyMemory ('auto' remplacé par la langue préférée). Immuable, partagée
+    sans verrou entre les requêtes.
+    """
+    __slots__ = ('source', 'target', 'preferred', 'mymemory_source', 'mymemory_target', 'key')
+
+    def __init__(self, source: str, target: str, preferred: str, mymemory_source: str, mymemory_target: str):
+        self.source = source
+        self.target = target
+        self.preferred = preferred  # None sans 'auto'
+        self.mymemory_source = mymemory_source
+        self.mymemory_target = mymemory_target
+        # Partie « langues » des clés de cache et de regroupement : avec 'auto', la
+        # langue préférée change le résultat, deux requêtes ne doivent pas le partager
+        self.key = f"{source}|{target}" if preferred is None else f"{source}|{target}|{preferred}"
 
 class TranslationManager:
     def __init__(self):
@@ -13,11 +39,22 @@ class TranslationManager:
         
         # Cache des traductions récentes (pour accélérer)
         self.translation_cache = {}
-        self.max_cache_size = 100
+        self.max_cache_size = int(os.environ.get('TRANSLATION_CACHE_SIZE', 2000))
+        self.cache_lock = threading.Lock()
         
-        # Langue préférée à utiliser quand 'auto' est spécifié avec MyMemory
+        # Fréquence des demandes (texte, source, cible), conservée d'une exécution
+        # à l'autre pour préchauffer le cache au démarrage
+        self.request_counts = Counter()
+        self.max_tracked_requests = 5000
+        
+        # Langue préférée par défaut quand 'auto' est spécifié avec MyMemory
+        # (réglage global : une requête peut fournir la sienne, voir language_pair)
         self.preferred_lang = 'en'  # Anglais par défaut
         
+        # Paires de langues résolues : {(source, cible, langue préférée): LanguagePair}.
+        # Seules les langues connues (mymemory_lang_map) y sont gardées : taille bornée
+        self.pairs = {}
+        
         # Dictionnaire de mappage pour MyMemory (codes spécifiques pour toutes les langues de l'application)
         self.mymemory_lang_map = {
             # Langues qui ne suivent pas le modèle standard XX-XX ou qui nécessitent une variante spécifique
@@ -39,14 +76,58 @@ class TranslationManager:
             'fr': 'fr-FR'      # Français - France
         }
         
-        # Initialiser les compteurs
-        self.init_counters()
+        # Corrections post-traduction, compilées une fois par langue cible
+        self.corrections = CorrectionEngine()
+        
+        # Niveau local (tables de phrases), consulté avant les services en ligne
+        self.phrases = phrase_tables
+        
+        # Traductions en cours : les demandes identiques simultanées sont regroupées
+        self.in_flight = SingleFlight(float(os.environ.get('TRANSLATION_COALESCE_TIMEOUT', 30)))
+        
+        # Compteurs chargés au premier besoin (pas d'I/O à l'import)
+        self.counters = None
+        self.counters_lock = threading.Lock()
+        self.request_counts_lock = threading.Lock()
     
     def set_preferred_language(self, lang):
-        """Définit la langue préférée à utiliser lorsque 'auto' est spécifié avec MyMemory"""
+        """
+        Définit la langue préférée par défaut lorsque 'auto' est spécifié avec MyMemory
+        (réglage, jamais appelé pendant une traduction)
+        """
         if lang != 'auto':
             self.preferred_lang = lang
-        print(f"Langue préférée définie sur: {self.preferred_lang}")
+        logger.debug("Langue préférée définie sur: %s", self.preferred_lang)
+    
+    def language_pair(self, source_lang, target_lang, preferred_lang=None) -> LanguagePair:
+        """
+        Paire de langues d'une requête, résolue une fois puis réutilisée
+        preferred_lang: langue à utiliser pour 'auto' avec MyMemory (défaut : self.preferred_lang)
+        """
+        if 'auto' in (source_lang, target_lang):
+            preferred_lang = preferred_lang or self.preferred_lang
+        else:
+            preferred_lang = None
+        key = (source_lang, target_lang, preferred_lang)
+        pair = self.pairs.get(key)
+        if pair is None:
+            pair = LanguagePair(
+                source_lang, target_lang, preferred_lang,
+                self.map_lang_code(source_lang, True, preferred_lang),
+                self.map_lang_code(target_lang, True, preferred_lang)
+            )
+            # Codes inconnus (fournis par le client) : paire résolue sans être gardée.
+            # Course possible entre deux threads : ils construisent la même paire immuable
+            if self.is_known_pair(source_lang, target_lang, preferred_lang):
+                self.pairs[key] = pair
+        return pair
+    
+    def is_known_pair(self, source_lang, target_lang, preferred_lang) -> bool:
+        """Langues de l'application ('auto' en source ou cible, langue préférée éventuelle)"""
+        known = self.mymemory_lang_map
+        return ((source_lang in known or source_lang == 'auto')
+                and (target_lang in known or target_lang == 'auto')
+                and (preferred_lang is None or preferred_lang in known))
     
     def init_counters(self):
         """Initialise ou récupère les compteurs d'utilisation"""
@@ -56,9 +137,10 @@ class TranslationManager:
         # Chemin vers le fichier de compteurs
         counter_file = "translation_counters.json"
         
-        # Valeurs par défaut
-        self.counters = {'google': 0, 'mymemory': 0}
-        self.month = current_month
+        # Valeurs par défaut. Construites à part : ensure_counters() teste
+        # self.counters sans verrou, il ne doit voir que les valeurs finales
+        counters = {'google': 0, 'mymemory': 0}
+        month = current_month
         
         # Charger les compteurs existants si disponibles
         if os.path.exists(counter_file):
@@ -69,16 +151,23 @@ class TranslationManager:
                 # Vérifier si nous sommes dans un nouveau mois
                 if data.get('month') != current_month:
                     # Nouveau mois: réinitialiser les compteurs
-                    print(f"Nouveau mois détecté: réinitialisation des compteurs")
+                    logger.info("Nouveau mois détecté: réinitialisation des compteurs")
                 else:
                     # Même mois: utiliser les compteurs existants
-                    self.counters = data.get('counters', self.counters)
-                    self.month = data.get('month')
+                    counters = data.get('counters', counters)
+                    month = data.get('month')
             except Exception as e:
-                print(f"Erreur lors du chargement des compteurs: {e}")
+                logger.error("Erreur lors du chargement des compteurs: %s", e)
         
-        # Sauvegarder l'état initial
-        self.save_counters()
+        self.month = month
+        self.counters = counters
+    
+    def ensure_counters(self):
+        """Charge les compteurs au premier usage"""
+        if self.counters is None:
+            with self.counters_lock:
+                if self.counters is None:
+                    self.init_counters()
     
     def save_counters(self):
         """Sauvegarde les compteurs dans un fichier"""
@@ -89,19 +178,24 @@ class TranslationManager:
                     'counters': self.counters
                 }, f)
         except Exception as e:
-            print(f"Erreur lors de la sauvegarde des compteurs: {e}")
+            logger.error("Erreur lors de la sauvegarde des compteurs: %s", e)
     
     def update_counter(self, service, char_count):
         """Met à jour le compteur pour un service donné"""
-        self.counters[service] += char_count
-        self.save_counters()
+        self.ensure_counters()
+        # Un seul thread à la fois : incrément et écriture du fichier
+        with self.counters_lock:
+            self.counters[service] += char_count
+            self.save_counters()
         
         # Log pour suivre l'utilisation
         usage_percent = (self.counters[service] / self.limits.get(service, 1000000)) * 100
-        print(f"Service {service}: {self.counters[service]}/{self.limits[service]} caractères ({usage_percent:.2f}%)")
+        logger.info("Service %s: %s/%s caractères (%.2f%%)", service, self.counters[service], self.limits[service], usage_percent)
     
     def get_best_service(self):
         """Détermine le meilleur service à utiliser"""
+        self.ensure_counters()
+        
         # Vérifier quels services sont disponibles (n'ont pas atteint leur limite)
         available_services = []
         for service, limit in self.limits.items():
@@ -109,7 +203,7 @@ class TranslationManager:
                 available_services.append(service)
         
         if not available_services:
-            print("ATTENTION: Tous les services ont atteint leur limite!")
+            logger.warning("ATTENTION: Tous les services ont atteint leur limite!")
             return 'google'  # Par défaut
         
         # Choisir celui qui a le taux d'utilisation le plus bas
@@ -120,24 +214,48 @@ class TranslationManager:
         
         return best_service
     
-    def check_cache(self, text, source_lang, target_lang):
-        """Vérifie si une traduction est déjà en cache"""
-        cache_key = f"{text.lower()}|{source_lang}|{target_lang}"
-        return self.translation_cache.get(cache_key)
+    def quota_usage(self):
+        """Part du quota mensuel consommée par le service le moins utilisé (0 à 1)"""
+        self.ensure_counters()
+        return min(self.counters.get(s, 0) / limit for s, limit in self.limits.items())
     
-    def add_to_cache(self, text, source_lang, target_lang, translation):
+    def cache_key(self, text, pair: LanguagePair):
+        """Clé du cache et des traductions en cours : texte et paire résolue"""
+        return f"{text.lower()}|{pair.key}"
+    
+    def check_cache(self, text, source_lang, target_lang, preferred_lang=None):
+        """
+        Vérifie si une traduction est déjà en cache
+        preferred_lang: langue préférée de la requête pour 'auto' (voir language_pair)
+        """
+        return self.translation_cache.get(self.cache_key(text, self.language_pair(source_lang, target_lang, preferred_lang)))
+    
+    def add_to_cache(self, text, source_lang, target_lang, translation, preferred_lang=None):
         """Ajoute une traduction au cache"""
-        cache_key = f"{text.lower()}|{source_lang}|{target_lang}"
-        
-        # Limiter la taille du cache
-        if len(self.translation_cache) >= self.max_cache_size:
-            # Supprimer une entrée aléatoire
-            self.translation_cache.pop(next(iter(self.translation_cache)))
+        cache_key = self.cache_key(text, self.language_pair(source_lang, target_lang, preferred_lang))
         
-        self.translation_cache[cache_key] = translation
+        with self.cache_lock:
+            # Limiter la taille du cache
+            if len(self.translation_cache) >= self.max_cache_size:
+                # Supprimer l'entrée la plus ancienne
+                self.translation_cache.pop(next(iter(self.translation_cache)), None)
+            
+            self.translation_cache[cache_key] = translation
+    
+    def record_request(self, text, source_lang, target_lang):
+        """Compte une demande de traduction (pour le préchauffage des prochains démarrages)"""
+        with self.request_counts_lock:
+            self.request_counts[(text, source_lang, target_lang)] += 1
+            
+            # Garder seulement les entrées les plus fréquentes
+            if len(self.request_counts) > self.max_tracked_requests:
+                self.request_counts = Counter(dict(self.request_counts.most_common(self.max_tracked_requests // 2)))
     
-    def map_lang_code(self, lang_code, for_mymemory=False):
-        """Convertit les codes de langue au format approprié pour MyMemory si nécessaire"""
+    def map_lang_code(self, lang_code, for_mymemory=False, preferred_lang=None):
+        """
+        Convertit les codes de langue au format approprié pour MyMemory si nécessaire
+        preferred_lang: langue utilisée pour 'auto' (défaut : self.preferred_lang)
+        """
         # Si ce n'est pas pour MyMemory, renvoyer tel quel
         if not for_mymemory:
             return lang_code
@@ -145,14 +263,14 @@ class TranslationManager:
         # IMPORTANT: MyMemory ne supporte pas 'auto' comme code de langue
         # Si 'auto' est spécifié, utiliser la langue préférée à la place
         if lang_code == 'auto':
-            preferred = self.preferred_lang
+            preferred = preferred_lang or self.preferred_lang
             # Obtenir le code formaté pour la langue préférée
             if preferred in self.mymemory_lang_map:
                 mapped_code = self.mymemory_lang_map[preferred]
             else:
                 mapped_code = f"{preferred}-{preferred.upper()}" if len(preferred) == 2 else preferred
             
-            print(f"ATTENTION: 'auto' n'est pas supporté par MyMemory, utilisation de '{mapped_code}' à la place")
+            logger.warning("ATTENTION: 'auto' n'est pas supporté par MyMemory, utilisation de '%s' à la place", mapped_code)
             return mapped_code
         
         # Pour MyMemory, utiliser le mapping spécifique
@@ -168,100 +286,164 @@ class TranslationManager:
         return lang_code
     
     def post_process_translation(self, translation, target_lang):
-        """Applique des corrections post-traduction"""
-        corrections = {
-            'en': {
-                'comment ça va tu': 'how are you',
-                'comment vas-tu': 'how are you',
-                'le le': 'the',
-                'la la': 'the'
-            },
-            'es': {
-                'el el': 'el',
-                'la la': 'la',
-                'como estas tu': 'cómo estás'
-            },
-            'de': {
-                'wie geht es du': 'wie geht es dir',
-                'der der': 'der',
-                'die die': 'die'
-            }
-            # Ajoutez d'autres langues au besoin
-        }
+        """Applique des corrections post-traduction (voir corrections/<langue>.json)"""
+        return self.corrections.apply(translation, target_lang)
+    
+    def create_translator(self, service, pair: LanguagePair, fallback=False):
+        """Crée le traducteur deep_translator du service demandé"""
+        # Importer ici : deep_translator n'est chargé qu'à la première traduction
+        from deep_translator import GoogleTranslator, MyMemoryTranslator
         
-        # Appliquer les corrections pour la langue cible
-        if target_lang in corrections:
-            for wrong, correct in corrections[target_lang].items():
-                translation = translation.replace(wrong, correct)
+        if service == 'google':
+            # Google Translate (supporte 'auto')
+            return GoogleTranslator(source=pair.source, target=pair.target)
         
-        return translation
+        # MyMemory avec les codes de langue appropriés (résolus avec la paire)
+        label = "MyMemory (secours)" if fallback else "MyMemory"
+        logger.debug("%s utilise: source=%s, target=%s", label, pair.mymemory_source, pair.mymemory_target)
+        return MyMemoryTranslator(source=pair.mymemory_source, target=pair.mymemory_target)
     
-    def translate(self, text, source_lang, target_lang='fr'):
-        """Traduit un texte en utilisant le meilleur service"""
+    def translate(self, text, source_lang, target_lang='fr', trace=None, speculative=False, preferred_lang=None):
+        """
+        Traduit un texte en utilisant le meilleur service
+        Sans état partagé modifié (hors cache et compteurs, protégés) : appelable
+        depuis plusieurs threads à la fois
+        trace: trace de latence optionnelle (étape translate.<service>)
+        speculative: pré-traduction d'un brouillon, non comptée dans les demandes fréquentes
+        preferred_lang: langue à utiliser pour 'auto' avec MyMemory
+        """
         if not text or text.strip() == "":
             return ""
         
-        # Si source_lang n'est pas 'auto', mettre à jour la langue préférée
-        if source_lang != 'auto':
-            self.set_preferred_language(source_lang)
+        start = time.monotonic()
+        
+        if not speculative:
+            self.record_request(text, source_lang, target_lang)
+        
+        # Langues résolues pour cette requête : clés de cache et de regroupement
+        pair = self.language_pair(source_lang, target_lang, preferred_lang)
+        key = self.cache_key(text, pair)
         
         # 1. Vérifier d'abord dans le cache (très rapide)
-        cached_translation = self.check_cache(text, source_lang, target_lang)
+        cached_translation = self.translation_cache.get(key)
         if cached_translation:
-            print("Traduction trouvée dans le cache!")
+            logger.info("Traduction trouvée dans le cache!")
+            if trace:
+                trace.span('translate.cache', start)
             return cached_translation
         
-        # 2. Obtenir le meilleur service
+        # 2. Phrases courantes : table locale, sans appel réseau ni quota
+        local_translation = self.phrases.lookup(text, source_lang, target_lang)
+        if local_translation is not None:
+            if trace:
+                trace.span('translate.phrase_table', start)
+            return local_translation
+        
+        # 3. Traduire (les demandes identiques simultanées partagent un seul appel)
+        (translation, service), shared = self.in_flight.do(key, lambda: self._translate_uncached(text, pair))
+        if trace:
+            trace.span('translate.coalesced' if shared else f'translate.{service}', start)
+        return translation
+    
+    def _translate_uncached(self, text, pair: LanguagePair):
+        """
+        Appelle le meilleur service (l'autre en secours) et met le résultat en cache
+        Returns: (traduction, service utilisé ou 'error')
+        """
+        source_lang, target_lang = pair.source, pair.target
         service = self.get_best_service()
-        print(f"Traduction avec le service: {service}")
+        logger.info("Traduction avec le service: %s", service)
         
         try:
-            if service == 'google':
-                # Utiliser Google Translate (supporte 'auto')
-                translator = GoogleTranslator(source=source_lang, target=target_lang)
-                translation = translator.translate(text)
-                self.update_counter('google', len(text))
-            else:
-                # Utiliser MyMemory avec les codes de langue appropriés
-                source = self.map_lang_code(source_lang, True)
-                target = self.map_lang_code(target_lang, True) 
-                
-                print(f"MyMemory utilise: source={source}, target={target}")
-                translator = MyMemoryTranslator(source=source, target=target)
-                translation = translator.translate(text)
-                self.update_counter('mymemory', len(text))
+            translator = self.create_translator(service, pair)
+            translation = translator.translate(text)
+            self.update_counter(service, len(text))
             
-            # 3. Appliquer les corrections post-traduction
+            # 4. Appliquer les corrections post-traduction
             translation = self.post_process_translation(translation, target_lang)
             
-            # 4. Ajouter au cache pour les futures utilisations
-            self.add_to_cache(text, source_lang, target_lang, translation)
+            # 5. Ajouter au cache pour les futures utilisations
+            self.add_to_cache(text, source_lang, target_lang, translation, pair.preferred)
             
-            return translation
+            return translation, service
                 
         except Exception as e:
-            print(f"Erreur avec {service}: {str(e)}")
+            logger.warning("Erreur avec %s: %s", service, e)
             
             # Solution de secours: essayer l'autre service
             try:
-                if service == 'google':
-                    # En cas d'erreur avec Google, utiliser MyMemory
-                    source = self.map_lang_code(source_lang, True)
-                    target = self.map_lang_code(target_lang, True)
-                    
-                    print(f"MyMemory (secours) utilise: source={source}, target={target}")
-                    translator = MyMemoryTranslator(source=source, target=target)
-                else:
-                    # En cas d'erreur avec MyMemory, utiliser Google
-                    translator = GoogleTranslator(source=source_lang, target=target_lang)
+                fallback_service = 'mymemory' if service == 'google' else 'google'
+                translator = self.create_translator(fallback_service, pair, fallback=True)
                     
                 translation = translator.translate(text)
                 translation = self.post_process_translation(translation, target_lang)
-                self.add_to_cache(text, source_lang, target_lang, translation)
-                return translation
+                self.add_to_cache(text, source_lang, target_lang, translation, pair.preferred)
+                return translation, fallback_service
             except Exception as fallback_error:
-                print(f"Erreur de secours: {str(fallback_error)}")
-                return f"Erreur de traduction: {str(e)}"
+                logger.error("Erreur de secours: %s", fallback_error)
+                return f"Erreur de traduction: {str(e)}", 'error'
+    
+    def translate_batch(self, texts, source_lang, target_lang='fr', preferred_lang=None):
+        """
+        Traduit une liste de textes vers une même langue cible.
+        Les textes en cache sont servis directement, les autres sont dédoublonnés
+        puis envoyés au service en un appel groupé (translate_batch de deep_translator).
+        Returns: liste des traductions, dans l'ordre d'origine
+        """
+        results = [""] * len(texts)
+        pair = self.language_pair(source_lang, target_lang, preferred_lang)
+        
+        # 1. Séparer les textes en cache des textes à traduire (dédoublonnés)
+        pending = {}  # {texte: [positions]}
+        for index, text in enumerate(texts):
+            if not text or text.strip() == "":
+                continue
+            cached_translation = (self.translation_cache.get(self.cache_key(text, pair))
+                                  or self.phrases.lookup(text, source_lang, target_lang))
+            if cached_translation:
+                results[index] = cached_translation
+            else:
+                pending.setdefault(text, []).append(index)
+        
+        if not pending:
+            return results
+        
+        misses = list(pending)
+        logger.info("Traduction groupée: %d textes, %d à traduire", len(texts), len(misses))
+        
+        # 2. Un seul appel groupé au meilleur service, puis à l'autre en secours
+        service = self.get_best_service()
+        fallback_service = 'mymemory' if service == 'google' else 'google'
+        translations = None
+        error = None
+        
+        for current_service in (service, fallback_service):
+            try:
+                translator = self.create_translator(
+                    current_service, pair,
+                    fallback=current_service != service
+                )
+                translations = translator.translate_batch(misses)
+                if current_service == service:
+                    self.update_counter(service, sum(len(text) for text in misses))
+                break
+            except Exception as e:
+                logger.warning("Erreur avec %s (lot): %s", current_service, e)
+                if error is None:
+                    error = e
+        
+        # 3. Corrections, mise en cache et remise dans l'ordre d'origine
+        for position, text in enumerate(misses):
+            if translations is None:
+                translation = f"Erreur de traduction: {str(error)}"
+            else:
+                translation = self.post_process_translation(translations[position], target_lang)
+                self.add_to_cache(text, source_lang, target_lang, translation, pair.preferred)
+            
+            for index in pending[text]:
+                results[index] = translation
+        
+        return results
 
 # Créer une instance globale
 translation_manager = TranslationManager()
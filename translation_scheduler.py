@@ -0,0 +1,377 @@
+import os
+import time
+import threading
+from collections import deque, OrderedDict
+from typing import Callable, Dict, Optional
+from translation_manager import translation_manager
+from log_config import get_logger
+
+logger = get_logger(__name__)
+
+class SchedulerOverloaded(Exception):
+    """Travail refusé : file trop longue, attente trop longue ou quota utilisateur dépassé"""
+
+    def __init__(self, message: str, retry_after: int = 2):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """Seau à jetons : `rate` jetons par seconde, au plus `capacity` en réserve"""
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def take(self, amount: float = 1) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    def is_full(self, now: float) -> bool:
+        """Réserve pleine à l'instant `now` (seau inutilisé assez longtemps pour se remplir)"""
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+class Job:
+    """Traduction en attente d'un worker"""
+    __slots__ = ('fn', 'enqueued_at', 'done', 'value', 'error')
+
+    def __init__(self, fn: Callable):
+        self.fn = fn
+        self.enqueued_at = time.monotonic()
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[Exception] = None
+
+    def result(self, timeout: float):
+        """Attend le résultat (relance l'erreur éventuelle)"""
+        if not self.done.wait(timeout):
+            raise SchedulerOverloaded("Délai de traduction dépassé")
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+class RoomQueue:
+    """File d'une salle : la parole de l'hôte passe avant celle des participants"""
+    __slots__ = ('host', 'participants', 'host_streak')
+
+    def __init__(self):
+        self.host = deque()
+        self.participants = deque()
+        self.host_streak = 0
+
+    def __len__(self):
+        return len(self.host) + len(self.participants)
+
+    def pop(self, host_weight: int) -> Job:
+        # Jusqu'à `host_weight` travaux de l'hôte pour un travail de participant
+        if self.host and (self.host_streak < host_weight or not self.participants):
+            self.host_streak += 1
+            return self.host.popleft()
+        self.host_streak = 0
+        return self.participants.popleft()
+
+class TranslationScheduler:
+    """
+    Ordonnanceur placé devant TranslationManager.translate.
+    - Files par salle servies à tour de rôle : une salle bavarde ne ralentit pas les autres
+    - Priorité pondérée à la parole de l'hôte dans chaque salle
+    - Seau à jetons par utilisateur
+    - Rejet (429) au-delà d'une profondeur de file ou d'un temps d'attente
+    - Brouillons (pré-traduction pendant la saisie) en dernière priorité,
+      sur un nombre limité de workers et avec un budget de caractères
+    """
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.workers = int(os.environ.get('TRANSLATION_WORKERS', 4))
+        self.max_queue = int(os.environ.get('TRANSLATION_MAX_QUEUE', 200))
+        self.max_wait = float(os.environ.get('TRANSLATION_MAX_WAIT', 10))
+        self.host_weight = int(os.environ.get('TRANSLATION_HOST_WEIGHT', 3))
+        self.user_rate = float(os.environ.get('TRANSLATION_USER_RATE', 1))
+        self.user_burst = float(os.environ.get('TRANSLATION_USER_BURST', 10))
+
+        self.queues: Dict[str, RoomQueue] = {}
+        self.ring = deque()  # Salles ayant du travail, dans l'ordre de service
+        self.queued = 0
+        self.condition = threading.Condition()
+        self.threads = []
+
+        # Seaux par utilisateur, du moins au plus récemment utilisé
+        self.buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self.buckets_lock = threading.Lock()
+        self.max_buckets = int(os.environ.get('TRANSLATION_MAX_BUCKETS', 10000))
+
+        # Brouillons : {clé (utilisateur, langue cible): Job}, le plus récent remplace le précédent.
+        # Servis seulement quand aucune traduction réelle n'attend
+        self.drafts: 'OrderedDict[tuple, Job]' = OrderedDict()
+        # Au moins un worker reste toujours libre pour les traductions réelles
+        self.draft_workers = min(int(os.environ.get('TRANSLATION_DRAFT_WORKERS', 1)), self.workers - 1)
+        self.draft_max_queue = int(os.environ.get('TRANSLATION_DRAFT_MAX_QUEUE', 50))
+        self.draft_max_age = float(os.environ.get('TRANSLATION_DRAFT_MAX_AGE', 5))
+        self.draft_max_chars = int(os.environ.get('TRANSLATION_DRAFT_MAX_CHARS', 300))
+        self.draft_user_rate = float(os.environ.get('TRANSLATION_DRAFT_USER_RATE', 0.5))
+        # Au-delà de cette part du quota mensuel, plus de pré-traduction
+        self.draft_quota_limit = float(os.environ.get('TRANSLATION_DRAFT_QUOTA_LIMIT', 0.8))
+        draft_chars_per_minute = float(os.environ.get('TRANSLATION_DRAFT_CHARS_PER_MINUTE', 5000))
+        self.draft_chars = TokenBucket(draft_chars_per_minute / 60, draft_chars_per_minute)
+        self.draft_buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self.drafts_running = 0
+
+        # Durée moyenne d'une traduction (moyenne mobile), pour estimer l'attente
+        self.avg_service_time = 0.5
+        self.stats = {'completed': 0, 'cache_hits': 0, 'shed_queue': 0, 'shed_wait': 0, 'shed_rate': 0}
+        self.draft_stats = {'submitted': 0, 'completed': 0, 'superseded': 0, 'expired': 0, 'shed': 0}
+
+    # ------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------
+
+    def _take_token(self, buckets: 'OrderedDict[str, TokenBucket]', user_key: str, rate: float, capacity: float) -> bool:
+        """
+        Consomme un jeton du seau de l'utilisateur (appelé sous buckets_lock).
+        Les seaux redevenus pleins (utilisateurs inactifs) sont retirés par
+        le début de la liste : un seau retiré serait recréé plein, à
+        l'identique. Au-delà de `max_buckets`, le moins récent est évincé.
+        """
+        bucket = buckets.get(user_key)
+        if bucket is None:
+            bucket = buckets[user_key] = TokenBucket(rate, capacity)
+        else:
+            buckets.move_to_end(user_key)
+        allowed = bucket.take()
+
+        now = bucket.updated
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if len(buckets) <= self.max_buckets and not oldest.is_full(now):
+                break
+            buckets.popitem(last=False)
+        return allowed
+
+    def admit(self, user_key: str):
+        """Consomme un jeton de l'utilisateur (lève SchedulerOverloaded si épuisé)"""
+        with self.buckets_lock:
+            allowed = self._take_token(self.buckets, user_key, self.user_rate, self.user_burst)
+
+        if not allowed:
+            self.stats['shed_rate'] += 1
+            raise SchedulerOverloaded("Trop de messages, ralentissez", retry_after=max(1, int(1 / self.user_rate)))
+
+    # ------------------------------------------------------------
+    # Soumission
+    # ------------------------------------------------------------
+
+    def submit(self, fn: Callable, room_key: str, is_host: bool = False) -> Job:
+        """Met un travail en file pour une salle (lève SchedulerOverloaded si saturé)"""
+        job = Job(fn)
+
+        with self.condition:
+            if self.queued >= self.max_queue:
+                self.stats['shed_queue'] += 1
+                raise SchedulerOverloaded("File de traduction pleine")
+
+            estimated_wait = self.queued / self.workers * self.avg_service_time
+            if estimated_wait > self.max_wait:
+                self.stats['shed_wait'] += 1
+                raise SchedulerOverloaded("Temps d'attente trop long", retry_after=int(estimated_wait))
+
+            queue = self.queues.get(room_key)
+            if queue is None:
+                queue = self.queues[room_key] = RoomQueue()
+                self.ring.append(room_key)
+            (queue.host if is_host else queue.participants).append(job)
+            self.queued += 1
+
+            self._ensure_workers()
+            self.condition.notify()
+
+        return job
+
+    def translate_async(self, text, source_lang, target_lang, room_key: str, is_host: bool = False, trace=None):
+        """
+        Soumet une traduction ; retourne un Job (résultat immédiat si en cache)
+        trace: trace de latence optionnelle (étapes queue et translate.<service>)
+        """
+        cached_translation = self.manager.check_cache(text, source_lang, target_lang)
+        if cached_translation:
+            self.stats['cache_hits'] += 1
+            job = Job(None)
+            job.value = cached_translation
+            job.done.set()
+            return job
+
+        enqueued_at = time.monotonic()
+
+        def run():
+            if trace:
+                trace.span('queue', enqueued_at)
+            return self.manager.translate(text, source_lang, target_lang, trace=trace)
+
+        return self.submit(run, room_key, is_host)
+
+    def submit_draft(self, text, source_lang, target_langs, user_key: str) -> int:
+        """
+        Pré-traduit un brouillon vers les langues cibles (résultat mis en cache
+        pour l'envoi final). Au mieux : les brouillons refusés sont ignorés.
+        Returns: nombre de traductions mises en file
+        """
+        if self.draft_workers <= 0 or not text or len(text) > self.draft_max_chars:
+            return 0
+        pending = [
+            target_lang for target_lang in target_langs
+            if target_lang != source_lang
+            and not self.manager.check_cache(text, source_lang, target_lang)
+            and self.manager.phrases.lookup(text, source_lang, target_lang) is None
+        ]
+        if not pending:
+            return 0
+
+        with self.buckets_lock:
+            allowed = (self._take_token(self.draft_buckets, user_key, self.draft_user_rate, 2)
+                       and self.manager.quota_usage() < self.draft_quota_limit
+                       and self.draft_chars.take(len(text) * len(pending)))
+        if not allowed:
+            with self.condition:
+                self.draft_stats['shed'] += 1
+            return 0
+
+        queued = 0
+        with self.condition:
+            for target_lang in pending:
+                key = (user_key, target_lang)
+                # Un brouillon plus récent remplace celui qui attend encore
+                if self.drafts.pop(key, None) is not None:
+                    self.draft_stats['superseded'] += 1
+                elif len(self.drafts) >= self.draft_max_queue:
+                    self.draft_stats['shed'] += 1
+                    continue
+                self.drafts[key] = Job(
+                    lambda target_lang=target_lang: self.manager.translate(text, source_lang, target_lang, speculative=True)
+                )
+                self.draft_stats['submitted'] += 1
+                queued += 1
+
+            self._ensure_workers()
+            self.condition.notify()
+
+        return queued
+
+    def translate(self, text, source_lang, target_lang, room_key: str, is_host: bool = False, trace=None):
+        """Traduit via la file de la salle (appel bloquant)"""
+        return self.translate_async(text, source_lang, target_lang, room_key, is_host, trace).result(self.result_timeout)
+
+    def call(self, fn: Callable, room_key: str, is_host: bool = False):
+        """Exécute un travail de traduction quelconque via la file (appel bloquant)"""
+        return self.submit(fn, room_key, is_host).result(self.result_timeout)
+
+    @property
+    def result_timeout(self) -> float:
+        """Attente maximale d'un résultat : file + exécution"""
+        return self.max_wait * 2
+
+    # ------------------------------------------------------------
+    # Workers
+    # ------------------------------------------------------------
+
+    def _ensure_workers(self):
+        """Démarre les workers au premier travail (appelé sous self.condition)"""
+        if self.threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f'translation-worker-{i}')
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def _draft_ready(self) -> bool:
+        """Un brouillon peut-il passer ? (appelé sous self.condition)"""
+        return bool(self.drafts) and self.drafts_running < self.draft_workers
+
+    def _next_job(self) -> Job:
+        """Prochain travail, salle par salle à tour de rôle (appelé sous self.condition)"""
+        room_key = self.ring.popleft()
+        queue = self.queues[room_key]
+        job = queue.pop(self.host_weight)
+        if queue:
+            self.ring.append(room_key)
+        else:
+            del self.queues[room_key]
+        self.queued -= 1
+        return job
+
+    def _run_draft(self, job: Job):
+        """Exécute un brouillon (compté dans drafts_running jusqu'à la fin)"""
+        outcome = None
+        try:
+            if time.monotonic() - job.enqueued_at > self.draft_max_age:
+                # L'utilisateur a déjà envoyé ou continué à écrire
+                outcome = 'expired'
+                return
+            job.fn()
+            outcome = 'completed'
+        except Exception as e:
+            logger.debug("Brouillon non traduit: %s", e)
+        finally:
+            # Compteurs des brouillons sous la condition, comme le reste de leur état
+            with self.condition:
+                if outcome:
+                    self.draft_stats[outcome] += 1
+                self.drafts_running -= 1
+                if self._draft_ready():
+                    self.condition.notify()
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                # Les traductions réelles passent toujours avant les brouillons
+                while not self.ring and not self._draft_ready():
+                    self.condition.wait()
+                if not self.ring:
+                    _, draft = self.drafts.popitem(last=False)
+                    self.drafts_running += 1
+                    job = None
+                else:
+                    job = self._next_job()
+
+            if job is None:
+                self._run_draft(draft)
+                continue
+
+            # Travail resté trop longtemps en file : le client a déjà abandonné
+            if time.monotonic() - job.enqueued_at > self.max_wait:
+                self.stats['shed_wait'] += 1
+                job.error = SchedulerOverloaded("Temps d'attente trop long")
+                job.done.set()
+                continue
+
+            start = time.monotonic()
+            try:
+                job.value = job.fn()
+            except Exception as e:
+                job.error = e
+            finally:
+                elapsed = time.monotonic() - start
+                self.avg_service_time = 0.9 * self.avg_service_time + 0.1 * elapsed
+                self.stats['completed'] += 1
+                job.done.set()
+
+    def get_stats(self) -> dict:
+        """État de l'ordonnanceur"""
+        return {
+            'queued': self.queued,
+            'rooms_waiting': len(self.ring),
+            'workers': self.workers,
+            'avg_service_time': round(self.avg_service_time, 3),
+            **self.stats,
+            'drafts': {'queued': len(self.drafts), 'running': self.drafts_running, **self.draft_stats}
+        }
+
+# Instance globale
+translation_scheduler = TranslationScheduler(translation_manager)